@@ -0,0 +1,45 @@
+"""
+Inferra Python SDK.
+
+The clients are imported on first access, so ``import inferra`` (and
+importing the models or utilities on their own) doesn't load aiohttp or the
+API surfaces until they are needed.
+"""
+from typing import TYPE_CHECKING
+from ._lazy import lazy_module
+from .exceptions import (
+    InferraError,
+    InferraAPIError,
+    InferraRateLimitError,
+    InferraAuthenticationError,
+    InferraConnectionError,
+    InferraValidationError
+)
+
+if TYPE_CHECKING:
+    from .client import InferraClient
+    from .sync_client import SyncInferraClient
+    from .pool import InferraClientPool
+
+__version__ = "0.1.0"
+
+# Lazily imported attributes and the submodule defining each
+_LAZY_ATTRIBUTES = {
+    "InferraClient": ".client",
+    "SyncInferraClient": ".sync_client",
+    "InferraClientPool": ".pool",
+}
+
+__all__ = [
+    "InferraClient",
+    "SyncInferraClient",
+    "InferraClientPool",
+    "InferraError",
+    "InferraAPIError",
+    "InferraRateLimitError",
+    "InferraAuthenticationError",
+    "InferraConnectionError",
+    "InferraValidationError"
+]
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_ATTRIBUTES)
@@ -0,0 +1,36 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+def lazy_module(name: str, attributes: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Build the PEP 562 ``__getattr__`` and ``__dir__`` of a lazily importing package.
+
+    The exported names are imported from their module on first access, so
+    importing the package (or one of its modules) doesn't load the others.
+
+    Example:
+        __getattr__, __dir__ = lazy_module(__name__, _LAZY_ATTRIBUTES)
+
+    Args:
+        name: ``__name__`` of the package
+        attributes: Exported names mapped to the relative module defining them
+
+    Returns:
+        The package's ``__getattr__`` and ``__dir__``
+    """
+    namespace = sys.modules[name].__dict__
+
+    def __getattr__(attribute: str) -> Any:
+        module = attributes.get(attribute)
+        if module is None:
+            raise AttributeError(f"module {name!r} has no attribute {attribute!r}")
+        value = getattr(importlib.import_module(module, name), attribute)
+        # Cache it so __getattr__ only runs on the first access
+        namespace[attribute] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(attributes))
+
+    return __getattr__, __dir__
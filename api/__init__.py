@@ -1,6 +1,21 @@
-from .chat import ChatAPI
-from .completions import CompletionsAPI
-from .batch import BatchAPI
-from .files import FilesAPI
+from typing import TYPE_CHECKING
+from .._lazy import lazy_module
 
-__all__ = ["ChatAPI", "CompletionsAPI", "BatchAPI", "FilesAPI"]
+if TYPE_CHECKING:
+    from .chat import ChatAPI
+    from .completions import CompletionsAPI
+    from .batch import BatchAPI, BatchWatcher
+    from .files import FilesAPI
+
+# Imported on first access, so loading one API doesn't load the others
+_LAZY_ATTRIBUTES = {
+    "ChatAPI": ".chat",
+    "CompletionsAPI": ".completions",
+    "BatchAPI": ".batch",
+    "BatchWatcher": ".batch",
+    "FilesAPI": ".files",
+}
+
+__all__ = ["ChatAPI", "CompletionsAPI", "BatchAPI", "BatchWatcher", "FilesAPI"]
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_ATTRIBUTES)
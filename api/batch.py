@@ -1,15 +1,339 @@
-from typing import Optional, Dict, Any
-from ..models.batch import Batch, BatchFile
-from ..utils.retry import retry_with_exponential_backoff
-from ..exceptions import InferraAPIError
+from typing import (
+    Optional,
+    Dict,
+    Any,
+    Union,
+    Iterable,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Tuple,
+)
+from pathlib import Path
+from ..models.batch import Batch, BatchFile, BatchResult
+from ..utils.retry import retry_with_exponential_backoff, track_in_flight
+from ..utils.batch_results import BatchResultReader
+from ..utils import codec
+from ..exceptions import InferraAPIError, InferraValidationError
+from .files import UPLOAD_CHUNK_SIZE
 import json
 import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Per-file limits of batch input files
+MAX_REQUESTS_PER_SHARD = 50_000
+MAX_BYTES_PER_SHARD = 100 * 1024 * 1024
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled", "expired"})
+
+# Batches about to finish are polled at the minimum interval
+_FINISHING_STATUSES = frozenset({"finalizing", "cancelling"})
+
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _window_seconds(completion_window: str) -> Optional[float]:
+    """Parse a completion window such as "24h" into seconds."""
+    try:
+        return float(completion_window[:-1]) * _WINDOW_UNITS[completion_window[-1]]
+    except (KeyError, ValueError, IndexError):
+        return None
+
+class _WatchedBatch:
+    """Polling state of one watched batch."""
+    __slots__ = (
+        "future", "callbacks", "waiters", "min_interval", "interval",
+        "next_poll", "last_done", "last_seen", "rate", "created_at",
+    )
+
+    def __init__(self, future: asyncio.Future, min_interval: float):
+        self.future = future
+        self.callbacks: list = []
+        self.waiters = 0
+        self.min_interval = min_interval
+        self.interval = min_interval
+        self.next_poll = 0.0
+        self.last_done: Optional[int] = None
+        self.last_seen = 0.0
+        # Requests finished per second, smoothed
+        self.rate = 0.0
+        # Known after the first poll; bounds how deep listings must go
+        self.created_at: Optional[int] = None
+
+class BatchWatcher:
+    def __init__(
+        self,
+        batch_api: "BatchAPI",
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        page_size: int = 100,
+        list_threshold: int = 3,
+        max_pages: int = 20
+    ):
+        """
+        Watch many batches with a single polling loop.
+
+        Due batches are refreshed together through paged list() calls (one
+        request per ``page_size`` batches) instead of one retrieve() each;
+        batches not found in the listed pages fall back to retrieve(). Each
+        batch is polled at its own adaptive interval: quickly while it is
+        about to finish, slowly while little progress is being made, and
+        never more often than the time left would justify.
+
+        Args:
+            batch_api: The batch API used for polling
+            min_interval: Shortest time between two polls of a batch
+            max_interval: Longest time between two polls of a batch
+            page_size: Batches requested per list() page
+            list_threshold: Smallest number of due batches refreshed via
+                list() rather than individual retrieve() calls
+            max_pages: Most list() pages fetched in one refresh
+        """
+        self.batch_api = batch_api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.page_size = page_size
+        self.list_threshold = list_threshold
+        self.max_pages = max_pages
+        self._watched: Dict[str, _WatchedBatch] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def watching(self) -> int:
+        """Number of batches being watched."""
+        return len(self._watched)
+
+    def watch(
+        self,
+        batch_id: str,
+        callback: Optional[Callable[[Batch], None]] = None,
+        min_interval: Optional[float] = None
+    ) -> asyncio.Future:
+        """
+        Start watching a batch.
+
+        Args:
+            batch_id: The ID of the batch
+            callback: Optional function called with the Batch once it
+                reaches a terminal state
+            min_interval: Shortest time between polls of this batch
+
+        Returns:
+            Future resolved with the Batch once it reaches a terminal state
+        """
+        watched = self._watched.get(batch_id)
+        if watched is None:
+            future = asyncio.get_running_loop().create_future()
+            watched = _WatchedBatch(future, max(min_interval or self.min_interval, 0.0))
+            self._watched[batch_id] = watched
+        if callback is not None:
+            watched.callbacks.append(callback)
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return watched.future
+
+    def unwatch(self, batch_id: str):
+        """Stop watching a batch, cancelling its future."""
+        watched = self._watched.pop(batch_id, None)
+        if watched is not None and not watched.future.done():
+            watched.future.cancel()
+
+    async def wait(
+        self,
+        batch_id: str,
+        timeout: Optional[float] = None,
+        min_interval: Optional[float] = None
+    ) -> Batch:
+        """
+        Wait for a batch to reach a terminal state.
+
+        Args:
+            batch_id: The ID of the batch
+            timeout: Maximum time to wait in seconds
+            min_interval: Shortest time between polls of this batch
+
+        Returns:
+            The finished Batch
+
+        Raises:
+            TimeoutError: If the batch doesn't finish within the timeout
+        """
+        future = self.watch(batch_id, min_interval=min_interval)
+        watched = self._watched.get(batch_id)
+        if watched is not None:
+            watched.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Batch {batch_id} did not complete within {timeout} seconds")
+        finally:
+            if watched is not None:
+                watched.waiters -= 1
+                if watched.waiters == 0 and not watched.callbacks and not future.done():
+                    self.unwatch(batch_id)
+
+    async def close(self):
+        """Stop polling and cancel every pending future."""
+        for batch_id in list(self._watched):
+            self.unwatch(batch_id)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while self._watched:
+            now = time.monotonic()
+            if any(watched.next_poll <= now for watched in self._watched.values()):
+                # Refresh batches that are nearly due along with the due
+                # ones, so they share the same list() pages
+                due = [
+                    batch_id
+                    for batch_id, watched in self._watched.items()
+                    if watched.next_poll - watched.interval * 0.25 <= now
+                ]
+                await self._refresh(due)
+                continue
+
+            delay = min(watched.next_poll for watched in self._watched.values()) - now
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, due: list):
+        pending = set(due)
+        if len(pending) >= self.list_threshold:
+            try:
+                await self._refresh_by_listing(pending)
+            except Exception as e:
+                logger.debug("Listing batches failed, falling back to retrieve: %s", e)
+
+        async def retrieve(batch_id):
+            try:
+                self._update(await self.batch_api.retrieve(batch_id))
+            except Exception as e:
+                self._failed(batch_id, e)
+
+        # Bounded so a large fallback doesn't burst through the rate limit
+        for start in range(0, len(due), self.page_size):
+            chunk = [batch_id for batch_id in due[start:start + self.page_size] if batch_id in pending]
+            await asyncio.gather(*(retrieve(batch_id) for batch_id in chunk))
+
+    async def _refresh_by_listing(self, pending: set):
+        """Refresh batches from list() pages, removing the ones found from ``pending``."""
+        # Listing is newest first: stop once past the oldest pending batch.
+        # Until every pending batch has been seen once, its age is unknown
+        # and the depth is bounded by the number of watched batches instead.
+        created = [self._watched[batch_id].created_at for batch_id in pending]
+        oldest = None if None in created else min(created)
+        max_pages = self.max_pages
+        if oldest is None:
+            max_pages = min(max_pages, -(-len(self._watched) // self.page_size) + 1)
+
+        after = None
+        for _ in range(max_pages):
+            page = await self.batch_api.list(limit=self.page_size, after=after)
+            for batch in page:
+                if batch.id in self._watched:
+                    self._update(batch)
+                    pending.discard(batch.id)
+            if not pending or len(page) < self.page_size:
+                return
+            if oldest is not None and page[-1].created_at < oldest:
+                return
+            after = page[-1].id
+
+    def _failed(self, batch_id: str, error: Exception):
+        watched = self._watched.get(batch_id)
+        if watched is None:
+            return
+        if getattr(error, "status_code", None) == 404:
+            del self._watched[batch_id]
+            if not watched.future.done():
+                watched.future.set_exception(error)
+            return
+        # Transient failure: back off and poll again later
+        watched.interval = min(self.max_interval, watched.interval * 2)
+        watched.next_poll = time.monotonic() + watched.interval
+
+    def _update(self, batch: Batch):
+        watched = self._watched.get(batch.id)
+        if watched is None:
+            return
+        watched.created_at = batch.created_at
+
+        if batch.status in TERMINAL_STATUSES:
+            del self._watched[batch.id]
+            if not watched.future.done():
+                watched.future.set_result(batch)
+            for callback in watched.callbacks:
+                try:
+                    callback(batch)
+                except Exception:
+                    logger.exception("Batch watcher callback failed for %s", batch.id)
+            return
+
+        now = time.monotonic()
+        watched.interval = self._next_interval(watched, batch, now)
+        watched.next_poll = now + watched.interval
+
+    def _next_interval(self, watched: _WatchedBatch, batch: Batch, now: float) -> float:
+        """Pick the delay before the next poll of a batch from its progress."""
+        low = watched.min_interval
+        high = max(low, self.max_interval)
+        if batch.status in _FINISHING_STATUSES:
+            return low
+
+        counts = batch.request_counts
+        done = counts.completed + counts.failed
+        previous_done, previous_seen = watched.last_done, watched.last_seen
+        watched.last_done, watched.last_seen = done, now
+
+        if previous_done is None:
+            interval = low
+        elif done > previous_done and now > previous_seen:
+            rate = (done - previous_done) / (now - previous_seen)
+            watched.rate = rate if not watched.rate else 0.5 * watched.rate + 0.5 * rate
+            remaining = max(counts.total - done, 0) / watched.rate
+            # Poll a few times over the expected remaining time
+            interval = remaining / 4
+        else:
+            # No progress since the last poll
+            interval = watched.interval * 1.5
+
+        window = _window_seconds(batch.completion_window)
+        if window:
+            # Nothing happens faster than a small fraction of the window
+            interval = min(interval, max(window / 100, low))
+
+        return min(high, max(low, interval))
 
 class BatchAPI:
     def __init__(self, client):
         self.client = client
+        self._watcher: Optional[BatchWatcher] = None
+
+    @property
+    def watcher(self) -> BatchWatcher:
+        """The watcher shared by every wait on this client's batches."""
+        if self._watcher is None:
+            self._watcher = BatchWatcher(self)
+        return self._watcher
 
-    @retry_with_exponential_backoff(max_retries=3)
+    @track_in_flight
+    # Creating a batch twice would run (and bill) it twice
+    @retry_with_exponential_backoff(max_retries=3, idempotent=False)
     async def create(
         self,
         input_file_id: str,
@@ -37,7 +361,9 @@ class BatchAPI:
 
         try:
             response = await self.client.post("/batch", json=payload)
-            return Batch(**response.json())
+            return Batch(**response)
+        except InferraAPIError:
+            raise
         except Exception as e:
             raise InferraAPIError(f"Error creating batch: {str(e)}")
 
@@ -53,7 +379,9 @@ class BatchAPI:
         """
         try:
             response = await self.client.get(f"/batch/{batch_id}")
-            return Batch(**response.json())
+            return Batch(**response)
+        except InferraAPIError:
+            raise
         except Exception as e:
             raise InferraAPIError(f"Error retrieving batch {batch_id}: {str(e)}")
 
@@ -78,7 +406,7 @@ class BatchAPI:
 
         try:
             response = await self.client.get("/batch", params=params)
-            return [Batch(**batch) for batch in response.json()]
+            return [Batch(**batch) for batch in response]
         except Exception as e:
             raise InferraAPIError(f"Error listing batches: {str(e)}")
 
@@ -91,10 +419,14 @@ class BatchAPI:
         """
         Wait for a batch job to complete.
 
+        All waits share the client's BatchWatcher, so waiting on many
+        batches at once costs a few list() calls per poll rather than one
+        retrieve() per batch.
+
         Args:
             batch_id: The ID of the batch to wait for
             timeout: Maximum time to wait in seconds
-            poll_interval: Time between status checks in seconds
+            poll_interval: Shortest time between status checks in seconds
 
         Returns:
             Completed Batch object
@@ -102,18 +434,228 @@ class BatchAPI:
         Raises:
             TimeoutError: If the batch doesn't complete within the timeout
         """
-        start_time = asyncio.get_event_loop().time()
-        
-        while True:
-            batch = await self.retrieve(batch_id)
-            
-            if batch.status in ["completed", "failed", "cancelled", "expired"]:
-                return batch
-            
-            if asyncio.get_event_loop().time() - start_time > timeout:
-                raise TimeoutError(f"Batch {batch_id} did not complete within {timeout} seconds")
-            
-            await asyncio.sleep(poll_interval)
+        return await self.watcher.wait(batch_id, timeout=timeout, min_interval=poll_interval)
+
+    async def results(
+        self,
+        batch: Union[str, Batch],
+        output_file: Union[str, Path],
+        errors: bool = False
+    ) -> BatchResultReader:
+        """
+        Download the results of a finished batch and open them lazily.
+
+        Args:
+            batch: The batch or its ID
+            output_file: Path to save the results to
+            errors: Download the error file instead of the output file
+
+        Returns:
+            BatchResultReader over the downloaded file
+
+        Raises:
+            InferraAPIError: If the batch has no such file (yet)
+        """
+        if isinstance(batch, str):
+            batch = await self.retrieve(batch)
+
+        file_id = batch.error_file_id if errors else batch.output_file_id
+        if file_id is None:
+            kind = "error" if errors else "output"
+            raise InferraAPIError(f"Batch {batch.id} has no {kind} file (status: {batch.status})")
+
+        await self.client.files.download(file_id, output_file)
+        return BatchResultReader(output_file)
+
+    async def run_many(
+        self,
+        requests: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        work_dir: Union[str, Path],
+        completion_window: str = "24h",
+        metadata: Optional[Dict[str, Any]] = None,
+        max_requests_per_shard: int = MAX_REQUESTS_PER_SHARD,
+        max_bytes_per_shard: int = MAX_BYTES_PER_SHARD,
+        max_concurrent_uploads: int = 4,
+        timeout: float = 86400,
+        poll_interval: float = 5,
+        on_status: Optional[Callable[[int, Batch], None]] = None
+    ) -> AsyncIterator[Tuple[Dict[str, Any], Optional[BatchResult]]]:
+        """
+        Run any number of batch requests as a pipeline of sharded batches.
+
+        Requests are read lazily and split into shards bounded by request
+        count and size. Each shard is uploaded as soon as it is written,
+        its batch is created as soon as the upload finishes, and all
+        batches run at the same time, so the total time is roughly that of
+        the slowest shard rather than the sum of all of them. Results are
+        streamed back in input order as each shard finishes.
+
+        Shard inputs and results are written to ``work_dir`` (as
+        ``shard-NNNNN.input.jsonl`` and ``shard-NNNNN.output.jsonl``), so
+        memory use does not grow with the number of requests. An input file
+        is deleted once its shard's results have been yielded; the result
+        files are kept. Batches already created keep running on the server
+        if the iteration is abandoned.
+
+        Args:
+            requests: Batch request records, each with a unique ``custom_id``
+            work_dir: Directory for shard input and result files
+            completion_window: Time window for each batch
+            metadata: Optional metadata attached to every batch
+            max_requests_per_shard: Maximum requests in one batch
+            max_bytes_per_shard: Maximum size of one batch input file
+            max_concurrent_uploads: Maximum shards uploaded at the same time
+            timeout: Maximum time to wait for each batch in seconds
+            poll_interval: Time between status checks in seconds
+            on_status: Optional callback receiving (shard index, Batch) when
+                a batch is created and when it finishes
+
+        Yields:
+            (request, result) tuples in input order. Requests of a batch
+            that did not complete get a result carrying an ``error``.
+
+        Raises:
+            InferraValidationError: If a request has no custom_id
+            InferraAPIError: If uploading or creating a batch fails
+        """
+        directory = Path(work_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        upload_slots = asyncio.Semaphore(max_concurrent_uploads)
+        shards: asyncio.Queue = asyncio.Queue()
+
+        async def run_shard(index: int, input_path: Path):
+            async with upload_slots:
+                uploaded = await self.client.files.create(input_path)
+            batch = await self.create(
+                uploaded.id,
+                completion_window=completion_window,
+                metadata=metadata
+            )
+            if on_status is not None:
+                on_status(index, batch)
+
+            batch = await self.wait_for_completion(batch.id, timeout=timeout, poll_interval=poll_interval)
+            if on_status is not None:
+                on_status(index, batch)
+
+            output = errors = None
+            if batch.output_file_id:
+                output = await self.results(batch, directory / f"shard-{index:05d}.output.jsonl")
+            if batch.error_file_id:
+                errors = await self.results(batch, directory / f"shard-{index:05d}.errors.jsonl", errors=True)
+            return input_path, batch, output, errors
+
+        async def produce():
+            try:
+                async for index, input_path in self._write_shards(
+                    requests, directory, max_requests_per_shard, max_bytes_per_shard
+                ):
+                    await shards.put(asyncio.ensure_future(run_shard(index, input_path)))
+            finally:
+                await shards.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        started = []
+        try:
+            while True:
+                task = await shards.get()
+                if task is None:
+                    break
+                started.append(task)
+                input_path, batch, output, errors = await task
+                try:
+                    with BatchResultReader(input_path) as inputs:
+                        for record in inputs.iter_raw():
+                            custom_id = record["custom_id"]
+                            result = output.get(custom_id) if output else None
+                            if result is None and errors:
+                                result = errors.get(custom_id)
+                            if result is None and batch.status != "completed":
+                                result = BatchResult(
+                                    custom_id=custom_id,
+                                    error={"message": f"Batch {batch.id} {batch.status}"}
+                                )
+                            yield record, result
+                finally:
+                    for reader in (output, errors):
+                        if reader is not None:
+                            reader.close()
+                # Every request of the shard has been joined with its result
+                input_path.unlink()
+            # Surface errors raised while sharding the input
+            await producer
+        finally:
+            producer.cancel()
+            while not shards.empty():
+                task = shards.get_nowait()
+                if task is not None:
+                    started.append(task)
+            for task in started:
+                task.cancel()
+            # Let the cancelled shards unwind before the caller moves on
+            await asyncio.gather(*started, producer, return_exceptions=True)
+
+    async def _write_shards(
+        self,
+        requests: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        directory: Path,
+        max_requests: int,
+        max_bytes: int
+    ) -> AsyncIterator[Tuple[int, Path]]:
+        """
+        Split requests into JSONL shard files.
+
+        Yields:
+            (shard index, path) for each shard once it is fully written
+        """
+        loop = asyncio.get_running_loop()
+
+        async def records():
+            if hasattr(requests, "__aiter__"):
+                async for record in requests:
+                    yield record
+            else:
+                for record in requests:
+                    yield record
+
+        index = 0
+        path = None
+        file = None
+        count = size = 0
+        buffer = bytearray()
+        try:
+            async for record in records():
+                if "custom_id" not in record:
+                    raise InferraValidationError("Every batch request needs a custom_id")
+
+                line = codec.dumps(record) + b"\n"
+                if file is not None and (count >= max_requests or size + len(line) > max_bytes):
+                    await loop.run_in_executor(None, file.write, bytes(buffer))
+                    buffer.clear()
+                    file.close()
+                    yield index, path
+                    index += 1
+                    file = None
+
+                if file is None:
+                    path = directory / f"shard-{index:05d}.input.jsonl"
+                    file = open(path, "wb")
+                    count = size = 0
+
+                buffer += line
+                count += 1
+                size += len(line)
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    await loop.run_in_executor(None, file.write, bytes(buffer))
+                    buffer.clear()
+
+            if file is not None:
+                await loop.run_in_executor(None, file.write, bytes(buffer))
+                file.close()
+                yield index, path
+        finally:
+            if file is not None and not file.closed:
+                file.close()
 
     async def cancel(self, batch_id: str) -> Batch:
         """
@@ -127,6 +669,6 @@ class BatchAPI:
         """
         try:
             response = await self.client.post(f"/batch/{batch_id}/cancel")
-            return Batch(**response.json())
+            return Batch(**response)
         except Exception as e:
             raise InferraAPIError(f"Error cancelling batch {batch_id}: {str(e)}")
@@ -1,19 +1,28 @@
-from typing import List, Optional, Union, AsyncIterator, Dict, Any
+from typing import List, Optional, Union, AsyncIterator, AsyncIterable, Dict, Any, Iterable, Tuple
 from ..models.chat import ChatCompletion, ChatCompletionChunk, Message
-from ..utils.retry import retry_with_exponential_backoff
-from ..utils.rate_limiter import RateLimiter
-from ..utils.validators import validate_messages, validate_model
+from ..models.trusted import TrustedChatCompletion, TrustedChatCompletionChunk
+from ..utils.retry import retry_with_exponential_backoff, track_in_flight
+from ..utils.token_counter import TokenCounter
+from ..utils.rate_limiter import TokenBudgetMixin
+from ..utils.concurrency import bounded_map
+from ..utils.cache import ResponseCacheMixin, record_stream, replay_stream
+from ..utils.validators import MessageValidator
+from ..utils.prompts import MessagePrefix
 from ..exceptions import InferraAPIError, InferraValidationError
 from ..constants import ENDPOINTS
+from ..client import _deterministic
 
-class ChatAPI:
+class ChatAPI(TokenBudgetMixin, ResponseCacheMixin):
     """
     API client for chat completions.
     
     Handles chat-based interactions with the model, including streaming responses
     and rate limiting.
     """
-    
+    _cache_endpoint = ENDPOINTS["chat"]
+    _response_model = ChatCompletion
+    _trusted_response_model = TrustedChatCompletion
+
     def __init__(self, client):
         """
         Initialize the chat API client.
@@ -22,11 +31,10 @@ class ChatAPI:
             client: The main Inferra client instance
         """
         self.client = client
-        self.rate_limiter = RateLimiter(
-            requests_per_minute=500,
-            burst_size=50
-        )
+        # Message tuples reused across calls are only validated once
+        self.validator = MessageValidator(validate_once=True)
 
+    @track_in_flight
     @retry_with_exponential_backoff(max_retries=3)
     async def create(
         self,
@@ -38,19 +46,26 @@ class ChatAPI:
         top_p: Optional[float] = None,
         frequency_penalty: Optional[float] = None,
         presence_penalty: Optional[float] = None,
+        cache: Optional[bool] = None,
+        prefix: Optional[MessagePrefix] = None,
     ) -> Union[ChatCompletion, AsyncIterator[ChatCompletionChunk]]:
         """
         Create a chat completion.
 
         Args:
             model: The model to use for completion
-            messages: List of messages in the conversation
+            messages: List of messages in the conversation (a tuple that
+                is reused across calls is only validated the first time)
             stream: Whether to stream the response
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens to generate
             top_p: Nucleus sampling parameter
             frequency_penalty: Frequency penalty parameter
             presence_penalty: Presence penalty parameter
+            cache: Whether to use the client's response cache. By default
+                only deterministic (temperature=0) requests are cached.
+            prefix: Pre-serialized messages the conversation starts with,
+                followed by ``messages`` (which may then be empty)
 
         Returns:
             Either a ChatCompletion or an AsyncIterator of ChatCompletionChunks
@@ -60,8 +75,10 @@ class ChatAPI:
             InferraAPIError: If the API request fails
         """
         # Validate inputs
-        validate_model(model)
-        validate_messages(messages)
+        self.validator.validate_model(model)
+        if prefix is None or messages:
+            # A prefix was validated when it was built
+            self.validator.validate_messages(messages)
         
         if temperature is not None and not 0 <= temperature <= 2:
             raise InferraValidationError("Temperature must be between 0 and 2")
@@ -69,22 +86,60 @@ class ChatAPI:
         if max_tokens is not None and max_tokens < 1:
             raise InferraValidationError("max_tokens must be positive")
 
-        await self.rate_limiter.acquire()
-        
+        payload = self._build_payload(locals())
+        if prefix is None:
+            request_body = {"json": payload}
+        else:
+            request_body = {
+                "data": prefix.build_body(payload),
+                "headers": {"Content-Type": "application/json"},
+                # The spliced body isn't decoded again to tell this
+                "coalesce": _deterministic(payload)
+            }
+
+        cache_key = self._cache_key(
+            payload if prefix is None else {**payload, "prefix": prefix.digest},
+            temperature,
+            cache
+        )
+        if cache_key is not None:
+            cached = await self.client.response_cache.get(cache_key)
+            if cached is not None:
+                if stream:
+                    return self._handle_streaming_response(
+                        replay_stream(cached, "chat.completion.chunk"),
+                        reserved_tokens=None
+                    )
+                return self._decode_completion(cached)
+
+        reserved_tokens = await self._reserve_tokens_once(
+            ENDPOINTS["chat"], stream, request_body, model, max_tokens, messages, prefix
+        )
+
         try:
-            payload = self._build_payload(locals())
-            
             response = await self.client.post(
                 ENDPOINTS["chat"],
-                json=payload,
-                stream=stream
+                stream=stream,
+                **request_body
             )
             
             if stream:
-                return self._handle_streaming_response(response)
-            return ChatCompletion(**response.json())
+                if cache_key is not None:
+                    response = record_stream(
+                        response,
+                        self.client.response_cache,
+                        cache_key,
+                        "chat.completion"
+                    )
+                return self._handle_streaming_response(response, reserved_tokens)
+            if cache_key is not None:
+                await self.client.response_cache.set(cache_key, response)
+            completion = self._decode_completion(response)
+            self._settle_tokens(reserved_tokens, completion.usage)
+            return completion
             
         except Exception as e:
+            self._cancel_tokens(reserved_tokens)
             if isinstance(e, InferraAPIError):
                 raise
             raise InferraAPIError(f"Chat completion failed: {str(e)}")
@@ -117,15 +172,31 @@ class ChatAPI:
         
         return payload
 
+    def _count_prompt_tokens(
+        self,
+        counter: TokenCounter,
+        messages: List[Message],
+        prefix: Optional[MessagePrefix] = None
+    ) -> int:
+        """Count the prompt tokens of the messages and the prefix they follow (counted once)."""
+        prompt_tokens = counter.count_message_tokens(messages)["prompt_tokens"]
+        if prefix is not None:
+            prompt_tokens += prefix.count_tokens(counter)
+        return prompt_tokens
+
     async def _handle_streaming_response(
         self,
-        response
+        response,
+        reserved_tokens: Optional[int] = 0
     ) -> AsyncIterator[ChatCompletionChunk]:
         """
         Handle streaming response from the API.
 
         Args:
-            response: The streaming response object
+            response: Async iterator over the decoded stream events
+            reserved_tokens: Tokens reserved for this request, settled
+                against the usage reported in the final chunk (None for
+                responses replayed from the cache)
 
         Yields:
             ChatCompletionChunk objects
@@ -133,32 +204,99 @@ class ChatAPI:
         Raises:
             InferraAPIError: If there's an error processing the stream
         """
+        trusted = self.client.config.trusted_decode
+        usage = None
         try:
-            async for line in response.iter_lines():
-                if line:
-                    chunk = ChatCompletionChunk.parse_raw(line)
-                    yield chunk
+            async for event in response:
+                if trusted:
+                    chunk = TrustedChatCompletionChunk.from_dict(event)
+                else:
+                    chunk = ChatCompletionChunk(**event)
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                yield chunk
+        except InferraAPIError:
+            raise
         except Exception as e:
             raise InferraAPIError(f"Error processing stream: {str(e)}")
+        finally:
+            # Close the underlying stream promptly if the consumer stopped early
+            await response.aclose()
+            self._settle_tokens(reserved_tokens, usage)
 
     async def create_many(
         self,
         model: str,
-        message_lists: List[List[Message]],
+        message_lists: Iterable[List[Message]],
+        max_concurrency: int = 16,
+        return_exceptions: bool = False,
         **kwargs
-    ) -> List[ChatCompletion]:
+    ) -> List[Union[ChatCompletion, Exception]]:
         """
         Create multiple chat completions in parallel.
 
+        At most ``max_concurrency`` requests are in flight at a time. Use
+        iter_many() to process results as they arrive without holding all of
+        them in memory.
+
         Args:
             model: The model to use
-            message_lists: List of message lists, one for each completion
+            message_lists: Message lists, one for each completion
+            max_concurrency: Maximum number of requests in flight
+            return_exceptions: Return failed completions as exceptions in the
+                result list instead of raising the first failure
             **kwargs: Additional parameters passed to create()
 
         Returns:
-            List of ChatCompletion objects
+            List of ChatCompletion objects in the same order as the input
+        """
+        return [
+            result
+            async for _, result in self.iter_many(
+                model,
+                message_lists,
+                max_concurrency=max_concurrency,
+                ordered=True,
+                return_exceptions=return_exceptions,
+                **kwargs
+            )
+        ]
+
+    async def iter_many(
+        self,
+        model: str,
+        message_lists: Union[Iterable[List[Message]], AsyncIterable[List[Message]]],
+        max_concurrency: int = 16,
+        ordered: bool = False,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> AsyncIterator[Tuple[int, Union[ChatCompletion, Exception]]]:
         """
-        return await asyncio.gather(*[
-            self.create(model=model, messages=messages, **kwargs)
-            for messages in message_lists
-        ])
+        Create chat completions for a stream of conversations with bounded concurrency.
+
+        Conversations are pulled lazily from the input, so memory stays flat
+        no matter how many there are.
+
+        Args:
+            model: The model to use
+            message_lists: Iterable or async iterable of message lists
+            max_concurrency: Maximum number of requests in flight
+            ordered: Yield results in input order instead of completion order
+            return_exceptions: Yield failures as exceptions instead of raising
+                the first one
+            **kwargs: Additional parameters passed to create()
+
+        Yields:
+            (index, ChatCompletion or exception) tuples
+        """
+        async def run(messages):
+            return await self.create(model=model, messages=messages, **kwargs)
+
+        async for index, result in bounded_map(
+            run,
+            message_lists,
+            max_concurrency=max_concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions
+        ):
+            yield index, result
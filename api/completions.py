@@ -1,17 +1,23 @@
-from typing import Optional, Union, AsyncIterator
+from typing import Optional, Union, AsyncIterator, AsyncIterable, Iterable, Tuple
 from ..models.completion import Completion, CompletionChunk
-from ..utils.retry import retry_with_exponential_backoff
-from ..utils.rate_limiter import RateLimiter
+from ..models.trusted import TrustedCompletion, TrustedCompletionChunk
+from ..utils.retry import retry_with_exponential_backoff, track_in_flight
+from ..utils.token_counter import TokenCounter
+from ..utils.rate_limiter import TokenBudgetMixin
+from ..utils.concurrency import bounded_map
+from ..utils.cache import ResponseCacheMixin, record_stream, replay_stream
 from ..exceptions import InferraAPIError
+from ..constants import ENDPOINTS
+
+class CompletionsAPI(TokenBudgetMixin, ResponseCacheMixin):
+    _cache_endpoint = ENDPOINTS["completions"]
+    _response_model = Completion
+    _trusted_response_model = TrustedCompletion
 
-class CompletionsAPI:
     def __init__(self, client):
         self.client = client
-        self.rate_limiter = RateLimiter(
-            requests_per_minute=500,
-            burst_size=50
-        )
 
+    @track_in_flight
     @retry_with_exponential_backoff(max_retries=3)
     async def create(
         self,
@@ -24,6 +30,7 @@ class CompletionsAPI:
         frequency_penalty: Optional[float] = None,
         presence_penalty: Optional[float] = None,
         stop: Optional[Union[str, list[str]]] = None,
+        cache: Optional[bool] = None,
     ) -> Union[Completion, AsyncIterator[CompletionChunk]]:
         """
         Create a completion for the provided prompt and parameters.
@@ -38,13 +45,13 @@ class CompletionsAPI:
             frequency_penalty: Frequency penalty parameter
             presence_penalty: Presence penalty parameter
             stop: Up to 4 sequences where the API will stop generating
+            cache: Whether to use the client's response cache. By default
+                only deterministic (temperature=0) requests are cached.
 
         Returns:
             If stream=False, returns a Completion
             If stream=True, returns an AsyncIterator of CompletionChunk
         """
-        await self.rate_limiter.acquire()
-
         payload = {
             "model": model,
             "prompt": prompt,
@@ -65,60 +72,164 @@ class CompletionsAPI:
         if stop is not None:
             payload["stop"] = stop
 
+        cache_key = self._cache_key(payload, temperature, cache)
+        if cache_key is not None:
+            cached = await self.client.response_cache.get(cache_key)
+            if cached is not None:
+                if stream:
+                    return self._handle_streaming_response(
+                        replay_stream(cached, "text_completion.chunk"),
+                        reserved_tokens=None
+                    )
+                return self._decode_completion(cached)
+
+        request_body = {"json": payload}
+        reserved_tokens = await self._reserve_tokens_once(
+            ENDPOINTS["completions"], stream, request_body, model, max_tokens, prompt
+        )
+
         try:
             response = await self.client.post(
-                "/completions",
-                json=payload,
-                stream=stream
+                ENDPOINTS["completions"],
+                stream=stream,
+                **request_body
             )
 
             if stream:
-                return self._handle_streaming_response(response)
-            return Completion(**response.json())
+                if cache_key is not None:
+                    response = record_stream(
+                        response,
+                        self.client.response_cache,
+                        cache_key,
+                        "text_completion"
+                    )
+                return self._handle_streaming_response(response, reserved_tokens)
+            if cache_key is not None:
+                await self.client.response_cache.set(cache_key, response)
+            completion = self._decode_completion(response)
+            self._settle_tokens(reserved_tokens, completion.usage)
+            return completion
 
         except Exception as e:
+            self._cancel_tokens(reserved_tokens)
+            if isinstance(e, InferraAPIError):
+                raise
             raise InferraAPIError(f"Error creating completion: {str(e)}")
 
+    def _count_prompt_tokens(self, counter: TokenCounter, prompt: str) -> int:
+        """Count the prompt tokens of a completion request."""
+        return counter.count_string_tokens(prompt)
+
     async def _handle_streaming_response(
         self,
-        response
+        response,
+        reserved_tokens: Optional[int] = 0
     ) -> AsyncIterator[CompletionChunk]:
         """
         Handle streaming response from the completions API.
         
         Args:
-            response: The streaming response from the API
+            response: Async iterator over the decoded stream events
+            reserved_tokens: Tokens reserved for this request, settled
+                against the usage reported in the final chunk (None for
+                responses replayed from the cache)
             
         Yields:
             CompletionChunk objects containing partial completions
         """
+        trusted = self.client.config.trusted_decode
+        usage = None
         try:
-            async for line in response.iter_lines():
-                if line:
-                    chunk = CompletionChunk.parse_raw(line)
-                    yield chunk
+            async for event in response:
+                if trusted:
+                    chunk = TrustedCompletionChunk.from_dict(event)
+                else:
+                    chunk = CompletionChunk(**event)
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                yield chunk
+        except InferraAPIError:
+            raise
         except Exception as e:
             raise InferraAPIError(f"Error processing streaming response: {str(e)}")
+        finally:
+            # Close the underlying stream promptly if the consumer stopped early
+            await response.aclose()
+            self._settle_tokens(reserved_tokens, usage)
 
     async def create_batch(
         self,
         model: str,
-        prompts: list[str],
+        prompts: Iterable[str],
+        max_concurrency: int = 16,
+        return_exceptions: bool = False,
         **kwargs
-    ) -> list[Completion]:
+    ) -> list[Union[Completion, Exception]]:
         """
         Create completions for multiple prompts in parallel.
 
+        At most ``max_concurrency`` requests are in flight at a time. Use
+        iter_batch() to process results as they arrive without holding all
+        of them in memory.
+
         Args:
             model: ID of the model to use
-            prompts: List of prompts to generate completions for
+            prompts: Prompts to generate completions for
+            max_concurrency: Maximum number of requests in flight
+            return_exceptions: Return failed completions as exceptions in the
+                result list instead of raising the first failure
             **kwargs: Additional parameters passed to create()
 
         Returns:
             List of Completion objects in the same order as the input prompts
         """
-        tasks = [
-            self.create(model=model, prompt=prompt, **kwargs)
-            for prompt in prompts
+        return [
+            result
+            async for _, result in self.iter_batch(
+                model,
+                prompts,
+                max_concurrency=max_concurrency,
+                ordered=True,
+                return_exceptions=return_exceptions,
+                **kwargs
+            )
         ]
-        return await asyncio.gather(*tasks)
+
+    async def iter_batch(
+        self,
+        model: str,
+        prompts: Union[Iterable[str], AsyncIterable[str]],
+        max_concurrency: int = 16,
+        ordered: bool = False,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> AsyncIterator[Tuple[int, Union[Completion, Exception]]]:
+        """
+        Create completions for a stream of prompts with bounded concurrency.
+
+        Prompts are pulled lazily from the input, so memory stays flat no
+        matter how many there are.
+
+        Args:
+            model: ID of the model to use
+            prompts: Iterable or async iterable of prompts
+            max_concurrency: Maximum number of requests in flight
+            ordered: Yield results in input order instead of completion order
+            return_exceptions: Yield failures as exceptions instead of raising
+                the first one
+            **kwargs: Additional parameters passed to create()
+
+        Yields:
+            (index, Completion or exception) tuples
+        """
+        async def run(prompt):
+            return await self.create(model=model, prompt=prompt, **kwargs)
+
+        async for index, result in bounded_map(
+            run,
+            prompts,
+            max_concurrency=max_concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions
+        ):
+            yield index, result
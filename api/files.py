@@ -1,63 +1,397 @@
-from typing import Optional, Union, BinaryIO
+import asyncio
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Optional,
+    Union,
+    BinaryIO,
+    Iterable,
+    AsyncIterable,
+    AsyncIterator,
+    Any,
+    Callable,
+    List,
+)
 from ..models.batch import BatchFile
-from ..utils.retry import retry_with_exponential_backoff
-from ..exceptions import InferraAPIError
-import json
+from ..utils.retry import retry_with_exponential_backoff, RetryPolicy, track_in_flight
+from ..utils import codec
+from ..exceptions import InferraAPIError, InferraConnectionError
 import aiohttp
 from pathlib import Path
 
+# Size of the pieces an upload body is produced in; peak memory of an
+# upload is bounded by this, not by the size of the file
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Ranged downloads: size of the writes to disk and the smallest segment
+# given its own connection
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+# Seconds between two saves of the resume state of a download
+DOWNLOAD_STATE_INTERVAL = 0.5
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+async def _iter_records(
+    records: Union[Iterable[Any], AsyncIterable[Any]],
+    chunk_size: int,
+    progress: list
+) -> AsyncIterator[bytes]:
+    """Serialize records to JSONL, yielding chunks of about ``chunk_size`` bytes."""
+    buffer = bytearray()
+
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            progress[0] = True
+            buffer += codec.dumps(record)
+            buffer += b"\n"
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+    else:
+        for record in records:
+            progress[0] = True
+            buffer += codec.dumps(record)
+            buffer += b"\n"
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+                # Let other coroutines run while serializing large inputs
+                await asyncio.sleep(0)
+
+    if buffer:
+        yield bytes(buffer)
+
+async def _iter_file(file: BinaryIO, chunk_size: int, progress: list) -> AsyncIterator[bytes]:
+    """Read a binary file in chunks without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, file.read, chunk_size)
+        if not chunk:
+            return
+        progress[0] = True
+        yield chunk
+
+def _write_at(fd: int, data: bytes, offset: int):
+    """Write all of ``data`` at ``offset`` (runs in the writer thread pool)."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+class _RangedDownload:
+    """
+    Download one file with parallel Range requests into a preallocated file.
+
+    The state file lists the segments as ``[start, end, done]`` (end
+    exclusive, ``done`` bytes written from ``start``). It is only ever
+    updated after the bytes it accounts for have been written, so resuming
+    from it never leaves a hole.
+    """
+    def __init__(
+        self,
+        client,
+        path: str,
+        output_file: Path,
+        file_id: str,
+        max_connections: int,
+        min_segment_size: int,
+        chunk_size: int,
+        max_retries: int,
+        progress: Optional[Callable[[int, int], None]]
+    ):
+        self.client = client
+        self.path = path
+        self.output_file = output_file
+        self.state_file = output_file.with_name(output_file.name + ".download")
+        self.file_id = file_id
+        self.max_connections = max(1, max_connections)
+        self.min_segment_size = max(1, min_segment_size)
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.policy = RetryPolicy(
+            max_retries=max_retries,
+            initial_delay=0.5,
+            max_delay=10,
+            retry_on=(InferraAPIError,)
+        )
+        self.total = 0
+        self.segments: List[List[int]] = []
+        self.last_saved = 0.0
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.fd: Optional[int] = None
+
+    @property
+    def downloaded(self) -> int:
+        return sum(done for _, _, done in self.segments)
+
+    async def run(self):
+        total = await self._probe()
+        if total is None or not hasattr(os, "pwrite"):
+            # No Range support (or no positional writes on this platform):
+            # a plain sequential download
+            await self._download_whole()
+            return
+
+        self.total = total
+        self.segments = self._load_state() or self._plan()
+        self.executor = ThreadPoolExecutor(
+            max_workers=min(self.max_connections, 8),
+            thread_name_prefix="inferra-download"
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            self.fd = os.open(self.output_file, os.O_RDWR | os.O_CREAT, 0o644)
+            await loop.run_in_executor(self.executor, self._preallocate)
+            await self._save_state(force=True)
+            self._report()
+
+            tasks = [
+                asyncio.ensure_future(self._download_segment(segment))
+                for segment in self.segments
+                if segment[2] < segment[1] - segment[0]
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                await self._save_state(force=True)
+
+            await loop.run_in_executor(self.executor, os.fsync, self.fd)
+        finally:
+            if self.fd is not None:
+                os.close(self.fd)
+            self.executor.shutdown(wait=False)
+
+        self.state_file.unlink()
+
+    async def _probe(self) -> Optional[int]:
+        """Get the file size, or None if the server ignores Range requests."""
+        try:
+            response = await self.client.get(self.path, raw=True, headers={"Range": "bytes=0-0"})
+        except InferraAPIError as e:
+            if e.status_code == 416:
+                # Empty files have no satisfiable range
+                return None
+            raise
+        try:
+            if response.status != 206:
+                return None
+            match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if match is None or match.group(3) == "*":
+                return None
+            return int(match.group(3))
+        finally:
+            response.release()
+
+    def _plan(self) -> List[List[int]]:
+        count = max(1, min(self.max_connections, -(-self.total // self.min_segment_size)))
+        size = -(-self.total // count) if self.total else 0
+        return [
+            [start, min(start + size, self.total), 0]
+            for start in range(0, self.total, size or 1)
+        ] or [[0, 0, 0]]
+
+    def _load_state(self) -> Optional[List[List[int]]]:
+        """Load the progress of an interrupted download of the same file."""
+        if not self.output_file.exists():
+            return None
+        try:
+            state = codec.loads(self.state_file.read_bytes())
+        except (OSError, ValueError):
+            return None
+        if state.get("file_id") != self.file_id or state.get("size") != self.total:
+            return None
+        return state["segments"]
+
+    async def _save_state(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_saved < DOWNLOAD_STATE_INTERVAL:
+            return
+        self.last_saved = now
+        data = codec.dumps({
+            "file_id": self.file_id,
+            "size": self.total,
+            "segments": [list(segment) for segment in self.segments],
+        })
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._write_state, data)
+
+    def _write_state(self, data: bytes):
+        # Replace atomically so a crash never leaves a torn state file
+        temporary = self.state_file.with_name(self.state_file.name + ".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, self.state_file)
+
+    def _preallocate(self):
+        if os.fstat(self.fd).st_size == self.total:
+            return
+        if hasattr(os, "posix_fallocate") and self.total:
+            os.posix_fallocate(self.fd, 0, self.total)
+        os.ftruncate(self.fd, self.total)
+
+    def _report(self):
+        if self.progress is not None:
+            self.progress(self.downloaded, self.total)
+
+    async def _download_segment(self, segment: List[int]):
+        loop = asyncio.get_running_loop()
+        delay = 0.0
+        attempt = 0
+        while True:
+            start, end, done = segment
+            if done >= end - start:
+                return
+
+            try:
+                response = await self.client.get(
+                    self.path,
+                    raw=True,
+                    headers={"Range": f"bytes={start + done}-{end - 1}"}
+                )
+                try:
+                    if response.status != 206:
+                        raise InferraAPIError(
+                            "Server stopped honoring Range requests",
+                            status_code=response.status
+                        )
+                    buffer = bytearray()
+                    async for data in response.content.iter_chunked(self.chunk_size):
+                        buffer += data
+                        if len(buffer) >= self.chunk_size:
+                            await self._write(loop, segment, bytes(buffer))
+                            buffer.clear()
+                            attempt = 0
+                    if buffer:
+                        await self._write(loop, segment, bytes(buffer))
+                finally:
+                    response.release()
+
+                if segment[2] < end - start:
+                    raise InferraConnectionError("Segment ended early")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = InferraConnectionError(f"Download failed: {str(e) or type(e).__name__}")
+            except InferraAPIError as e:
+                error = e
+            else:
+                continue
+
+            if attempt >= self.policy.max_retries or not self.policy.is_retryable(error):
+                raise error
+            delay = self.policy.next_delay(attempt, delay, error)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _write(self, loop, segment: List[int], data: bytes):
+        await loop.run_in_executor(self.executor, _write_at, self.fd, data, segment[0] + segment[2])
+        segment[2] += len(data)
+        self._report()
+        await self._save_state()
+
+    async def _download_whole(self):
+        loop = asyncio.get_running_loop()
+        response = await self.client.get(self.path, raw=True)
+        try:
+            self.total = int(response.headers.get("Content-Length", 0))
+            downloaded = 0
+            with open(self.output_file, "wb") as f:
+                async for data in response.content.iter_chunked(self.chunk_size):
+                    await loop.run_in_executor(None, f.write, data)
+                    downloaded += len(data)
+                    if self.progress is not None:
+                        self.progress(downloaded, self.total or downloaded)
+        finally:
+            response.release()
+
 class FilesAPI:
     def __init__(self, client):
         self.client = client
 
-    @retry_with_exponential_backoff(max_retries=3)
+    @track_in_flight
+    # Retrying an upload that reached the server would store the file twice,
+    # and a large one may take longer than the configured timeout
+    @retry_with_exponential_backoff(max_retries=3, idempotent=False, deadline=math.inf)
     async def create(
         self,
-        file: Union[str, Path, BinaryIO, list],
-        purpose: str = "batch"
+        file: Union[str, Path, BinaryIO, Iterable[dict], AsyncIterable[dict]],
+        purpose: str = "batch",
+        filename: Optional[str] = None,
+        chunk_size: int = UPLOAD_CHUNK_SIZE
     ) -> BatchFile:
         """
         Upload a file for batch processing.
 
+        The request body is streamed: records are serialized and files are
+        read in chunks of ``chunk_size`` bytes while the upload is in
+        progress, so memory use does not depend on the size of the file.
+        The upload is not bounded by the client's total timeout; only
+        connecting and waiting for the response are.
+
         Args:
             file: File to upload. Can be:
                 - Path to a file (str or Path)
-                - File-like object
-                - List of dictionaries (will be converted to JSONL)
+                - File-like object opened in binary mode
+                - List, iterable or async iterable of dictionaries
+                  (serialized to JSONL)
             purpose: Purpose of the file (currently only "batch" is supported)
+            filename: Name to store the file under (defaults to the file's
+                name, or "batch.jsonl" for records)
+            chunk_size: Size of the chunks the body is sent in
 
         Returns:
             BatchFile object containing the file details
+
+        Raises:
+            InferraAPIError: If the upload fails. Uploads from one-shot
+                iterators or file objects are not retried once they have
+                started, since the data already sent cannot be replayed.
         """
+        # Whether the body started consuming the input
+        progress = [False]
+        replayable = isinstance(file, (str, Path, list, tuple))
+        opened = None
+
         try:
-            # Handle different file input types
             if isinstance(file, (str, Path)):
-                files = {'file': open(file, 'rb')}
-            elif isinstance(file, list):
-                # Convert list to JSONL
-                jsonl_content = '\n'.join(json.dumps(item) for item in file)
-                files = {
-                    'file': ('batch.jsonl', jsonl_content.encode(), 'application/jsonl')
-                }
+                opened = open(file, "rb")
+                body = _iter_file(opened, chunk_size, progress)
+                filename = filename or Path(file).name
+            elif hasattr(file, "read"):
+                body = _iter_file(file, chunk_size, progress)
+                filename = filename or Path(getattr(file, "name", None) or "batch.jsonl").name
             else:
-                files = {'file': file}
-
-            data = {'purpose': purpose}
-            
-            response = await self.client.post(
-                "/files",
-                data=data,
-                files=files
-            )
-            
-            return BatchFile(**response.json())
+                body = _iter_records(file, chunk_size, progress)
+                filename = filename or "batch.jsonl"
+
+            with aiohttp.MultipartWriter("form-data") as writer:
+                part = writer.append(purpose)
+                part.set_content_disposition("form-data", name="purpose")
+                part = writer.append(body, {"Content-Type": "application/jsonl"})
+                part.set_content_disposition("form-data", name="file", filename=filename)
 
+            response = await self.client.post("/files", data=writer, upload=True)
+            return BatchFile(**response)
+
+        except InferraAPIError as e:
+            if progress[0] and not replayable:
+                raise InferraAPIError(
+                    f"Error uploading file (the input was partly consumed and cannot be retried): {str(e)}",
+                    response=getattr(e, "response", None)
+                ) from e
+            raise
         except Exception as e:
             raise InferraAPIError(f"Error uploading file: {str(e)}")
         finally:
-            # Close file if we opened it
-            if isinstance(file, (str, Path)) and 'files' in locals():
-                files['file'].close()
+            if opened is not None:
+                opened.close()
 
     async def retrieve(self, file_id: str) -> BatchFile:
         """
@@ -71,39 +405,52 @@ class FilesAPI:
         """
         try:
             response = await self.client.get(f"/files/{file_id}")
-            return BatchFile(**response.json())
+            return BatchFile(**response)
         except Exception as e:
             raise InferraAPIError(f"Error retrieving file {file_id}: {str(e)}")
 
     async def download(
         self,
         file_id: str,
-        output_file: Optional[Union[str, Path]] = None
-    ) -> Union[str, bytes]:
+        output_file: Optional[Union[str, Path]] = None,
+        max_connections: int = 8,
+        min_segment_size: int = DOWNLOAD_MIN_SEGMENT_SIZE,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        max_retries: int = 5,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Optional[Union[str, bytes]]:
         """
         Download the content of an uploaded file.
 
+        When saving to a file and the server supports HTTP Range requests,
+        the file is split into segments fetched in parallel over up to
+        ``max_connections`` connections and written into a preallocated
+        output file from a thread pool. Failed segments are retried from
+        where they stopped. Progress is recorded next to the output file
+        (``<output_file>.download``), so a download interrupted by a crash
+        resumes when called again with the same arguments.
+
         Args:
             file_id: The ID of the file to download
             output_file: Optional path to save the file to
+            max_connections: Maximum number of segments downloaded in parallel
+            min_segment_size: Smallest segment worth its own connection
+            chunk_size: Size of the chunks written to disk
+            max_retries: Retries per segment
+            progress: Optional callback receiving (bytes downloaded, total bytes)
 
         Returns:
             If output_file is None, returns the file content as string or bytes
             If output_file is provided, saves the file and returns None
         """
+        path = f"/files/{file_id}/content"
         try:
-            response = await self.client.get(
-                f"/files/{file_id}/content",
-                stream=True
-            )
-
-            if output_file:
-                with open(output_file, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(8192):
-                        f.write(chunk)
-                return None
-            else:
-                content = await response.read()
+            if not output_file:
+                response = await self.client.get(path, raw=True)
+                try:
+                    content = await response.read()
+                finally:
+                    response.release()
                 try:
                     # Try to decode as UTF-8
                     return content.decode('utf-8')
@@ -111,6 +458,22 @@ class FilesAPI:
                     # Return raw bytes if not UTF-8
                     return content
 
+            download = _RangedDownload(
+                self.client,
+                path,
+                Path(output_file),
+                file_id=file_id,
+                max_connections=max_connections,
+                min_segment_size=min_segment_size,
+                chunk_size=chunk_size,
+                max_retries=max_retries,
+                progress=progress
+            )
+            await download.run()
+            return None
+
+        except InferraAPIError:
+            raise
         except Exception as e:
             raise InferraAPIError(f"Error downloading file {file_id}: {str(e)}")
 
@@ -151,6 +514,6 @@ class FilesAPI:
 
         try:
             response = await self.client.get("/files", params=params)
-            return [BatchFile(**file) for file in response.json()]
+            return [BatchFile(**file) for file in response]
         except Exception as e:
             raise InferraAPIError(f"Error listing files: {str(e)}")
@@ -0,0 +1,46 @@
+"""
+Peak memory of bounded fan-out versus asyncio.gather as input size grows.
+
+    python -m benchmarks.bench_bounded_map --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from inferra.utils.concurrency import bounded_map
+
+async def fake_request(prompt: str) -> str:
+    await asyncio.sleep(0)
+    return prompt.upper()
+
+async def with_gather(size: int):
+    results = await asyncio.gather(*[fake_request(f"prompt {i}") for i in range(size)])
+    return len(results)
+
+async def with_bounded_map(size: int, max_concurrency: int):
+    count = 0
+    prompts = (f"prompt {i}" for i in range(size))
+    async for _ in bounded_map(fake_request, prompts, max_concurrency=max_concurrency):
+        count += 1
+    return count
+
+def measure(name: str, coro) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = asyncio.run(coro)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} n={count:>8}  peak={peak / 1e6:8.2f} MB  {count / elapsed:>10,.0f} items/s")
+
+def main(sizes, max_concurrency: int):
+    for size in sizes:
+        measure("asyncio.gather", with_gather(size))
+        measure(f"bounded_map({max_concurrency})", with_bounded_map(size, max_concurrency))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    args = parser.parse_args()
+    main(args.sizes, args.max_concurrency)
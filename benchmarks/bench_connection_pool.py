@@ -0,0 +1,74 @@
+"""
+Requests/second versus connection pool size against a local stub server.
+
+The stub adds a fixed service latency per request, so throughput is bounded
+by how many requests the pool lets us keep in flight.
+
+    python -m benchmarks.bench_connection_pool --requests 2000 --latency 0.01
+"""
+import argparse
+import asyncio
+import time
+from aiohttp import web
+from inferra import InferraClient
+
+async def start_stub_server(latency: float) -> web.AppRunner:
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/v1/ping", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+async def run(base_url: str, pool_size: int, total: int, concurrency: int) -> float:
+    client = InferraClient(
+        api_key="bench",
+        base_url=base_url,
+        requests_per_minute=10_000_000,
+        burst_size=10_000_000,
+        connection_limit=pool_size,
+        connection_limit_per_host=pool_size
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    peak_waiters = 0
+
+    async def one():
+        nonlocal peak_waiters
+        async with semaphore:
+            await client.get("/ping")
+            peak_waiters = max(peak_waiters, client.pool_stats()["waiters"] or 0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - start
+    stats = client.pool_stats()
+    await client.close()
+
+    print(
+        f"pool={pool_size:>4}  {total / elapsed:>8.0f} req/s  "
+        f"idle={stats['idle']:>4}  peak_waiters={peak_waiters}"
+    )
+    return total / elapsed
+
+async def main(requests: int, latency: float, concurrency: int):
+    runner = await start_stub_server(latency)
+    port = runner.addresses[0][1]
+    base_url = f"http://127.0.0.1:{port}/v1"
+    try:
+        for pool_size in (1, 4, 16, 64, 100, 256):
+            await run(base_url, pool_size, requests, concurrency)
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=512)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency, args.concurrency))
@@ -0,0 +1,90 @@
+"""
+Download throughput versus parallel connections against a local range-capable stub.
+
+The stub caps each connection's bandwidth, like a server or network path
+that throttles single flows, so throughput scales with the number of
+segments downloaded in parallel.
+
+    python -m benchmarks.bench_download --size-mb 256 --per-connection-mbps 100
+"""
+import argparse
+import asyncio
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from aiohttp import web
+from inferra import InferraClient
+
+WRITE_SIZE = 256 * 1024
+
+async def start_stub_server(content: bytes, per_connection_mbps: float) -> web.AppRunner:
+    async def handler(request):
+        start, end = 0, len(content) - 1
+        status = 200
+        header = request.headers.get("Range")
+        if header:
+            start, end = (int(value) for value in re.match(r"bytes=(\d+)-(\d+)", header).groups())
+            end = min(end, len(content) - 1)
+            status = 206
+
+        response = web.StreamResponse(status=status)
+        response.content_length = end - start + 1
+        if status == 206:
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+        await response.prepare(request)
+
+        bytes_per_second = per_connection_mbps * 1024 * 1024
+        view = memoryview(content)
+        for offset in range(start, end + 1, WRITE_SIZE):
+            chunk = view[offset:min(offset + WRITE_SIZE, end + 1)]
+            await response.write(chunk)
+            await asyncio.sleep(len(chunk) / bytes_per_second)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/v1/files/{file_id}/content", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+async def run(base_url: str, output: Path, connections: int, size: int) -> float:
+    client = InferraClient(api_key="bench", base_url=base_url, timeout=600)
+    start = time.perf_counter()
+    await client.files.download(
+        "file-bench",
+        output,
+        max_connections=connections,
+        min_segment_size=1024 * 1024
+    )
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    assert output.stat().st_size == size
+    output.unlink()
+    print(f"connections={connections:>3}  {size / 1024 / 1024 / elapsed:>8.1f} MB/s  ({elapsed:.2f}s)")
+    return elapsed
+
+async def main(size_mb: int, per_connection_mbps: float):
+    content = os.urandom(size_mb * 1024 * 1024)
+    runner = await start_stub_server(content, per_connection_mbps)
+    port = runner.addresses[0][1]
+    base_url = f"http://127.0.0.1:{port}/v1"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "output.jsonl"
+            for connections in (1, 2, 4, 8, 16):
+                await run(base_url, output, connections, len(content))
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--per-connection-mbps", type=float, default=100.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.size_mb, args.per_connection_mbps))
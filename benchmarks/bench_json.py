@@ -0,0 +1,54 @@
+"""
+Encode/decode throughput of the available JSON backends.
+
+Uses realistic chat completion, streaming chunk and request payloads.
+
+    python -m benchmarks.bench_json --iterations 100000
+"""
+import argparse
+import json
+import timeit
+from pathlib import Path
+from inferra.utils import codec
+
+SAMPLES = Path(__file__).parent.parent / "tests" / "data" / "sample_responses.json"
+
+def load_payloads() -> dict:
+    with open(SAMPLES) as f:
+        samples = json.load(f)
+
+    request = {
+        "model": "meta-llama/llama-3.1-8b-instruct/fp-8",
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant. " * 40},
+            {"role": "user", "content": "Summarize the following document. " * 20},
+        ],
+        "temperature": 0,
+        "max_tokens": 256,
+        "stream": False,
+    }
+    return {
+        "chat_completion": samples["chat_completion"],
+        "streaming_chunk": samples["streaming_chunk"],
+        "chat_request": request,
+    }
+
+def main(iterations: int):
+    payloads = load_payloads()
+    print(f"{'backend':<8} {'payload':<16} {'encode/s':>12} {'decode/s':>12}")
+
+    for backend in codec.BACKENDS:
+        codec.set_backend(backend)
+        for name, payload in payloads.items():
+            encoded = codec.dumps(payload)
+            encode = timeit.timeit(lambda: codec.dumps(payload), number=iterations)
+            decode = timeit.timeit(lambda: codec.loads(encoded), number=iterations)
+            print(
+                f"{backend:<8} {name:<16} {iterations / encode:>12,.0f} {iterations / decode:>12,.0f}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.iterations)
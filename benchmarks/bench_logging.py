@@ -0,0 +1,82 @@
+"""
+Per-request cost of logging API traffic on the calling thread.
+
+Compares the previous logger (a StreamHandler written to and a payload
+``json.dumps``-ed inline) with InferraLogger, which formats and writes on
+its queue listener thread, logging every request and with 1% sampling.
+Records go to a file so the previous logger pays for real writes. The
+budget is the share of a request's time at the target rate that logging
+may take.
+
+    python -m benchmarks.bench_logging --rps 5000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from inferra.utils.instrumentation import RequestMetrics
+from inferra.utils.logging import InferraLogger
+
+def build_metrics() -> RequestMetrics:
+    metrics = RequestMetrics("POST", "/chat/completions", False)
+    metrics.sent = metrics.started + 0.0001
+    metrics.headers = metrics.started + 0.12
+    metrics.ended = metrics.started + 0.13
+    metrics.status = 200
+    metrics.prompt_tokens = 512
+    metrics.completion_tokens = 128
+    return metrics
+
+def legacy_logger(path: str) -> logging.Logger:
+    logger = logging.getLogger("inferra.bench.legacy")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s [%(name)s] %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+def legacy_log(logger: logging.Logger, metrics: RequestMetrics):
+    logger.info(f"API Call: {json.dumps({'method': metrics.method, 'path': metrics.path, 'status': metrics.status, 'latency': metrics.latency, 'prompt_tokens': metrics.prompt_tokens, 'completion_tokens': metrics.completion_tokens}, default=str)}")
+
+def measure(name: str, log, requests: int, rps: int) -> float:
+    metrics = build_metrics()
+    start = time.perf_counter()
+    for _ in range(requests):
+        log(metrics)
+    per_call = (time.perf_counter() - start) / requests
+    share = per_call * rps * 100
+    print(f"{name:<28} {per_call * 1e6:>8.2f} us/request  ({share:.2f}% of a thread at {rps:,} RPS)")
+    return per_call
+
+def main(requests: int, rps: int, budget: float):
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = legacy_logger(os.path.join(directory, "legacy.log"))
+        measure("inline (previous)", lambda metrics: legacy_log(legacy, metrics), requests, rps)
+
+        logger = InferraLogger(
+            "inferra.bench.queued", log_file=os.path.join(directory, "queued.log"), console=False
+        )
+        logger.logger.propagate = False
+        measure("queued, every request", logger, requests, rps)
+        logger.flush()
+
+        logger.sample_rate = 0.01
+        per_call = measure("queued, 1% sampled", logger, requests, rps)
+        logger.flush()
+
+    share = per_call * rps
+    if share > budget:
+        print(f"Logging takes {share:.2%} of the request thread at {rps:,} RPS, over the {budget:.2%} budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--rps", type=int, default=5000)
+    parser.add_argument("--budget", type=float, default=0.01)
+    args = parser.parse_args()
+    main(args.requests, args.rps, args.budget)
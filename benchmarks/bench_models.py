@@ -0,0 +1,54 @@
+"""
+Per-chunk cost of building response objects: pydantic versus trusted models.
+
+Reports chunks/sec and bytes allocated per chunk (via tracemalloc) for the
+validated pydantic models and the unvalidated ``__slots__`` models used with
+``trusted_decode=True``.
+
+    python -m benchmarks.bench_models --chunks 200000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from inferra.models.chat import ChatCompletion, ChatCompletionChunk
+from inferra.models.trusted import TrustedChatCompletion, TrustedChatCompletionChunk
+
+SAMPLES = Path(__file__).parent.parent / "tests" / "data" / "sample_responses.json"
+
+def measure(name: str, build, payload: dict, count: int):
+    start = time.perf_counter()
+    for _ in range(count):
+        build(payload)
+    elapsed = time.perf_counter() - start
+
+    # Allocation of a batch of live objects, so nothing is freed early
+    sample = min(count, 10000)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(payload) for _ in range(sample)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+
+    print(f"{name:<28} {count / elapsed:>12,.0f}/s  {allocated / sample:>8,.0f} bytes/object")
+
+def main(chunks: int):
+    with open(SAMPLES) as f:
+        samples = json.load(f)
+
+    chunk = samples["streaming_chunk"]
+    completion = samples["chat_completion"]
+
+    measure("pydantic ChatCompletionChunk", lambda d: ChatCompletionChunk(**d), chunk, chunks)
+    measure("trusted ChatCompletionChunk", TrustedChatCompletionChunk.from_dict, chunk, chunks)
+    measure("pydantic ChatCompletion", lambda d: ChatCompletion(**d), completion, chunks // 4)
+    measure("trusted ChatCompletion", TrustedChatCompletion.from_dict, completion, chunks // 4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200000)
+    args = parser.parse_args()
+    main(args.chunks)
@@ -0,0 +1,84 @@
+"""
+Per-request CPU of building a chat body and estimating its tokens, with and
+without a MessagePrefix.
+
+Every request shares a ~6 KB system prompt and four few-shot messages and
+adds one short question. Without a prefix, all messages are converted and
+encoded for each request; with one, only the question is, and the cached
+prefix bytes and token count are reused.
+
+    python -m benchmarks.bench_prefix --requests 20000
+"""
+import argparse
+import time
+from inferra import InferraClient
+from inferra.models.chat import Message
+from inferra.utils import codec
+from inferra.utils.prompts import MessagePrefix
+from inferra.utils.token_counter import TokenCounter
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+def shared_messages():
+    return [
+        Message(role="system", content="You are a support assistant for an online store. " * 120),
+        Message(role="user", content="Where is my order 1234?"),
+        Message(role="assistant", content="Order 1234 shipped yesterday and arrives on Friday."),
+        Message(role="user", content="Can I return a gift?"),
+        Message(role="assistant", content="Yes, gifts can be returned within 30 days for store credit."),
+    ]
+
+def measure(name: str, func, requests: int):
+    start = time.perf_counter()
+    for i in range(requests):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<36} {elapsed / requests * 1e6:>8.1f} us/request")
+
+def main(requests: int):
+    chat = InferraClient(api_key="bench").chat
+    messages = shared_messages()
+    prefix = MessagePrefix(messages)
+    counter = TokenCounter(MODEL)
+    questions = [Message(role="user", content=f"Question {i}: how long does shipping take?") for i in range(requests)]
+
+    def params(conversation):
+        return {
+            "model": MODEL,
+            "messages": conversation,
+            "stream": False,
+            "temperature": 0.2,
+            "max_tokens": 256,
+            "top_p": None,
+            "frequency_penalty": None,
+            "presence_penalty": None,
+        }
+
+    measure(
+        "body, full conversation",
+        lambda i: codec.dumps(chat._build_payload(params([*messages, questions[i]]))),
+        requests
+    )
+    measure(
+        "body, prefix + question",
+        lambda i: prefix.build_body(chat._build_payload(params([questions[i]]))),
+        requests
+    )
+
+    counter.count_message_tokens(messages)
+    measure(
+        "tokens, full conversation",
+        lambda i: counter.count_message_tokens([*messages, questions[i]]),
+        requests
+    )
+    measure(
+        "tokens, prefix + question",
+        lambda i: prefix.count_tokens(counter) + counter.count_message_tokens([questions[i]])["prompt_tokens"],
+        requests
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.requests)
@@ -0,0 +1,100 @@
+"""
+Time-to-first-token and per-chunk overhead of the SSE pipeline.
+
+A local stub server streams chat completion chunks. We compare the raw
+aiohttp byte stream (no framing or decoding) with the client's streaming
+pipeline to isolate the cost the SDK adds per chunk.
+
+    python -m benchmarks.bench_streaming --chunks 5000 --runs 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import aiohttp
+from aiohttp import web
+from inferra import InferraClient
+
+CHUNK = {
+    "id": "chatcmpl-123",
+    "object": "chat.completion.chunk",
+    "created": 1677649420,
+    "model": "meta-llama/llama-3.1-8b-instruct/fp-8",
+    "choices": [{"index": 0, "delta": {"content": " token"}, "finish_reason": None}],
+}
+
+async def start_stub_server(chunks: int) -> web.AppRunner:
+    event = b"data: " + json.dumps(CHUNK).encode() + b"\n\n"
+
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for _ in range(chunks):
+            await response.write(event)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+async def run_raw(url: str):
+    async with aiohttp.ClientSession() as session:
+        start = time.perf_counter()
+        first = None
+        async with session.post(url, json={}) as response:
+            async for _ in response.content.iter_any():
+                if first is None:
+                    first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+
+async def run_client(base_url: str, chunks: int):
+    client = InferraClient(
+        api_key="bench",
+        base_url=base_url,
+        requests_per_minute=10_000_000
+    )
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in await client.post("/chat/completions", json={}, stream=True):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    elapsed = time.perf_counter() - start
+    await client.close()
+    assert count == chunks
+    return first, elapsed
+
+async def main(chunks: int, runs: int):
+    runner = await start_stub_server(chunks)
+    port = runner.addresses[0][1]
+    base_url = f"http://127.0.0.1:{port}/v1"
+    try:
+        raw = [await run_raw(f"{base_url}/chat/completions") for _ in range(runs)]
+        sdk = [await run_client(base_url, chunks) for _ in range(runs)]
+    finally:
+        await runner.cleanup()
+
+    for name, results in (("raw aiohttp", raw), ("sdk pipeline", sdk)):
+        ttft = statistics.median(r[0] for r in results) * 1000
+        total = statistics.median(r[1] for r in results)
+        print(
+            f"{name:<13} ttft={ttft:7.2f}ms  total={total * 1000:8.1f}ms  "
+            f"per-chunk={total / chunks * 1e6:6.1f}us"
+        )
+    overhead = (statistics.median(r[1] for r in sdk) - statistics.median(r[1] for r in raw)) / chunks
+    print(f"sdk overhead per chunk: {overhead * 1e6:.1f}us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.chunks, args.runs))
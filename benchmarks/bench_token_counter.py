@@ -0,0 +1,114 @@
+"""
+Pre-flight token counting throughput over a large batch of chat messages.
+
+Compares counting conversation by conversation the way TokenCounter used to
+(an encoder lookup per counter, ``message.dict()`` and one ``encode()`` per
+field) with count_message_tokens() and count_many(), cold and with the
+memo warm. Every conversation shares the same system prompt.
+
+    python -m benchmarks.bench_token_counter --messages 100000
+"""
+import argparse
+import random
+import time
+from typing import Optional
+from inferra.models.chat import Message
+from inferra.utils.token_counter import TokenCounter, TokenCountMemo
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+WORDS = (
+    "the model request batch token budget latency answer question summary "
+    "document customer order invoice shipping refund account password please "
+    "explain translate classify review support product feature release"
+).split()
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant for an online store. Answer questions about "
+    "orders, shipping, refunds and accounts. Be concise and polite, never "
+    "invent order numbers, and ask for clarification when a request is "
+    "ambiguous. " * 4
+)
+
+def build_conversations(messages: int, seed: int = 0):
+    rng = random.Random(seed)
+    conversations = []
+    for _ in range(messages // 2):
+        user = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60)))
+        conversations.append([
+            Message(role="system", content=SYSTEM_PROMPT),
+            Message(role="user", content=user),
+        ])
+    return conversations
+
+def naive_count(model: str, messages) -> int:
+    import tiktoken
+    try:
+        encoder = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoder = tiktoken.get_encoding("cl100k_base")
+    num_tokens = 3
+    for message in messages:
+        num_tokens += 4
+        for key, value in message.dict().items():
+            if value:
+                num_tokens += len(encoder.encode_ordinary(str(value)))
+                if key == "name":
+                    num_tokens += 2
+    return num_tokens
+
+def measure(name: str, count_all, messages: int) -> list:
+    start = time.perf_counter()
+    counts = count_all()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {messages / elapsed:>12,.0f} messages/s  ({elapsed:.2f}s)")
+    return counts
+
+def main(messages: int, threads: Optional[int]):
+    conversations = build_conversations(messages)
+    total = len(conversations) * 2
+
+    # Load the encoding up front so every variant is measured warm
+    TokenCounter(MODEL).count_string_tokens("warm up")
+
+    expected = measure(
+        "naive (per-call encoder, dict)",
+        lambda: [naive_count(MODEL, conversation) for conversation in conversations],
+        total
+    )
+
+    counter = TokenCounter(MODEL, memo=TokenCountMemo())
+    counts = measure(
+        "count_message_tokens",
+        lambda: [counter.count_message_tokens(c)["prompt_tokens"] for c in conversations],
+        total
+    )
+    assert counts == expected
+
+    counter = TokenCounter(MODEL, memo=TokenCountMemo(max_entries=0))
+    counts = measure(
+        "count_many (no memo)",
+        lambda: counter.count_many(conversations, num_threads=threads),
+        total
+    )
+    assert counts == expected
+
+    counter = TokenCounter(MODEL, memo=TokenCountMemo(max_entries=2 * total))
+    counts = measure(
+        "count_many (cold memo)",
+        lambda: counter.count_many(conversations, num_threads=threads),
+        total
+    )
+    assert counts == expected
+    measure(
+        "count_many (warm memo)",
+        lambda: counter.count_many(conversations, num_threads=threads),
+        total
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+    main(args.messages, args.threads)
@@ -0,0 +1,88 @@
+"""
+Peak memory of FilesAPI.create versus upload size against a local stub server.
+
+Records are generated lazily and the stub discards what it receives, so any
+growth in peak RSS comes from the upload path itself.
+
+    python -m benchmarks.bench_upload --sizes-mb 10 100 500 2000
+"""
+import argparse
+import asyncio
+import resource
+import sys
+import time
+from aiohttp import web
+from inferra import InferraClient
+
+RECORD_PADDING = "x" * 900
+
+async def start_stub_server() -> web.AppRunner:
+    async def handler(request):
+        size = 0
+        reader = await request.multipart()
+        async for part in reader:
+            while True:
+                chunk = await part.read_chunk()
+                if not chunk:
+                    break
+                if part.name == "file":
+                    size += len(chunk)
+        return web.json_response({
+            "id": "file-bench",
+            "object": "file",
+            "purpose": "batch",
+            "filename": "batch.jsonl",
+            "size": size,
+            "created_at": int(time.time()),
+            "status": "uploaded",
+        })
+
+    app = web.Application(client_max_size=0)
+    app.router.add_post("/v1/files", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def records(total_bytes: int):
+    # Each record serializes to roughly 1 KB
+    for i in range(total_bytes // 1024):
+        yield {
+            "custom_id": f"request-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"prompt": RECORD_PADDING},
+        }
+
+async def main(sizes_mb):
+    # The stub server runs in this process too, but it streams parts and
+    # keeps nothing, so it does not grow with the upload either.
+    runner = await start_stub_server()
+    port = runner.addresses[0][1]
+    client = InferraClient(api_key="bench", base_url=f"http://127.0.0.1:{port}/v1", timeout=3600)
+    try:
+        print(f"baseline peak RSS {peak_rss_mb():.1f} MB")
+        for size_mb in sizes_mb:
+            start = time.perf_counter()
+            uploaded = await client.files.create(records(size_mb * 1024 * 1024))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{size_mb:>6} MB  uploaded={uploaded.size / 1024 / 1024:>8.1f} MB  "
+                f"{uploaded.size / 1024 / 1024 / elapsed:>7.1f} MB/s  "
+                f"peak RSS {peak_rss_mb():.1f} MB"
+            )
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[10, 100, 500, 2000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes_mb))
@@ -0,0 +1,75 @@
+"""
+Per-call cost of validating a 100-message chat request.
+
+Compares the previous validator (a role set rebuilt per call and
+``strip()`` copying every body) with MessageValidator, and with a tuple
+validated once and reused. Exits with an error if the precompiled path
+exceeds the per-call budget.
+
+    python -m benchmarks.bench_validation --budget-us 50
+"""
+import argparse
+import sys
+import timeit
+from inferra.models.chat import Message
+from inferra.utils.validators import MessageValidator
+from inferra.exceptions import InferraAPIError
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+def build_conversation(length: int):
+    messages = [Message(role="system", content="You are a helpful assistant. " * 280)]
+    for i in range(length - 1):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append(Message(role=role, content=f"Message {i}: " + "lorem ipsum dolor " * 30))
+    return messages
+
+def legacy_validate(model: str, messages):
+    from inferra.constants import AVAILABLE_MODELS
+    if model not in AVAILABLE_MODELS:
+        raise InferraAPIError(f"Model '{model}' is not supported")
+    if not messages:
+        raise InferraAPIError("Messages list cannot be empty")
+    valid_roles = {"system", "user", "assistant"}
+    for message in messages:
+        if message.role not in valid_roles:
+            raise InferraAPIError(f"Invalid role '{message.role}'")
+        if not message.content or not message.content.strip():
+            raise InferraAPIError("Message content cannot be empty")
+
+def measure(name: str, func, number: int) -> float:
+    per_call = min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+    print(f"{name:<28} {per_call:>8.2f} us/call")
+    return per_call
+
+def main(length: int, budget_us: float, number: int) -> int:
+    messages = build_conversation(length)
+    validator = MessageValidator()
+    once = MessageValidator(validate_once=True)
+    prefix = tuple(messages)
+
+    def precompiled():
+        validator.validate_model(MODEL)
+        validator.validate_messages(messages)
+
+    def validated_once():
+        once.validate_model(MODEL)
+        once.validate_messages(prefix)
+
+    print(f"{length} messages")
+    measure("legacy", lambda: legacy_validate(MODEL, messages), number)
+    per_call = measure("MessageValidator", precompiled, number)
+    measure("MessageValidator (once)", validated_once, number)
+
+    if per_call > budget_us:
+        print(f"over budget: {per_call:.2f} us > {budget_us:.2f} us")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--budget-us", type=float, default=50.0)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(main(args.messages, args.budget_us, args.number))
@@ -1,14 +1,104 @@
+import asyncio
+import hashlib
+import time
+import weakref
+from contextlib import asynccontextmanager
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional, Union, AsyncIterator
 import aiohttp
-from typing import Optional, Union, AsyncIterator
 from .config import Config
-from .api import ChatAPI, CompletionsAPI, BatchAPI, FilesAPI
+from .utils.rate_limiter import RateLimiter, TokenBudget, AdaptiveConcurrencyLimiter
+from .utils.singleflight import SingleFlight
+from .utils.instrumentation import RequestMetrics, build_trace_config
+from .utils.streaming import iter_sse_events
+from .utils import codec
+from .utils.retry import current_call, request_deadline, request_attempt
+from .constants import ENDPOINTS
 from .exceptions import (
+    InferraError,
     InferraAPIError,
     InferraAuthenticationError,
+    InferraConnectionError,
     InferraRateLimitError
 )
 
-class InferraClient:
+if TYPE_CHECKING:
+    from .api import ChatAPI, CompletionsAPI, BatchAPI, FilesAPI
+    from .utils.cache import ResponseCache
+
+# POST endpoints that only generate and can safely share one response
+COALESCED_PATHS = frozenset({ENDPOINTS["chat"], ENDPOINTS["completions"]})
+
+# How often close() checks whether in-flight requests have finished
+DRAIN_POLL_INTERVAL = 0.05
+
+def _connector_occupancy(connector: aiohttp.BaseConnector) -> dict:
+    """
+    Read the occupancy of a connector's pool from aiohttp internals.
+
+    Returns:
+        The in_use, idle and waiters counts, each None if its attribute is
+        missing or has an unexpected shape
+    """
+    readers = {
+        "in_use": ("_acquired", len),
+        "idle": ("_conns", lambda conns: sum(len(pooled) for pooled in conns.values())),
+        "waiters": ("_waiters", lambda waiters: sum(len(queued) for queued in waiters.values())),
+    }
+    occupancy = {}
+    for name, (attribute, count) in readers.items():
+        value = getattr(connector, attribute, None)
+        try:
+            occupancy[name] = None if value is None else int(count(value))
+        except (AttributeError, TypeError, ValueError):
+            occupancy[name] = None
+    return occupancy
+
+async def _drain(in_flight: Callable[[], int], deadline: float):
+    """Wait until nothing is in flight any more or the deadline passes."""
+    while in_flight() and time.monotonic() < deadline:
+        await asyncio.sleep(min(DRAIN_POLL_INTERVAL, deadline - time.monotonic()))
+
+class _CallTracker:
+    """
+    Count the API calls in flight on a client or pool, so close() can wait for them.
+
+    A call (see utils.retry.track_in_flight) stays in flight from start to
+    finish, including the backoff between its attempts, and its attempts
+    are let through while the client is closing.
+    """
+    _calls: int
+    _closing: bool
+
+    @asynccontextmanager
+    async def _track_call(self):
+        if current_call.get() is self:
+            # A call made by another call is part of it
+            yield
+            return
+        if self._closing:
+            raise InferraError("Client is closing")
+        self._calls += 1
+        token = current_call.set(self)
+        try:
+            yield
+        finally:
+            current_call.reset(token)
+            self._calls -= 1
+
+def _deterministic(body: Any) -> bool:
+    """
+    Check whether a generation request always gets the same answer.
+
+    Only those may share one response: a sampled request (temperature above
+    0) or one asking for several choices is expected to differ from an
+    identical one sent at the same time.
+    """
+    if not isinstance(body, dict):
+        return False
+    return not body.get("temperature") and body.get("n") in (None, 1)
+
+class InferraClient(_CallTracker):
     """
     Main client for interacting with the Inferra API.
     
@@ -18,6 +108,46 @@ class InferraClient:
         timeout: Request timeout in seconds
         max_retries: Maximum number of retries for failed requests
         requests_per_minute: Rate limit for requests
+        burst_size: Maximum number of requests sent back-to-back before
+            the rate limiter starts spacing them out
+        tokens_per_minute: Optional token budget per minute; when set, the
+            estimated cost of each chat/completion request is reserved
+            before it is sent and reconciled with the reported usage
+        rate_limiter: Optional limiter to share between several clients
+            using the same account (defaults to one built from the config)
+        token_budget: Optional TPM budget to share between several clients
+        connection_limit: Total number of simultaneous connections in the pool
+            (0 for no limit)
+        connection_limit_per_host: Simultaneous connections to a single host
+            (0 for no limit)
+        keepalive_timeout: Seconds an idle pooled connection is kept open
+        dns_cache_ttl: Seconds resolved addresses are cached (None caches forever)
+        happy_eyeballs_delay: Delay before racing the next address family when
+            connecting (None disables Happy Eyeballs)
+        trusted_decode: Build chat and completion responses as lightweight
+            unvalidated objects (see models.trusted) instead of pydantic models
+        adaptive_concurrency: Adapt the number of requests in flight to the
+            server's capacity, backing off on 429s, 5xx responses and rising
+            latency, and pausing all requests while a Retry-After is pending
+        max_concurrency: Upper bound for the adaptive concurrency limit
+        response_cache: Optional cache (MemoryCache or SQLiteCache from
+            utils.cache) for chat and completion responses. Only
+            deterministic (temperature=0) requests are cached by default.
+        coalesce_requests: Share one HTTP call between identical chat and
+            completion requests (and GETs) that are in flight at the same
+            time. Only deterministic requests (temperature 0 or unset, a
+            single choice) are coalesced, and the shared call is charged
+            once against the token budget. Coalesced callers receive the
+            same response dictionary, and identical streams are fanned out
+            from one upstream stream.
+        shutdown_timeout: Seconds close() waits for in-flight requests,
+            including open streams and downloads, before closing the session
+        hooks: Callables receiving the RequestMetrics of every finished
+            request (queue wait, connection acquire, time to headers and to
+            first token, latency, sizes, attempt and token usage), e.g. a
+            MetricsRegistry or OpenTelemetryHook from utils.instrumentation,
+            or an InferraLogger from utils.logging.
+            Nothing is measured when there are none.
     """
     def __init__(
         self,
@@ -25,39 +155,228 @@ class InferraClient:
         base_url: str = "https://api.inferra.net/v1",
         timeout: float = 60.0,
         max_retries: int = 3,
-        requests_per_minute: int = 500
+        requests_per_minute: int = 500,
+        burst_size: int = 50,
+        tokens_per_minute: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        token_budget: Optional[TokenBudget] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: Optional[int] = 300,
+        happy_eyeballs_delay: Optional[float] = 0.25,
+        trusted_decode: bool = False,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int = 256,
+        response_cache: Optional["ResponseCache"] = None,
+        coalesce_requests: bool = False,
+        shutdown_timeout: float = 30.0,
+        hooks: Optional[Iterable[Callable[[RequestMetrics], None]]] = None
     ):
         self.config = Config(
             api_key=api_key,
             base_url=base_url,
             timeout=timeout,
             max_retries=max_retries,
-            requests_per_minute=requests_per_minute
+            requests_per_minute=requests_per_minute,
+            burst_size=burst_size,
+            tokens_per_minute=tokens_per_minute,
+            connection_limit=connection_limit,
+            connection_limit_per_host=connection_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            dns_cache_ttl=dns_cache_ttl,
+            happy_eyeballs_delay=happy_eyeballs_delay,
+            trusted_decode=trusted_decode,
+            adaptive_concurrency=adaptive_concurrency,
+            max_concurrency=max_concurrency,
+            coalesce_requests=coalesce_requests,
+            shutdown_timeout=shutdown_timeout
         )
         
         self._session = None
-        
-        # Initialize API interfaces
-        self.chat = ChatAPI(self)
-        self.completions = CompletionsAPI(self)
-        self.batch = BatchAPI(self)
-        self.files = FilesAPI(self)
+
+        # API calls and requests outside of them in flight, tracked so
+        # close() can drain them. Raw responses are released by the caller
+        # and stay in flight until then.
+        self._calls = 0
+        self._in_flight = 0
+        self._raw_responses = weakref.WeakSet()
+        self._closing = False
+        self.hooks = list(hooks or ())
+
+        # A single limiter shared by every API surface of this client
+        self.rate_limiter = rate_limiter or RateLimiter(
+            requests_per_minute=self.config.requests_per_minute,
+            burst_size=self.config.burst_size
+        )
+        self.token_budget = token_budget
+        if self.token_budget is None and self.config.tokens_per_minute:
+            self.token_budget = TokenBudget(self.config.tokens_per_minute)
+        self.concurrency_limiter = None
+        if self.config.adaptive_concurrency:
+            self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=min(16, self.config.max_concurrency),
+                max_limit=self.config.max_concurrency
+            )
+        self.response_cache = response_cache
+        self.single_flight = None
+        if self.config.coalesce_requests:
+            self.single_flight = SingleFlight(stall_timeout=self.config.timeout)
+
+    # API interfaces are built on first access, so a client that only uses
+    # one of them never imports the others (and their models)
+    @cached_property
+    def chat(self) -> "ChatAPI":
+        from .api.chat import ChatAPI
+        return ChatAPI(self)
+
+    @cached_property
+    def completions(self) -> "CompletionsAPI":
+        from .api.completions import CompletionsAPI
+        return CompletionsAPI(self)
+
+    @cached_property
+    def batch(self) -> "BatchAPI":
+        from .api.batch import BatchAPI
+        return BatchAPI(self)
+
+    @cached_property
+    def files(self) -> "FilesAPI":
+        from .api.files import FilesAPI
+        return FilesAPI(self)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
         if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.connection_limit,
+                limit_per_host=self.config.connection_limit_per_host,
+                keepalive_timeout=self.config.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.config.dns_cache_ttl,
+                happy_eyeballs_delay=self.config.happy_eyeballs_delay,
+            )
             self._session = aiohttp.ClientSession(
-                headers={
-                    "Authorization": f"Bearer {self.config.api_key}",
-                    "Content-Type": "application/json",
-                }
+                connector=connector,
+                # Connection and upload timings are only traced for hooks
+                trace_configs=[build_trace_config()] if self.hooks else None,
+                # Content-Type is set per request: a session-wide JSON type
+                # would override the boundary of multipart uploads
+                headers={"Authorization": f"Bearer {self.config.api_key}"}
             )
         return self._session
 
-    async def close(self):
-        """Close the client session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
+    def pool_stats(self) -> dict:
+        """
+        Get a snapshot of the connection pool.
+
+        aiohttp only exposes the pool limits publicly; the occupancy is read
+        from connector internals that are known for the supported aiohttp
+        versions (see setup.py). If they can't be read, the occupancy
+        counts are None rather than wrong.
+
+        Returns:
+            Dictionary with the pool limits and the number of connections
+            in use, idle connections kept alive, and requests waiting for
+            a free connection
+        """
+        stats = {
+            "limit": self.config.connection_limit,
+            "limit_per_host": self.config.connection_limit_per_host,
+            "in_use": 0,
+            "idle": 0,
+            "waiters": 0,
+        }
+        if self._session is None or self._session.closed:
+            return stats
+        stats.update(_connector_occupancy(self._session.connector))
+        return stats
+
+    @property
+    def in_flight(self) -> int:
+        """Number of API calls and requests in flight, counting started streams and raw responses."""
+        return (
+            self._calls
+            + self._in_flight
+            + sum(1 for response in self._raw_responses if not response.closed)
+        )
+
+    async def warmup(self, connections: int = 1, check_auth: bool = True) -> int:
+        """
+        Open pooled connections ahead of the first request.
+
+        Opening a connection pays for DNS, TCP and TLS, so without a warm-up
+        the first requests after startup are noticeably slower than steady
+        state. ``connections`` requests to the models endpoint are sent at
+        the same time, which makes the pool open one connection for each,
+        and the connections are then kept alive for reuse (for up to
+        ``keepalive_timeout`` seconds while idle).
+
+        Args:
+            connections: Number of connections to open, capped by the pool limits
+            check_auth: Raise if the API key is rejected
+
+        Returns:
+            Number of idle connections in the pool afterwards (0 if the
+            pool occupancy can't be read, see pool_stats())
+
+        Raises:
+            InferraAuthenticationError: If check_auth is set and the API key is invalid
+            InferraConnectionError: If the API cannot be reached
+        """
+        session = await self._get_session()
+        url = f"{self.config.base_url.rstrip('/')}/{ENDPOINTS['models'].lstrip('/')}"
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+
+        async def probe() -> int:
+            await self.rate_limiter.acquire()
+            try:
+                async with session.get(url, timeout=timeout) as response:
+                    # Reading the body lets the connection return to the pool
+                    await response.read()
+                    return response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise InferraConnectionError(
+                    f"Warm-up failed: {str(e) or type(e).__name__}",
+                    request_sent=not isinstance(e, aiohttp.ClientConnectorError)
+                )
+
+        statuses = await asyncio.gather(*(probe() for _ in range(max(1, connections))))
+        if check_auth and 401 in statuses:
+            raise InferraAuthenticationError("Invalid API key")
+        return self.pool_stats()["idle"] or 0
+
+    async def close(self, timeout: Optional[float] = None):
+        """
+        Close the client.
+
+        New calls and requests are rejected while those in flight, including
+        calls waiting to retry, started streams and downloads, are given up
+        to ``timeout`` seconds to finish; a call may retry in the meantime.
+        A stream that was returned but not read from yet is not waited for.
+        Batch polling is then stopped and the session and response cache
+        closed, aborting anything still running. The client reopens its
+        session if it is used again afterwards.
+
+        Args:
+            timeout: Seconds to wait for in-flight requests (defaults to
+                ``shutdown_timeout``; 0 closes immediately)
+        """
+        if timeout is None:
+            timeout = self.config.shutdown_timeout
+        self._closing = True
+        try:
+            await _drain(lambda: self.in_flight, time.monotonic() + timeout)
+
+            batch = self.__dict__.get("batch")
+            if batch is not None and batch._watcher is not None:
+                await batch._watcher.close()
+            if self._session and not self._session.closed:
+                await self._session.close()
+            if self.response_cache is not None:
+                await self.response_cache.close()
+        finally:
+            self._closing = False
 
     async def request(
         self,
@@ -71,43 +390,314 @@ class InferraClient:
         Args:
             method: HTTP method
             path: API endpoint path
-            **kwargs: Additional request parameters
+            **kwargs: Additional request parameters. ``coalesce`` tells
+                whether the request may share an identical one in flight:
+                by default a ``json`` body is checked for determinism, and a
+                pre-encoded ``data`` body is never shared. ``upload=True``
+                sends a large body without the total timeout, bounding only
+                connecting and waiting for the response.
             
         Returns:
-            Response data
+            Response data, an async iterator over the decoded server-sent
+            events when ``stream=True`` is passed, or the undecoded
+            aiohttp response when ``raw=True`` is passed (the caller must
+            release it)
+
+        Raises:
+            InferraError: If the client is closing (the requests of a call
+                already in flight are still sent)
+        """
+        # The requests of an API call are counted as part of the call
+        counted = current_call.get() is not self
+        if self._closing and counted:
+            raise InferraError("Client is closing")
+        stream = kwargs.pop("stream", False)
+        raw = kwargs.pop("raw", False)
+        metrics = None
+        if self.hooks:
+            metrics = RequestMetrics(method, path, stream, request_attempt.get())
+
+        if counted:
+            self._in_flight += 1
+        try:
+            response = await self._dispatch(method, path, stream, raw, kwargs, metrics)
+        except BaseException as e:
+            if counted:
+                self._in_flight -= 1
+            if metrics is not None:
+                metrics.finish(self.hooks, e)
+            raise
+        if counted:
+            self._in_flight -= 1
+        if stream and not raw:
+            return self._track_stream(response, metrics)
+        if raw:
+            self._raw_responses.add(response)
+        if metrics is not None:
+            if isinstance(response, dict):
+                metrics.record_usage(response.get("usage"))
+            metrics.finish(self.hooks)
+        return response
+
+    async def _track_stream(
+        self,
+        events: AsyncIterator[dict],
+        metrics: Optional[RequestMetrics]
+    ) -> AsyncIterator[dict]:
+        """Pass a stream through, counting it as in flight from its first read until it ends."""
+        self._in_flight += 1
+        error = None
+        try:
+            async for event in events:
+                if metrics is not None:
+                    if metrics.first_token is None:
+                        metrics.first_token = time.monotonic()
+                    if event.get("usage"):
+                        metrics.record_usage(event["usage"])
+                yield event
+        except GeneratorExit:
+            # The consumer stopped early, which isn't an error
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._in_flight -= 1
+            await events.aclose()
+            if metrics is not None:
+                metrics.finish(self.hooks, error)
+
+    async def _dispatch(
+        self,
+        method: str,
+        path: str,
+        stream: bool,
+        raw: bool,
+        kwargs: dict,
+        metrics: Optional[RequestMetrics] = None
+    ) -> Union[dict, AsyncIterator[dict], aiohttp.ClientResponse]:
+        """Send a request, coalescing it with identical in-flight requests if enabled."""
+        if raw:
+            kwargs.pop("coalesce", None)
+            return await self._send(method, path, stream, raw=True, metrics=metrics, **kwargs)
+
+        key = self._coalesce_key(method, path, kwargs, kwargs.pop("coalesce", None))
+        if "json" in kwargs:
+            # Serialize with the fastest available codec instead of letting
+            # aiohttp fall back to the stdlib encoder.
+            kwargs["data"] = codec.dumps(kwargs.pop("json"))
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Type": "application/json"}
+
+        if key is None:
+            return await self._send(method, path, stream, metrics=metrics, **kwargs)
+        if stream:
+            result = await self.single_flight.stream(
+                key, lambda: self._send(method, path, True, metrics=metrics, **kwargs)
+            )
+        else:
+            result = await self.single_flight.do(
+                key, lambda: self._send(method, path, False, metrics=metrics, **kwargs)
+            )
+        if metrics is not None and metrics.headers is None:
+            # Another caller's request was shared, this one never went out
+            metrics.coalesced = True
+        return result
+
+    def _coalesce_key(
+        self,
+        method: str,
+        path: str,
+        kwargs: dict,
+        coalesce: Optional[bool] = None
+    ) -> Optional[str]:
+        """
+        Get the single-flight key of a request.
+
+        Args:
+            method: HTTP method
+            path: API endpoint path
+            kwargs: Request parameters
+            coalesce: Whether the caller allows coalescing (see request())
+
+        Returns:
+            A hash of the canonical request, or None if the request must not
+            be coalesced
+        """
+        if self.single_flight is None or coalesce is False:
+            return None
+        if method != "GET" and not (method == "POST" and path in COALESCED_PATHS):
+            return None
+        if "data" in kwargs:
+            data = kwargs["data"]
+            # Pre-encoded JSON bodies (e.g. spliced message prefixes) are not
+            # decoded again; only the caller can tell whether they may be shared
+            if not isinstance(data, bytes) or (method == "POST" and not coalesce):
+                return None
+            digest = hashlib.sha256(f"{method} {path}\n".encode("utf-8"))
+            digest.update(data)
+            return digest.hexdigest()
+        if method == "POST" and coalesce is None and not _deterministic(kwargs.get("json")):
+            return None
+        return codec.canonical_hash(
+            f"{method} {path}",
+            {"json": kwargs.get("json"), "params": kwargs.get("params")}
+        )
+
+    def _joins_flight(self, method: str, path: str, stream: bool, kwargs: dict) -> bool:
+        """
+        Check whether a request sent now would share an identical one in flight.
+
+        Nothing may be awaited between the check and sending the request for
+        the answer to still hold.
+
+        Args:
+            method: HTTP method
+            path: API endpoint path
+            stream: Whether the request streams its response
+            kwargs: Request parameters, as passed to request()
+
+        Returns:
+            True if the request would be coalesced and not sent itself
         """
+        key = self._coalesce_key(method, path, kwargs, kwargs.get("coalesce"))
+        return key is not None and self.single_flight.joinable(key, stream)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        stream: bool,
+        raw: bool = False,
+        metrics: Optional[RequestMetrics] = None,
+        upload: bool = False,
+        **kwargs
+    ) -> Union[dict, AsyncIterator[dict], aiohttp.ClientResponse]:
+        """Send one HTTP request and decode its response."""
+        await self.rate_limiter.acquire()
         session = await self._get_session()
         
         url = f"{self.config.base_url.rstrip('/')}/{path.lstrip('/')}"
-        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
         
+        limiter = self.concurrency_limiter
+        if limiter is not None:
+            await limiter.acquire()
+        sent_at = time.monotonic()
+        if metrics is not None:
+            metrics.sent = sent_at
+            kwargs["trace_request_ctx"] = metrics
+
         try:
-            async with session.request(method, url, timeout=timeout, **kwargs) as response:
-                if response.status == 429:
-                    retry_after = response.headers.get("Retry-After", "60")
-                    raise InferraRateLimitError(
-                        "Rate limit exceeded",
-                        retry_after=float(retry_after)
-                    )
-                
-                if response.status == 401:
-                    raise InferraAuthenticationError("Invalid API key")
-                
-                if response.status != 200:
-                    error_data = await response.json()
-                    raise InferraAPIError(
-                        f"API request failed: {error_data.get('error', {}).get('message', 'Unknown error')}",
-                        status_code=response.status,
-                        response=error_data
-                    )
-                
-                if kwargs.get("stream", False):
-                    return response.content
-                
-                return await response.json()
-                
-        except aiohttp.ClientError as e:
-            raise InferraAPIError(f"Request failed: {str(e)}")
+            timeout = self._build_timeout(stream or raw or upload)
+            response = await session.request(method, url, timeout=timeout, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if limiter is not None:
+                limiter.release(latency=time.monotonic() - sent_at)
+            raise InferraConnectionError(
+                f"Request failed: {str(e) or type(e).__name__}",
+                request_sent=not isinstance(e, aiohttp.ClientConnectorError)
+            )
+        except BaseException:
+            if limiter is not None:
+                limiter.release()
+            raise
+
+        if metrics is not None:
+            metrics.headers = time.monotonic()
+            metrics.status = response.status
+            if not raw:
+                metrics._content = response.content
+
+        retry_after = None
+        if response.status == 429:
+            retry_after = float(response.headers.get("Retry-After", "60"))
+
+        if limiter is not None:
+            # The slot is held until the headers arrive; time-to-headers is
+            # the latency signal the controller adapts to.
+            limiter.release(response.status, time.monotonic() - sent_at, retry_after)
+
+        handed_off = False
+        try:
+            if response.status == 429:
+                raise InferraRateLimitError(
+                    "Rate limit exceeded",
+                    retry_after=retry_after,
+                    global_pause=limiter is not None
+                )
+            
+            if response.status == 401:
+                raise InferraAuthenticationError("Invalid API key")
+            
+            # 206 answers a Range request made through raw=True
+            if response.status != 200 and not (raw and response.status == 206):
+                error_data = await self._read_json(response)
+                raise InferraAPIError(
+                    f"API request failed: {error_data.get('error', {}).get('message', 'Unknown error')}",
+                    status_code=response.status,
+                    response=error_data
+                )
+            
+            if raw:
+                handed_off = True
+                return response
+
+            if stream:
+                # The event iterator owns the response from here on and
+                # releases it once the stream is exhausted or closed.
+                handed_off = True
+                return iter_sse_events(response)
+            
+            return await self._read_json(response)
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise InferraConnectionError(f"Request failed: {str(e) or type(e).__name__}")
+        finally:
+            if not handed_off:
+                response.release()
+
+    def _build_timeout(self, stream: bool) -> aiohttp.ClientTimeout:
+        """
+        Build the timeout for one attempt.
+
+        Inside a retried call the attempt may not outlive the deadline of the
+        whole call, so the configured timeout is shrunk to the time left.
+
+        Args:
+            stream: Whether the request or its response is streamed and may
+                outlive the total timeout
+
+        Raises:
+            InferraConnectionError: If the deadline has already passed
+        """
+        timeout = self.config.timeout
+        deadline = request_deadline.get()
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise InferraConnectionError("Request failed: deadline exceeded", request_sent=False)
+            timeout = min(timeout, remaining)
+
+        if stream:
+            # A stream or an upload may legitimately outlive the total
+            # timeout, so only bound connecting and the gap between two reads.
+            return aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=timeout,
+                sock_read=self.config.timeout
+            )
+        return aiohttp.ClientTimeout(total=timeout)
+
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> dict:
+        """Read and decode a JSON response body."""
+        body = await response.read()
+        try:
+            return codec.loads(body)
+        except codec.DecodeError:
+            if response.status == 200:
+                raise InferraAPIError("Failed to decode API response", status_code=response.status)
+            # Error pages from proxies and load balancers are often not JSON
+            return {"error": {"message": body.decode("utf-8", "replace") or "Unknown error"}}
 
     # Convenience methods
     async def get(self, path: str, **kwargs):
@@ -122,11 +712,29 @@ class InferraClient:
         """Make a DELETE request."""
         return await self.request("DELETE", path, **kwargs)
 
+    async def __aenter__(self) -> "InferraClient":
+        """Async context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit, draining in-flight requests."""
+        await self.close()
+
     def __enter__(self):
         """Context manager entry."""
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit."""
+        """
+        Context manager exit.
+
+        The session can only be closed from a running event loop, so the
+        close is scheduled there; prefer ``async with`` (or
+        SyncInferraClient) to close deterministically.
+        """
         if self._session and not self._session.closed:
-            self._session.close()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            loop.create_task(self.close(timeout=0))
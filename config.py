@@ -9,7 +9,19 @@ class Config:
         base_url: str = "https://api.inferra.net/v1",
         timeout: float = 60.0,
         max_retries: int = 3,
-        requests_per_minute: int = 500
+        requests_per_minute: int = 500,
+        burst_size: int = 50,
+        tokens_per_minute: Optional[int] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: Optional[int] = 300,
+        happy_eyeballs_delay: Optional[float] = 0.25,
+        trusted_decode: bool = False,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int = 256,
+        coalesce_requests: bool = False,
+        shutdown_timeout: float = 30.0
     ):
         self.api_key = api_key or os.getenv("INFERRA_API_KEY")
         if not self.api_key:
@@ -19,3 +31,25 @@ class Config:
         self.timeout = timeout
         self.max_retries = max_retries
         self.requests_per_minute = requests_per_minute
+        self.burst_size = burst_size
+        self.tokens_per_minute = tokens_per_minute
+
+        # Connection pool settings
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.happy_eyeballs_delay = happy_eyeballs_delay
+
+        # Build lightweight unvalidated response objects instead of pydantic models
+        self.trusted_decode = trusted_decode
+
+        # Adaptive (AIMD) limit on requests in flight
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_concurrency = max_concurrency
+
+        # Share one HTTP call between identical concurrent requests
+        self.coalesce_requests = coalesce_requests
+
+        # Seconds close() waits for in-flight requests before closing the session
+        self.shutdown_timeout = shutdown_timeout
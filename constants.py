@@ -14,6 +14,7 @@ ENDPOINTS = {
     "completions": "/completions",
     "batch": "/batch",
     "files": "/files",
+    "models": "/models",
 }
 
 # Rate limits
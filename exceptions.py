@@ -11,13 +11,25 @@ class InferraAPIError(InferraError):
 
 class InferraRateLimitError(InferraAPIError):
     """Raised when rate limits are exceeded."""
-    def __init__(self, message: str, retry_after: float = None):
-        super().__init__(message)
+    def __init__(self, message: str, retry_after: float = None, global_pause: bool = False):
+        super().__init__(message, status_code=429)
         self.retry_after = retry_after
+        # True when Retry-After has already been applied as a client-wide
+        # pause, so retrying callers don't need to sleep on their own
+        self.global_pause = global_pause
 
 class InferraAuthenticationError(InferraAPIError):
     """Raised when authentication fails."""
-    pass
+    def __init__(self, message: str, status_code: int = 401, response: dict = None):
+        super().__init__(message, status_code=status_code, response=response)
+
+class InferraConnectionError(InferraAPIError):
+    """Raised when the API could not be reached or the connection failed."""
+    def __init__(self, message: str, request_sent: bool = True):
+        super().__init__(message)
+        # False when the connection was never established, so the server
+        # cannot have seen the request
+        self.request_sent = request_sent
 
 class InferraValidationError(InferraError):
     """Raised when input validation fails."""
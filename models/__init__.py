@@ -1,7 +1,38 @@
-from .chat import Message, ChatCompletion, ChatCompletionChunk
-from .completion import Completion, CompletionChunk
-from .batch import Batch, BatchFile
-from .common import Usage, Choice, DeltaMessage
+from typing import TYPE_CHECKING
+from .._lazy import lazy_module
+
+if TYPE_CHECKING:
+    from .chat import Message, ChatCompletion, ChatCompletionChunk
+    from .completion import Completion, CompletionChunk
+    from .batch import Batch, BatchFile, BatchResult, BatchResponse
+    from .common import Usage, Choice, DeltaMessage
+    from .trusted import (
+        TrustedChatCompletion,
+        TrustedChatCompletionChunk,
+        TrustedCompletion,
+        TrustedCompletionChunk,
+    )
+
+# Imported on first access, so the trusted models don't load pydantic and
+# each group of pydantic models is only built when used
+_LAZY_ATTRIBUTES = {
+    "Message": ".chat",
+    "ChatCompletion": ".chat",
+    "ChatCompletionChunk": ".chat",
+    "Completion": ".completion",
+    "CompletionChunk": ".completion",
+    "Batch": ".batch",
+    "BatchFile": ".batch",
+    "BatchResult": ".batch",
+    "BatchResponse": ".batch",
+    "Usage": ".common",
+    "Choice": ".common",
+    "DeltaMessage": ".common",
+    "TrustedChatCompletion": ".trusted",
+    "TrustedChatCompletionChunk": ".trusted",
+    "TrustedCompletion": ".trusted",
+    "TrustedCompletionChunk": ".trusted",
+}
 
 __all__ = [
     "Message",
@@ -11,7 +42,15 @@ __all__ = [
     "CompletionChunk",
     "Batch",
     "BatchFile",
+    "BatchResult",
+    "BatchResponse",
     "Usage",
     "Choice",
-    "DeltaMessage"
+    "DeltaMessage",
+    "TrustedChatCompletion",
+    "TrustedChatCompletionChunk",
+    "TrustedCompletion",
+    "TrustedCompletionChunk"
 ]
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_ATTRIBUTES)
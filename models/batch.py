@@ -34,3 +34,16 @@ class Batch(BaseModel):
     expired_at: Optional[int] = Field(None, description="When the batch expired")
     request_counts: BatchRequestCounts = Field(..., description="Request counts")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Custom metadata")
+
+class BatchResponse(BaseModel):
+    """The response to one request of a batch."""
+    status_code: int = Field(..., description="HTTP status code of the response")
+    request_id: Optional[str] = Field(None, description="ID of the request")
+    body: Dict[str, Any] = Field(default_factory=dict, description="Response body")
+
+class BatchResult(BaseModel):
+    """One line of a batch output or error file."""
+    id: Optional[str] = Field(None, description="Unique identifier for the result")
+    custom_id: str = Field(..., description="custom_id of the input request")
+    response: Optional[BatchResponse] = Field(None, description="Response, if the request was answered")
+    error: Optional[Dict[str, Any]] = Field(None, description="Error, if the request failed")
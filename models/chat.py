@@ -1,12 +1,6 @@
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from .common import Usage, Choice, DeltaMessage
-
-class Message(BaseModel):
-    """A message in a chat conversation."""
-    role: str = Field(..., description="The role of the message sender (system, user, or assistant)")
-    content: str = Field(..., description="The content of the message")
-    name: Optional[str] = Field(None, description="The name of the sender (optional)")
+from .common import Message, Usage, Choice, DeltaMessage
 
 class ChatCompletion(BaseModel):
     """Response from a chat completion request."""
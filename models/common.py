@@ -7,6 +7,12 @@ class Usage(BaseModel):
     completion_tokens: int = Field(..., description="Number of tokens in the completion")
     total_tokens: int = Field(..., description="Total number of tokens used")
 
+class Message(BaseModel):
+    """A message in a chat conversation."""
+    role: str = Field(..., description="The role of the message sender (system, user, or assistant)")
+    content: str = Field(..., description="The content of the message")
+    name: Optional[str] = Field(None, description="The name of the sender (optional)")
+
 class DeltaMessage(BaseModel):
     """A delta message in a streaming response."""
     role: Optional[str] = Field(None, description="The role of the message sender")
@@ -16,6 +22,8 @@ class DeltaMessage(BaseModel):
 class Choice(BaseModel):
     """A completion choice."""
     index: int = Field(..., description="Index of this choice")
-    message: Union[Message, DeltaMessage] = Field(..., description="The message or delta")
+    message: Optional[Union[Message, DeltaMessage]] = Field(None, description="The message (non-streaming chat responses)")
+    delta: Optional[DeltaMessage] = Field(None, description="The delta (streaming chat responses)")
+    text: Optional[str] = Field(None, description="The generated text (text completions)")
     finish_reason: Optional[str] = Field(None, description="Reason for finishing")
     logprobs: Optional[dict] = Field(None, description="Log probabilities of tokens")
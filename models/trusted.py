@@ -0,0 +1,133 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+class TrustedModel(ABC):
+    """
+    Base class for lightweight response objects.
+
+    Trusted models expose the same attributes as their pydantic counterparts
+    but are built straight from decoded API dictionaries without validation.
+    They use ``__slots__`` to avoid a per-instance ``__dict__``, which keeps
+    allocation per streamed chunk to a minimum. Use them only for responses
+    from the Inferra API, whose shape is already guaranteed by the server.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build the object from a decoded API dictionary."""
+
+    def model_dump(self, exclude_none: bool = False) -> Dict[str, Any]:
+        """
+        Convert the object back to a plain dictionary.
+
+        Args:
+            exclude_none: Leave out the fields set to None, like pydantic
+        """
+        result = {}
+        for name in self._fields:
+            value = getattr(self, name)
+            if isinstance(value, TrustedModel):
+                value = value.model_dump(exclude_none)
+            elif isinstance(value, list):
+                value = [v.model_dump(exclude_none) if isinstance(v, TrustedModel) else v for v in value]
+            if value is None and exclude_none:
+                continue
+            result[name] = value
+        return result
+
+    # Keep the pydantic v1 spelling used across the SDK working
+    dict = model_dump
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+class TrustedUsage(TrustedModel):
+    """Token usage information."""
+    __slots__ = ("prompt_tokens", "completion_tokens", "total_tokens")
+    _fields = __slots__
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrustedUsage":
+        self = cls.__new__(cls)
+        self.prompt_tokens = data.get("prompt_tokens", 0)
+        self.completion_tokens = data.get("completion_tokens", 0)
+        self.total_tokens = data.get("total_tokens", 0)
+        return self
+
+class TrustedMessage(TrustedModel):
+    """A message or delta message in a response."""
+    __slots__ = ("role", "content", "name")
+    _fields = __slots__
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrustedMessage":
+        self = cls.__new__(cls)
+        self.role = data.get("role")
+        self.content = data.get("content")
+        self.name = data.get("name")
+        return self
+
+class TrustedChoice(TrustedModel):
+    """A completion choice."""
+    __slots__ = ("index", "message", "delta", "text", "finish_reason", "logprobs")
+    _fields = __slots__
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrustedChoice":
+        self = cls.__new__(cls)
+        self.index = data.get("index", 0)
+        message = data.get("message")
+        self.message = TrustedMessage.from_dict(message) if message is not None else None
+        delta = data.get("delta")
+        self.delta = TrustedMessage.from_dict(delta) if delta is not None else None
+        self.text = data.get("text")
+        self.finish_reason = data.get("finish_reason")
+        self.logprobs = data.get("logprobs")
+        return self
+
+class _TrustedResponse(TrustedModel):
+    """Shared layout of completion responses and streamed chunks."""
+    __slots__ = ("id", "object", "created", "model", "choices", "usage")
+    _fields = __slots__
+    _object = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        self = cls.__new__(cls)
+        self.id = data.get("id")
+        self.object = data.get("object", cls._object)
+        self.created = data.get("created")
+        self.model = data.get("model")
+        self.choices = [TrustedChoice.from_dict(choice) for choice in data.get("choices", ())]
+        usage = data.get("usage")
+        self.usage = TrustedUsage.from_dict(usage) if usage is not None else None
+        return self
+
+class TrustedChatCompletion(_TrustedResponse):
+    """Unvalidated response from a chat completion request."""
+    __slots__ = ()
+    _object = "chat.completion"
+
+class TrustedChatCompletionChunk(_TrustedResponse):
+    """Unvalidated chunk of a streaming chat completion response."""
+    __slots__ = ()
+    _object = "chat.completion.chunk"
+
+class TrustedCompletion(_TrustedResponse):
+    """Unvalidated response from a text completion request."""
+    __slots__ = ()
+    _object = "text_completion"
+
+class TrustedCompletionChunk(_TrustedResponse):
+    """Unvalidated chunk of a streaming text completion response."""
+    __slots__ = ()
+    _object = "text_completion.chunk"
@@ -0,0 +1,331 @@
+import asyncio
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional, Union
+from .client import InferraClient, _CallTracker, _drain
+from .utils.rate_limiter import TokenBudget
+from .utils.retry import current_call, request_deadline
+from .exceptions import InferraAuthenticationError, InferraError, InferraRateLimitError
+
+if TYPE_CHECKING:
+    from .api import ChatAPI, CompletionsAPI
+    from .utils.cache import ResponseCache
+
+STRATEGIES = ("least_loaded", "weighted")
+
+class _Member:
+    """One account of a pool and its routing state."""
+    __slots__ = ("client", "weight", "current_weight", "drained_until", "disabled", "requests")
+
+    def __init__(self, client: InferraClient, weight: float):
+        self.client = client
+        self.weight = weight
+        # Running weight of the smooth weighted round-robin
+        self.current_weight = 0.0
+        # Rate limited (429) until this time.monotonic() value
+        self.drained_until = 0.0
+        # The API key was rejected (401)
+        self.disabled = False
+        self.requests = 0
+
+    def available(self, now: float) -> bool:
+        return not self.disabled and self.drained_until <= now
+
+class InferraClientPool(_CallTracker):
+    """
+    Spread requests over several API keys and base URLs.
+
+    Every account gets its own InferraClient, and so its own rate limiter,
+    token budget and connection pool: with N accounts the pool can send up
+    to N times the requests and tokens per minute of a single one. Each
+    request goes to one account, picked either as the least loaded (fewest
+    requests in flight relative to its weight, rate limiter queues
+    included) or by smooth weighted round-robin.
+
+    An account answering 429 is drained until its Retry-After expires and
+    one answering 401 is disabled until restore() is called; in both cases
+    the request is sent again on another account straight away. When every
+    account is drained, requests wait for the first to come back.
+
+    Only the chat and completions APIs are pooled: files and batches belong
+    to the account that created them, so use ``pool.clients[i].files`` and
+    ``pool.clients[i].batch`` for those.
+
+    Example:
+        async with InferraClientPool(["key-1", "key-2", "key-3"], requests_per_minute=500) as pool:
+            response = await pool.chat.create(model=..., messages=[...])
+
+    Args:
+        accounts: API keys, or dictionaries of InferraClient arguments for
+            one account (``api_key``, ``base_url``, ``requests_per_minute``...)
+            with an optional routing ``weight`` (defaults to 1)
+        strategy: "least_loaded" or "weighted"
+        response_cache: Optional cache shared by every account
+        **client_kwargs: InferraClient arguments shared by every account,
+            overridden by the per-account dictionaries
+    """
+    def __init__(
+        self,
+        accounts: Iterable[Union[str, Dict[str, Any]]],
+        strategy: str = "least_loaded",
+        response_cache: Optional["ResponseCache"] = None,
+        **client_kwargs
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of: {', '.join(STRATEGIES)}")
+        self.strategy = strategy
+
+        self._members: List[_Member] = []
+        for account in accounts:
+            if isinstance(account, str):
+                account = {"api_key": account}
+            options = {**client_kwargs, **account}
+            weight = float(options.pop("weight", 1.0))
+            if weight <= 0:
+                raise ValueError("Account weights must be positive")
+            self._members.append(_Member(InferraClient(**options), weight))
+        if not self._members:
+            raise ValueError("At least one account is required")
+        self._cursor = 0
+        # API calls in flight, retries included, drained by close()
+        self._calls = 0
+        self._closing = False
+
+        # The API surfaces read these like they would on a single client.
+        # Settings shared through client_kwargs are the same on every
+        # account, so the first one's config stands for the pool.
+        self.config = self._members[0].client.config
+        self.response_cache = response_cache
+        # Tokens are budgeted for the pool as a whole, since the account
+        # is only picked once the request is sent
+        self.token_budget = None
+        budgets = [member.client.config.tokens_per_minute for member in self._members]
+        if all(budgets):
+            self.token_budget = TokenBudget(sum(budgets))
+
+    @property
+    def clients(self) -> List[InferraClient]:
+        """The client of every account, in the order they were given."""
+        return [member.client for member in self._members]
+
+    @cached_property
+    def chat(self) -> "ChatAPI":
+        from .api.chat import ChatAPI
+        return ChatAPI(self)
+
+    @cached_property
+    def completions(self) -> "CompletionsAPI":
+        from .api.completions import CompletionsAPI
+        return CompletionsAPI(self)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests in flight over every account."""
+        return sum(member.client.in_flight for member in self._members)
+
+    def stats(self) -> List[dict]:
+        """
+        Get the routing state of every account.
+
+        Returns:
+            One dictionary per account with its base URL, weight, requests
+            routed to it and in flight, seconds it stays drained for, and
+            whether its key was rejected
+        """
+        now = time.monotonic()
+        return [
+            {
+                "base_url": member.client.config.base_url,
+                "weight": member.weight,
+                "requests": member.requests,
+                "in_flight": member.client.in_flight,
+                "drained_for": max(0.0, member.drained_until - now),
+                "disabled": member.disabled,
+            }
+            for member in self._members
+        ]
+
+    def restore(self):
+        """Route requests to every account again, including drained and rejected ones."""
+        for member in self._members:
+            member.disabled = False
+            member.drained_until = 0.0
+
+    def _pick(self, available: List[_Member]) -> _Member:
+        """Choose the account of the next request among the available ones."""
+        if len(available) == 1:
+            return available[0]
+
+        if self.strategy == "weighted":
+            # Smooth weighted round-robin: the order is interleaved and
+            # exactly proportional to the weights over every cycle
+            total = 0.0
+            chosen = None
+            for member in available:
+                member.current_weight += member.weight
+                total += member.weight
+                if chosen is None or member.current_weight > chosen.current_weight:
+                    chosen = member
+            chosen.current_weight -= total
+            return chosen
+
+        # Scan from a rotating start so ties don't all go to the first account
+        count = len(available)
+        start = self._cursor % count
+        self._cursor += 1
+        chosen = None
+        lowest = 0.0
+        for offset in range(count):
+            member = available[(start + offset) % count]
+            load = member.client.in_flight / member.weight
+            if chosen is None or load < lowest:
+                chosen, lowest = member, load
+        return chosen
+
+    async def _acquire(self) -> _Member:
+        """Get the account of the next request, waiting while every account is drained."""
+        while True:
+            now = time.monotonic()
+            available = [member for member in self._members if member.available(now)]
+            if available:
+                member = self._pick(available)
+                member.requests += 1
+                return member
+
+            drained = [member.drained_until for member in self._members if not member.disabled]
+            if not drained:
+                raise InferraAuthenticationError("Every API key of the pool was rejected")
+            wait = min(drained) - now
+            deadline = request_deadline.get()
+            if deadline is not None and now + wait >= deadline:
+                raise InferraRateLimitError(
+                    f"Every account is rate limited. Try again in {wait:.1f} seconds.",
+                    retry_after=wait
+                )
+            await asyncio.sleep(wait)
+
+    def _others_available(self, member: _Member) -> bool:
+        now = time.monotonic()
+        return any(other is not member and other.available(now) for other in self._members)
+
+    def _joins_flight(self, method: str, path: str, stream: bool, kwargs: dict) -> bool:
+        """
+        Check whether a request sent now would share an identical one in flight.
+
+        Always False: the account, and so whose in-flight requests could be
+        shared, is only picked once the request is sent.
+        """
+        return False
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        **kwargs
+    ) -> Union[dict, AsyncIterator[dict]]:
+        """
+        Make a request to the API through one of the accounts.
+
+        Args:
+            method: HTTP method
+            path: API endpoint path
+            **kwargs: Additional request parameters (see InferraClient.request)
+
+        Returns:
+            Response data, or an async iterator over the decoded server-sent
+            events when ``stream=True`` is passed
+
+        Raises:
+            InferraError: If the pool is closing (the requests of a call
+                already in flight are still sent)
+            InferraAuthenticationError: If every API key was rejected
+            InferraRateLimitError: If the last available account is rate limited
+        """
+        if self._closing and current_call.get() is not self:
+            raise InferraError("Client is closing")
+        while True:
+            member = await self._acquire()
+            try:
+                return await member.client.request(method, path, **kwargs)
+            except InferraRateLimitError as e:
+                member.drained_until = max(
+                    member.drained_until, time.monotonic() + (e.retry_after or 0.0)
+                )
+                if self._others_available(member):
+                    continue
+                # _acquire() waits for the first account to come back, so
+                # retrying callers don't need to sleep on their own
+                e.global_pause = True
+                raise
+            except InferraAuthenticationError:
+                member.disabled = True
+                if self._others_available(member):
+                    continue
+                raise
+
+    async def get(self, path: str, **kwargs):
+        """Make a GET request."""
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs):
+        """Make a POST request."""
+        return await self.request("POST", path, **kwargs)
+
+    async def warmup(self, connections: int = 1, check_auth: bool = True) -> int:
+        """
+        Open pooled connections of every account ahead of the first request.
+
+        An account whose key is rejected is disabled rather than failing
+        the warm-up.
+
+        Args:
+            connections: Number of connections to open per account
+            check_auth: Disable the accounts whose API key is rejected
+
+        Returns:
+            Number of idle connections over every account afterwards
+
+        Raises:
+            InferraAuthenticationError: If every API key was rejected
+        """
+        async def warm(member: _Member) -> int:
+            try:
+                return await member.client.warmup(connections, check_auth=check_auth)
+            except InferraAuthenticationError:
+                member.disabled = True
+                return 0
+
+        idle = await asyncio.gather(*(warm(member) for member in self._members))
+        if all(member.disabled for member in self._members):
+            raise InferraAuthenticationError("Every API key of the pool was rejected")
+        return sum(idle)
+
+    async def close(self, timeout: Optional[float] = None):
+        """
+        Close every client, draining their in-flight requests, and the response cache.
+
+        API calls in flight, including those waiting to retry, are waited
+        for first, then each client drains its own requests in the time left.
+
+        Args:
+            timeout: Seconds to wait for in-flight calls and requests (see
+                InferraClient.close)
+        """
+        if timeout is None:
+            timeout = self.config.shutdown_timeout
+        self._closing = True
+        try:
+            deadline = time.monotonic() + timeout
+            await _drain(lambda: self._calls, deadline)
+            remaining = max(0.0, deadline - time.monotonic())
+            await asyncio.gather(*(member.client.close(remaining) for member in self._members))
+            if self.response_cache is not None:
+                await self.response_cache.close()
+        finally:
+            self._closing = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
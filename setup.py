@@ -26,12 +26,15 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=[
-        "aiohttp>=3.8.0",
+        "aiohttp>=3.10.0,<4",
         "pydantic>=2.0.0",
         "tiktoken>=0.3.0",
         "tenacity>=8.0.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.9.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.18.0",
@@ -0,0 +1,190 @@
+import asyncio
+import inspect
+import threading
+from functools import cached_property
+from typing import Any, AsyncIterator, Awaitable, Iterator, TypeVar
+from .client import InferraClient
+
+T = TypeVar("T")
+
+class SyncInferraClient:
+    """
+    Blocking client for code that can't use async/await (Flask, Celery, scripts).
+
+    One event loop runs in a background thread for the lifetime of the
+    client and every call is executed on it, so the connection pool, rate
+    limiter and other shared state of the underlying InferraClient are
+    reused across calls instead of being rebuilt by ``asyncio.run()`` each
+    time. Calls may be made concurrently from any number of threads.
+
+    The API surfaces mirror InferraClient: coroutine methods block and
+    return their result, and streams (``stream=True``, iter_many(), ...)
+    are returned as regular iterators.
+
+    Example:
+        with SyncInferraClient(api_key="...") as client:
+            response = client.chat.create(model=..., messages=[...])
+            for chunk in client.chat.create(model=..., messages=[...], stream=True):
+                ...
+
+    Args:
+        **kwargs: Arguments passed to InferraClient
+    """
+    def __init__(self, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name="inferra-sync-client",
+            daemon=True
+        )
+        self._thread.start()
+        self._closed = False
+
+        try:
+            self.client: InferraClient = self.run(self._create_client(kwargs))
+        except BaseException:
+            self._closed = True
+            self._stop_loop()
+            raise
+
+    @cached_property
+    def chat(self) -> "_SyncAPI":
+        return _SyncAPI(self, self.client.chat)
+
+    @cached_property
+    def completions(self) -> "_SyncAPI":
+        return _SyncAPI(self, self.client.completions)
+
+    @cached_property
+    def batch(self) -> "_SyncAPI":
+        return _SyncAPI(self, self.client.batch)
+
+    @cached_property
+    def files(self) -> "_SyncAPI":
+        return _SyncAPI(self, self.client.files)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    @staticmethod
+    async def _create_client(kwargs: dict) -> InferraClient:
+        # Built on the loop thread so anything bound to the running loop
+        # at construction time belongs to the right loop
+        return InferraClient(**kwargs)
+
+    def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Run an awaitable on the background loop and wait for its result.
+
+        Args:
+            awaitable: Coroutine or other awaitable to run
+
+        Returns:
+            The result of the awaitable
+
+        Raises:
+            RuntimeError: If called from the background loop itself or after close()
+        """
+        error = None
+        if self._closed:
+            error = "SyncInferraClient is closed"
+        elif threading.current_thread() is self._thread:
+            error = "SyncInferraClient cannot be called from its own event loop"
+        if error is not None:
+            if inspect.iscoroutine(awaitable):
+                # Avoid a "never awaited" warning for the rejected call
+                awaitable.close()
+            raise RuntimeError(error)
+
+        future = asyncio.run_coroutine_threadsafe(_await(awaitable), self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            # Interrupted (e.g. KeyboardInterrupt): stop the work on the loop too
+            future.cancel()
+            raise
+
+    def iterate(self, iterator: AsyncIterator[T]) -> Iterator[T]:
+        """
+        Consume an async iterator from the background loop as a regular iterator.
+
+        Items are fetched one at a time, so a slow consumer applies
+        backpressure to the stream. Stopping early closes the async iterator.
+
+        Args:
+            iterator: Async iterator created by one of the client's APIs
+
+        Yields:
+            The items of the async iterator
+        """
+        try:
+            while True:
+                try:
+                    item = self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None and not self._closed:
+                self.run(aclose())
+
+    def pool_stats(self) -> dict:
+        """Get a snapshot of the connection pool, see InferraClient.pool_stats()."""
+        return self.run(_call(self.client.pool_stats))
+
+    def close(self):
+        """Close the session and stop the background loop."""
+        if self._closed:
+            return
+        try:
+            self.run(self.client.close())
+        finally:
+            self._closed = True
+            self._stop_loop()
+
+    def __enter__(self) -> "SyncInferraClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+class _SyncAPI:
+    """Blocking view of one of InferraClient's API surfaces."""
+    def __init__(self, sync_client: SyncInferraClient, api: Any):
+        self._sync_client = sync_client
+        self._api = api
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._api, name)
+        sync_client = self._sync_client
+
+        if inspect.isasyncgenfunction(attribute):
+            def iterate(*args, **kwargs):
+                return sync_client.iterate(attribute(*args, **kwargs))
+            iterate.__doc__ = attribute.__doc__
+            return iterate
+
+        if inspect.iscoroutinefunction(attribute):
+            def call(*args, **kwargs):
+                result = sync_client.run(attribute(*args, **kwargs))
+                if hasattr(result, "__aiter__"):
+                    # Streaming responses
+                    return sync_client.iterate(result)
+                return result
+            call.__doc__ = attribute.__doc__
+            return call
+
+        return attribute
+
+async def _await(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+async def _call(func, *args):
+    return func(*args)
@@ -1,8 +1,11 @@
 import pytest
+import pytest_asyncio
 import os
 import json
 from pathlib import Path
+from aiohttp import web
 from inferra import InferraClient
+from inferra.utils.instrumentation import RequestMetrics
 
 @pytest.fixture
 def test_api_key():
@@ -17,3 +20,72 @@ def sample_responses():
     path = Path(__file__).parent / "data" / "sample_responses.json"
     with open(path) as f:
         return json.load(f)
+
+@pytest.fixture
+def mock_json_response(mocker):
+    """Factory for a mocked aiohttp response whose body is ``payload`` as JSON."""
+    def make(payload, status=200):
+        mock_response = mocker.Mock()
+        mock_response.status = status
+        mock_response.read = mocker.AsyncMock(return_value=json.dumps(payload).encode())
+        return mock_response
+
+    return make
+
+@pytest.fixture
+def mock_stream_response(mocker):
+    """Factory for a mocked aiohttp response streaming ``events`` as SSE."""
+    def make(events):
+        async def iter_any():
+            for event in events:
+                yield b"data: " + json.dumps(event).encode() + b"\n\n"
+            yield b"data: [DONE]\n\n"
+
+        mock_response = mocker.Mock()
+        mock_response.status = 200
+        mock_response.content.iter_any = iter_any
+        return mock_response
+
+    return make
+
+@pytest.fixture
+def finished_metrics():
+    """Factory for the metrics of a completed chat request, with ``fields`` overridden."""
+    def make(**fields) -> RequestMetrics:
+        metrics = RequestMetrics("POST", "/chat/completions", False)
+        metrics.sent = metrics.started + 0.002
+        metrics.headers = metrics.started + 0.03
+        metrics.ended = metrics.started + 0.04
+        metrics.status = 200
+        for name, value in fields.items():
+            setattr(metrics, name, value)
+        return metrics
+
+    return make
+
+@pytest_asyncio.fixture
+async def stub_server():
+    """
+    Start local stand-ins for the API, stopped when the test ends.
+
+    The fixture is a factory taking ``(method, path, handler)`` routes, with
+    paths relative to the API root, and returning the base URL to give the
+    client.
+    """
+    runners = []
+
+    async def start(routes):
+        app = web.Application()
+        for method, path, handler in routes:
+            app.router.add_route(method, f"/v1{path}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        runners.append(runner)
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    yield start
+    for runner in runners:
+        await runner.cleanup()
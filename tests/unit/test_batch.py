@@ -1,14 +1,27 @@
+import asyncio
+import json
 import pytest
-from inferra.models.batch import Batch, BatchFile
-from inferra.exceptions import InferraAPIError
+import pytest_asyncio
+from aiohttp import web
+from inferra import InferraClient
+from inferra.models.batch import Batch, BatchFile, BatchResult
+from inferra.utils.batch_results import BatchResultReader
+from inferra.api.batch import BatchWatcher, _WatchedBatch
+from inferra.exceptions import InferraAPIError, InferraValidationError
 
 @pytest.mark.asyncio
 async def test_create_batch(client, mocker, sample_responses):
-    mock_response = mocker.AsyncMock()
+    mock_response = mocker.Mock()
     mock_response.status = 200
-    mock_response.json.return_value = sample_responses["batch_status"]
+    mock_response.read = mocker.AsyncMock(
+        return_value=json.dumps(sample_responses["batch_status"]).encode()
+    )
     
-    mocker.patch("aiohttp.ClientSession.request", return_value=mock_response)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
     
     batch = await client.batch.create(
         input_file_id="file-123",
@@ -21,11 +34,17 @@ async def test_create_batch(client, mocker, sample_responses):
 
 @pytest.mark.asyncio
 async def test_batch_status_polling(client, mocker, sample_responses):
-    mock_response = mocker.AsyncMock()
+    mock_response = mocker.Mock()
     mock_response.status = 200
-    mock_response.json.return_value = sample_responses["batch_status"]
+    mock_response.read = mocker.AsyncMock(
+        return_value=json.dumps(sample_responses["batch_status"]).encode()
+    )
     
-    mocker.patch("aiohttp.ClientSession.request", return_value=mock_response)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
     
     batch = await client.batch.wait_for_completion(
         "batch_123",
@@ -35,3 +54,254 @@ async def test_batch_status_polling(client, mocker, sample_responses):
     
     assert batch.status == "completed"
     assert batch.completed_at is not None
+
+def write_results(path, count):
+    lines = []
+    for i in range(count):
+        lines.append(json.dumps({
+            "id": f"result-{i}",
+            "custom_id": f"request-{i}",
+            "response": {"status_code": 200, "body": {"answer": i}},
+            "error": None,
+        }))
+    path.write_text("\n".join(lines) + "\n")
+
+def test_result_reader_iterates_lazily(tmp_path):
+    path = tmp_path / "output.jsonl"
+    write_results(path, 100)
+
+    with BatchResultReader(path) as results:
+        parsed = list(results)
+
+    assert len(parsed) == 100
+    assert isinstance(parsed[0], BatchResult)
+    assert parsed[99].response.body == {"answer": 99}
+
+def test_result_reader_random_access(tmp_path):
+    path = tmp_path / "output.jsonl"
+    write_results(path, 100)
+
+    with BatchResultReader(path) as results:
+        assert len(results) == 100
+        assert "request-42" in results
+        assert results["request-42"].response.body == {"answer": 42}
+        assert results.get("missing") is None
+        with pytest.raises(KeyError):
+            results["missing"]
+
+def test_result_reader_join(tmp_path):
+    path = tmp_path / "output.jsonl"
+    write_results(path, 3)
+    inputs = [{"custom_id": f"request-{i}"} for i in (2, 0, 7)]
+
+    with BatchResultReader(path) as results:
+        joined = list(results.join(inputs))
+
+    assert [record["custom_id"] for record, _ in joined] == ["request-2", "request-0", "request-7"]
+    assert joined[0][1].response.body == {"answer": 2}
+    assert joined[2][1] is None
+
+def test_result_reader_empty_file(tmp_path):
+    path = tmp_path / "output.jsonl"
+    path.write_bytes(b"")
+
+    with BatchResultReader(path) as results:
+        assert list(results) == []
+        assert len(results) == 0
+
+@pytest_asyncio.fixture
+async def batch_server(stub_server):
+    files = {}
+    batches = {}
+
+    async def upload(request):
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "file":
+                files[f"file-{len(files)}"] = await part.read()
+        file_id = f"file-{len(files) - 1}"
+        return web.json_response({
+            "id": file_id, "object": "file", "purpose": "batch", "filename": "input.jsonl",
+            "size": len(files[file_id]), "created_at": 0, "status": "uploaded",
+        })
+
+    def batch_body(batch_id):
+        batch = batches[batch_id]
+        return {
+            "id": batch_id, "object": "batch", "status": batch["status"],
+            "input_file_id": batch["input_file_id"], "output_file_id": batch.get("output_file_id"),
+            "completion_window": "24h", "created_at": 0,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+
+    async def create(request):
+        payload = await request.json()
+        batch_id = f"batch-{len(batches)}"
+        # Earlier shards take longer, so they finish last
+        batches[batch_id] = {"status": "in_progress", "input_file_id": payload["input_file_id"], "polls": 4 - len(batches)}
+        return web.json_response(batch_body(batch_id))
+
+    async def retrieve(request):
+        batch_id = request.match_info["batch_id"]
+        batch = batches[batch_id]
+        batch["polls"] -= 1
+        if batch["polls"] <= 0 and batch["status"] == "in_progress":
+            lines = [json.loads(line) for line in files[batch["input_file_id"]].splitlines()]
+            output = "\n".join(json.dumps({
+                "custom_id": line["custom_id"],
+                "response": {"status_code": 200, "body": {"echo": line["body"]["n"]}},
+            }) for line in lines)
+            batch["output_file_id"] = f"file-{len(files)}"
+            files[batch["output_file_id"]] = output.encode()
+            batch["status"] = "completed"
+        return web.json_response(batch_body(batch_id))
+
+    async def content(request):
+        return web.Response(body=files[request.match_info["file_id"]])
+
+    base_url = await stub_server([
+        ("POST", "/files", upload),
+        ("GET", "/files/{file_id}/content", content),
+        ("POST", "/batch", create),
+        ("GET", "/batch/{batch_id}", retrieve),
+    ])
+    return base_url, batches
+
+@pytest.mark.asyncio
+async def test_run_many_shards_and_merges_in_order(test_api_key, batch_server, tmp_path):
+    base_url, batches = batch_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+    requests = (
+        {"custom_id": f"request-{i}", "method": "POST", "url": "/v1/chat/completions", "body": {"n": i}}
+        for i in range(10)
+    )
+    statuses = []
+
+    results = [
+        (record, result)
+        async for record, result in client.batch.run_many(
+            requests,
+            tmp_path,
+            max_requests_per_shard=3,
+            poll_interval=0.01,
+            on_status=lambda index, batch: statuses.append((index, batch.status))
+        )
+    ]
+    await client.close()
+
+    assert len(batches) == 4
+    assert [record["custom_id"] for record, _ in results] == [f"request-{i}" for i in range(10)]
+    assert [result.response.body["echo"] for _, result in results] == list(range(10))
+    assert statuses.count((0, "completed")) == 1
+    # The shard inputs are deleted once joined, the results are kept
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f"shard-{index:05d}.output.jsonl" for index in range(4)
+    ]
+
+@pytest.mark.asyncio
+async def test_run_many_abandoned_waits_for_cancelled_shards(test_api_key, batch_server, tmp_path):
+    base_url, _ = batch_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    async def requests():
+        for i in range(4):
+            yield {"custom_id": f"request-{i}", "method": "POST", "url": "/v1/chat/completions", "body": {"n": i}}
+        # The input stalls after the first shard
+        await asyncio.Event().wait()
+
+    results = client.batch.run_many(requests(), tmp_path, max_requests_per_shard=3, poll_interval=0.01)
+    async for _ in results:
+        break
+    await results.aclose()
+
+    running = [task for task in asyncio.all_tasks() if "run_many.<locals>" in task.get_coro().__qualname__]
+    assert running == []
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_run_many_requires_custom_id(client, tmp_path):
+    with pytest.raises(InferraValidationError):
+        async for _ in client.batch.run_many([{"body": {}}], tmp_path):
+            pass
+
+class FakeBatchAPI:
+    """Serves batches that finish after a given number of polls."""
+    def __init__(self, count, polls_until_done):
+        self.polls = {f"batch-{i}": polls_until_done + i % 3 for i in range(count)}
+        self.list_calls = 0
+        self.retrieve_calls = 0
+
+    def _batch(self, batch_id):
+        status = "completed" if self.polls[batch_id] <= 0 else "in_progress"
+        return Batch(
+            id=batch_id,
+            status=status,
+            input_file_id="file-123",
+            completion_window="24h",
+            created_at=0,
+            request_counts={"total": 10, "completed": 0, "failed": 0},
+        )
+
+    def _poll(self, batch_id):
+        self.polls[batch_id] -= 1
+        return self._batch(batch_id)
+
+    async def list(self, limit=20, after=None):
+        self.list_calls += 1
+        ids = sorted(self.polls, reverse=True)
+        if after is not None:
+            ids = ids[ids.index(after) + 1:]
+        return [self._poll(batch_id) for batch_id in ids[:limit]]
+
+    async def retrieve(self, batch_id):
+        self.retrieve_calls += 1
+        return self._poll(batch_id)
+
+@pytest.mark.asyncio
+async def test_watcher_multiplexes_polls():
+    api = FakeBatchAPI(count=250, polls_until_done=2)
+    watcher = BatchWatcher(api, min_interval=0.001, max_interval=0.01, page_size=100)
+    finished = []
+
+    futures = [
+        watcher.watch(f"batch-{i}", callback=finished.append)
+        for i in range(250)
+    ]
+    batches = await asyncio.wait_for(asyncio.gather(*futures), 5)
+
+    assert all(batch.status == "completed" for batch in batches)
+    assert len(finished) == 250
+    assert watcher.watching == 0
+    # A handful of paged listings instead of a retrieve per batch and poll
+    # (polling each batch on its own would take at least 750 calls)
+    assert api.retrieve_calls == 0
+    assert api.list_calls < 30
+
+@pytest.mark.asyncio
+async def test_watcher_wait_timeout():
+    api = FakeBatchAPI(count=1, polls_until_done=10_000)
+    watcher = BatchWatcher(api, min_interval=0.001, max_interval=0.01)
+
+    with pytest.raises(TimeoutError):
+        await watcher.wait("batch-0", timeout=0.05)
+
+    assert watcher.watching == 0
+    await watcher.close()
+
+def test_watcher_interval_adapts_to_progress():
+    watcher = BatchWatcher(FakeBatchAPI(count=1, polls_until_done=1), min_interval=1, max_interval=60)
+    watched = _WatchedBatch(future=None, min_interval=1)
+
+    def batch(completed, status="in_progress"):
+        return Batch(
+            id="batch-0", status=status, input_file_id="file-123", completion_window="24h",
+            created_at=0, request_counts={"total": 1000, "completed": completed, "failed": 0},
+        )
+
+    assert watcher._next_interval(watched, batch(0), now=0) == 1
+    # 10 requests/s with 990 left: about 25s until the next poll
+    watched.interval = watcher._next_interval(watched, batch(10), now=1)
+    assert 20 <= watched.interval <= 30
+    # Stalled: back off
+    assert watcher._next_interval(watched, batch(10), now=30) > watched.interval
+    assert watcher._next_interval(watched, batch(10, "finalizing"), now=31) == 1
@@ -0,0 +1,182 @@
+import sqlite3
+import pytest
+from inferra import InferraClient
+from inferra.models.chat import Message, ChatCompletion
+from inferra.utils.cache import MemoryCache, SQLiteCache, ResponseCache, record_stream
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+def test_key_is_canonical():
+    first = ResponseCache.key("/chat/completions", {"model": "m", "temperature": 0, "stream": False})
+    second = ResponseCache.key("/chat/completions", {"stream": True, "temperature": 0, "model": "m"})
+    other = ResponseCache.key("/completions", {"model": "m", "temperature": 0})
+
+    assert first == second
+    assert first != other
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru_and_byte_bound():
+    cache = MemoryCache(max_entries=2, max_bytes=1024)
+
+    await cache.set("a", {"value": 1})
+    await cache.set("b", {"value": 2})
+    assert await cache.get("a") == {"value": 1}
+
+    # "b" is now the least recently used entry
+    await cache.set("c", {"value": 3})
+    assert await cache.get("b") is None
+    assert len(cache) == 2
+
+    await cache.set("big", {"value": "x" * 1000})
+    assert cache.size <= 1024
+
+    stats = cache.stats.snapshot()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] >= 2
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl(mocker):
+    cache = MemoryCache(ttl=10)
+    now = mocker.patch("inferra.utils.cache.time.monotonic", return_value=100.0)
+
+    await cache.set("a", {"value": 1})
+    now.return_value = 111.0
+
+    assert await cache.get("a") is None
+    assert cache.stats.snapshot()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_is_shared(tmp_path):
+    path = tmp_path / "responses.db"
+    writer = SQLiteCache(path)
+    reader = SQLiteCache(path)
+
+    await writer.set("a", {"value": 1})
+
+    assert await reader.get("a") == {"value": 1}
+    assert await reader.get("b") is None
+
+@pytest.mark.asyncio
+async def test_client_close_closes_sqlite_connections(test_api_key, tmp_path):
+    cache = SQLiteCache(tmp_path / "responses.db")
+    await cache.set("a", {"value": 1})
+    # The connection opened by __init__ and the executor thread's one
+    connections = list(cache._connections)
+    assert len(connections) == 2
+
+    await InferraClient(api_key=test_api_key, response_cache=cache).close()
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+
+    # Used again, the cache reconnects
+    assert await cache.get("a") == {"value": 1}
+    await cache.close()
+
+def test_response_cache_backends_implement_get_and_set():
+    class Incomplete(ResponseCache):
+        async def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_max_entries(tmp_path):
+    cache = SQLiteCache(tmp_path / "responses.db", max_entries=2)
+
+    for name in ("a", "b", "c"):
+        await cache.set(name, {"value": name})
+
+    assert await cache.get("a") is None
+    assert await cache.get("c") == {"value": "c"}
+    assert cache.stats.snapshot()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_chat_deterministic_requests_are_cached(test_api_key, mocker, sample_responses, mock_json_response):
+    client = InferraClient(api_key=test_api_key, response_cache=MemoryCache())
+    request = mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_json_response(sample_responses["chat_completion"])
+    )
+    messages = [Message(role="user", content="Classify this")]
+
+    first = await client.chat.create(model=MODEL, messages=messages, temperature=0)
+    second = await client.chat.create(model=MODEL, messages=messages, temperature=0)
+
+    assert isinstance(second, ChatCompletion)
+    assert second == first
+    assert request.call_count == 1
+
+    # Sampled requests bypass the cache
+    await client.chat.create(model=MODEL, messages=messages, temperature=0.7)
+    assert request.call_count == 2
+
+@pytest.mark.asyncio
+async def test_chat_stream_replayed_from_cache(test_api_key, mocker, sample_responses, mock_json_response):
+    client = InferraClient(api_key=test_api_key, response_cache=MemoryCache())
+    request = mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_json_response(sample_responses["chat_completion"])
+    )
+    messages = [Message(role="user", content="Classify this")]
+
+    await client.chat.create(model=MODEL, messages=messages, temperature=0)
+    chunks = [
+        chunk
+        async for chunk in await client.chat.create(
+            model=MODEL, messages=messages, temperature=0, stream=True
+        )
+    ]
+
+    assert request.call_count == 1
+    assert chunks[0].choices[0].delta.content == (
+        sample_responses["chat_completion"]["choices"][0]["message"]["content"]
+    )
+    assert chunks[-1].usage.total_tokens == 57
+
+@pytest.mark.asyncio
+async def test_completed_stream_populates_cache(test_api_key, mocker, sample_responses, mock_stream_response):
+    cache = MemoryCache()
+    client = InferraClient(api_key=test_api_key, response_cache=cache)
+    first = dict(sample_responses["streaming_chunk"])
+    second = {
+        **first,
+        "choices": [{"index": 0, "delta": {"content": " of life"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8},
+    }
+    request = mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_stream_response([first, second])
+    )
+    messages = [Message(role="user", content="Hi")]
+
+    async for _ in await client.chat.create(
+        model=MODEL, messages=messages, temperature=0, stream=True
+    ):
+        pass
+
+    completion = await client.chat.create(model=MODEL, messages=messages, temperature=0)
+
+    assert request.call_count == 1
+    assert completion.choices[0].message.content == "The meaning of life"
+    assert completion.choices[0].finish_reason == "stop"
+    assert completion.usage.total_tokens == 8
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_not_cached():
+    cache = MemoryCache()
+
+    async def events():
+        yield {"id": "a", "choices": [{"index": 0, "delta": {"content": "x"}}]}
+        yield {"id": "a", "choices": [], "usage": {"total_tokens": 1}}
+
+    stream = record_stream(events(), cache, "key", "chat.completion")
+    await stream.__anext__()
+    await stream.aclose()
+
+    assert len(cache) == 0
@@ -1,14 +1,21 @@
+import json
 import pytest
+from inferra import InferraClient
 from inferra.models.chat import Message, ChatCompletion
+from inferra.models.trusted import TrustedChatCompletion, TrustedChatCompletionChunk
 from inferra.exceptions import InferraAPIError
+from inferra.utils.prompts import MessagePrefix
+from inferra.utils.token_counter import TokenCounter, TokenCountMemo
 
 @pytest.mark.asyncio
-async def test_chat_completion(client, mocker, sample_responses):
-    mock_response = mocker.AsyncMock()
-    mock_response.status = 200
-    mock_response.json.return_value = sample_responses["chat_completion"]
+async def test_chat_completion(client, mocker, sample_responses, mock_json_response):
+    mock_response = mock_json_response(sample_responses["chat_completion"])
     
-    mocker.patch("aiohttp.ClientSession.request", return_value=mock_response)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
     
     response = await client.chat.create(
         model="meta-llama/llama-3.1-8b-instruct/fp-8",
@@ -21,14 +28,14 @@ async def test_chat_completion(client, mocker, sample_responses):
     assert response.choices[0].message.content.startswith("The meaning of life")
 
 @pytest.mark.asyncio
-async def test_chat_completion_streaming(client, mocker, sample_responses):
-    mock_response = mocker.AsyncMock()
-    mock_response.status = 200
-    mock_response.content.iter_lines.return_value = [
-        b'data: ' + str(sample_responses["streaming_chunk"]).encode()
-    ]
+async def test_chat_completion_streaming(client, mocker, sample_responses, mock_stream_response):
+    mock_response = mock_stream_response([sample_responses["streaming_chunk"]])
     
-    mocker.patch("aiohttp.ClientSession.request", return_value=mock_response)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
     
     chunks = []
     async for chunk in await client.chat.create(
@@ -40,3 +47,83 @@ async def test_chat_completion_streaming(client, mocker, sample_responses):
     
     assert len(chunks) > 0
     assert chunks[0].choices[0].delta.content == "The meaning"
+    mock_response.release.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_chat_completion_trusted_decode(test_api_key, mocker, sample_responses, mock_json_response):
+    client = InferraClient(api_key=test_api_key, trusted_decode=True)
+    mock_response = mock_json_response(sample_responses["chat_completion"])
+
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
+
+    response = await client.chat.create(
+        model="meta-llama/llama-3.1-8b-instruct/fp-8",
+        messages=[Message(role="user", content="What is the meaning of life?")]
+    )
+
+    assert isinstance(response, TrustedChatCompletion)
+    assert response.choices[0].message.content.startswith("The meaning of life")
+    assert response.usage.total_tokens == 57
+    assert response.model_dump() == ChatCompletion(**sample_responses["chat_completion"]).model_dump()
+
+def test_trusted_chunk_matches_pydantic_interface(sample_responses):
+    chunk = TrustedChatCompletionChunk.from_dict(sample_responses["streaming_chunk"])
+
+    assert chunk.object == "chat.completion.chunk"
+    assert chunk.choices[0].delta.content == "The meaning"
+    assert chunk.choices[0].message is None
+    assert chunk.usage is None
+    assert not hasattr(chunk, "__dict__")
+
+@pytest.mark.asyncio
+async def test_chat_completion_with_prefix(client, mocker, sample_responses, mock_json_response):
+    request = mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_json_response(sample_responses["chat_completion"])
+    )
+    prefix = MessagePrefix([
+        Message(role="system", content="You are a \"helpful\" assistant. ✓"),
+        Message(role="user", content="2+2?"),
+        Message(role="assistant", content="4"),
+    ])
+    question = Message(role="user", content="3+3?")
+
+    response = await client.chat.create(
+        model="meta-llama/llama-3.1-8b-instruct/fp-8",
+        prefix=prefix,
+        messages=[question],
+        temperature=0.5
+    )
+
+    assert isinstance(response, ChatCompletion)
+    kwargs = request.call_args.kwargs
+    assert kwargs["headers"]["Content-Type"] == "application/json"
+    assert json.loads(kwargs["data"]) == {
+        "messages": [message.model_dump() for message in (*prefix, question)],
+        "model": "meta-llama/llama-3.1-8b-instruct/fp-8",
+        "stream": False,
+        "temperature": 0.5,
+    }
+
+    # The prefix alone is a complete conversation too
+    await client.chat.create(model="meta-llama/llama-3.1-8b-instruct/fp-8", prefix=prefix, messages=[])
+    body = json.loads(request.call_args.kwargs["data"])
+    assert body["messages"] == [message.model_dump() for message in prefix]
+
+def test_message_prefix_token_count_is_cached(mocker):
+    counter = TokenCounter("meta-llama/llama-3.1-8b-instruct/fp-8", memo=TokenCountMemo())
+    count_many = mocker.patch.object(counter, "count_many", return_value=[20])
+    prefix = MessagePrefix([Message(role="system", content="Be brief.")])
+
+    assert prefix.count_tokens(counter) == 17
+    assert prefix.count_tokens(counter) == 17
+    assert count_many.call_count == 1
+
+def test_message_prefix_is_validated():
+    with pytest.raises(InferraAPIError):
+        MessagePrefix([Message(role="system", content="   ")])
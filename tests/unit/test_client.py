@@ -1,5 +1,13 @@
+import asyncio
 import pytest
-from inferra import InferraClient, InferraAPIError, InferraAuthenticationError
+import pytest_asyncio
+from aiohttp import web
+from inferra import InferraClient, InferraAPIError, InferraAuthenticationError, InferraRateLimitError
+from inferra.exceptions import InferraError
+from inferra.client import _connector_occupancy
+from inferra.models.chat import Message
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
 
 def test_client_initialization(test_api_key):
     client = InferraClient(api_key=test_api_key)
@@ -16,7 +24,11 @@ async def test_client_authentication_error(client, mocker):
     mock_response = mocker.Mock()
     mock_response.status = 401
     
-    mocker.patch("aiohttp.ClientSession.request", return_value=mock_response)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
     
     with pytest.raises(InferraAuthenticationError):
         await client.get("/test")
@@ -27,7 +39,226 @@ async def test_client_rate_limit_error(client, mocker):
     mock_response.status = 429
     mock_response.headers = {"Retry-After": "30"}
     
-    mocker.patch("aiohttp.ClientSession.request", return_value=mock_response)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
     
     with pytest.raises(InferraAPIError, match="Rate limit exceeded"):
         await client.get("/test")
+
+def test_client_pool_configuration(test_api_key):
+    client = InferraClient(
+        api_key=test_api_key,
+        connection_limit=32,
+        connection_limit_per_host=16,
+        dns_cache_ttl=60
+    )
+    assert client.config.connection_limit == 32
+    assert client.config.connection_limit_per_host == 16
+
+    stats = client.pool_stats()
+    assert stats == {
+        "limit": 32,
+        "limit_per_host": 16,
+        "in_use": 0,
+        "idle": 0,
+        "waiters": 0,
+    }
+
+@pytest.mark.asyncio
+async def test_client_session_uses_tuned_connector(test_api_key):
+    client = InferraClient(
+        api_key=test_api_key,
+        connection_limit=8,
+        connection_limit_per_host=4
+    )
+    session = await client._get_session()
+    try:
+        assert session.connector.limit == 8
+        assert session.connector.limit_per_host == 4
+        assert client.pool_stats()["in_use"] == 0
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_client_adaptive_concurrency_pauses_on_429(test_api_key, mocker):
+    client = InferraClient(api_key=test_api_key, adaptive_concurrency=True)
+    mock_response = mocker.Mock()
+    mock_response.status = 429
+    mock_response.headers = {"Retry-After": "5"}
+
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
+
+    with pytest.raises(InferraRateLimitError) as exc_info:
+        await client.get("/test")
+
+    assert exc_info.value.global_pause
+    state = client.concurrency_limiter.state
+    assert state["inflight"] == 0
+    assert state["paused_for"] > 4
+    assert state["limit"] < 16
+    await client.close()
+
+@pytest_asyncio.fixture
+async def lifecycle_server(stub_server):
+    state = {"peers": set(), "api_key": None, "release": asyncio.Event()}
+
+    async def models(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        if request.headers["Authorization"] != f"Bearer {state['api_key']}":
+            return web.json_response({"error": {"message": "Invalid API key"}}, status=401)
+        # Hold the response so concurrent warm-up requests overlap
+        await asyncio.sleep(0.05)
+        return web.json_response({"object": "list", "data": []})
+
+    async def slow(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        await state["release"].wait()
+        return web.json_response({"done": True})
+
+    base_url = await stub_server([
+        ("GET", "/models", models),
+        ("GET", "/slow", slow),
+    ])
+    yield base_url, state
+    state["release"].set()
+
+@pytest.mark.asyncio
+async def test_client_warmup_preopens_connections(test_api_key, lifecycle_server):
+    base_url, state = lifecycle_server
+    state["api_key"] = test_api_key
+
+    async with InferraClient(api_key=test_api_key, base_url=base_url) as client:
+        idle = await client.warmup(connections=4)
+        assert idle == 4
+        assert len(state["peers"]) == 4
+
+        # Later requests reuse the warm connections
+        state["release"].set()
+        await client.get("/slow")
+        assert len(state["peers"]) == 4
+
+    assert client._session.closed
+
+@pytest.mark.asyncio
+async def test_client_warmup_checks_auth(test_api_key, lifecycle_server):
+    base_url, state = lifecycle_server
+    state["api_key"] = "another-key"
+
+    async with InferraClient(api_key=test_api_key, base_url=base_url) as client:
+        with pytest.raises(InferraAuthenticationError):
+            await client.warmup()
+        assert await client.warmup(check_auth=False) == 1
+
+@pytest.mark.asyncio
+async def test_client_close_drains_in_flight_requests(test_api_key, lifecycle_server):
+    base_url, state = lifecycle_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    request = asyncio.create_task(client.get("/slow"))
+    while client.in_flight == 0:
+        await asyncio.sleep(0.01)
+
+    closing = asyncio.create_task(client.close())
+    await asyncio.sleep(0.1)
+    assert not closing.done()
+    with pytest.raises(InferraError, match="closing"):
+        await client.get("/slow")
+
+    state["release"].set()
+    assert await request == {"done": True}
+    await closing
+    assert client.in_flight == 0
+    assert client._session.closed
+
+@pytest.mark.asyncio
+async def test_client_close_timeout_aborts_in_flight_requests(test_api_key, lifecycle_server):
+    base_url, _ = lifecycle_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url, shutdown_timeout=0.1)
+
+    request = asyncio.create_task(client.get("/slow"))
+    while client.in_flight == 0:
+        await asyncio.sleep(0.01)
+
+    await client.close()
+    with pytest.raises(InferraAPIError):
+        await request
+    assert client.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_client_close_lets_calls_finish_their_retries(test_api_key, stub_server, mocker, sample_responses):
+    attempts = 0
+
+    async def completions(request):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            return web.json_response({"error": {"message": "Overloaded"}}, status=503)
+        return web.json_response(sample_responses["chat_completion"])
+
+    base_url = await stub_server([("POST", "/chat/completions", completions)])
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+    mocker.patch.object(client.chat.create.retry_policy, "next_delay", return_value=0.2)
+
+    call = asyncio.create_task(client.chat.create(model=MODEL, messages=[Message(role="user", content="Hi")]))
+    while attempts == 0:
+        await asyncio.sleep(0.01)
+    # The call is sleeping before its second attempt, with no request out
+    await asyncio.sleep(0.05)
+    assert client.in_flight == 1
+
+    closing = asyncio.create_task(client.close(timeout=5))
+    await asyncio.sleep(0)
+    with pytest.raises(InferraError, match="closing"):
+        await client.chat.create(model=MODEL, messages=[Message(role="user", content="Hi")])
+
+    await closing
+    assert call.done()
+    assert (await call).id == sample_responses["chat_completion"]["id"]
+    assert attempts == 2
+
+@pytest.mark.asyncio
+async def test_client_close_skips_streams_never_read(test_api_key, stub_server):
+    async def completions(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b'data: {"id": "chatcmpl-1", "choices": []}\n\ndata: [DONE]\n\n')
+        return response
+
+    base_url = await stub_server([("POST", "/chat/completions", completions)])
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    events = await client.post("/chat/completions", json={}, stream=True)
+    assert client.in_flight == 0
+    await asyncio.wait_for(client.close(timeout=5), 1)
+    await events.aclose()
+
+@pytest.mark.asyncio
+async def test_client_pool_stats_reads_installed_aiohttp(test_api_key, lifecycle_server):
+    base_url, state = lifecycle_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    request = asyncio.create_task(client.get("/slow"))
+    while not state["peers"]:
+        await asyncio.sleep(0.01)
+    stats = client.pool_stats()
+    assert (stats["in_use"], stats["idle"], stats["waiters"]) == (1, 0, 0)
+
+    state["release"].set()
+    await request
+    stats = client.pool_stats()
+    assert (stats["in_use"], stats["idle"], stats["waiters"]) == (0, 1, 0)
+    await client.close()
+
+def test_connector_occupancy_tolerates_unknown_internals():
+    class Connector:
+        _acquired = set()
+        _waiters = ["not", "a", "mapping"]
+
+    assert _connector_occupancy(Connector()) == {"in_use": 0, "idle": None, "waiters": None}
@@ -0,0 +1,52 @@
+import pytest
+from inferra.utils import codec
+from inferra.models.chat import Message
+from inferra.models.trusted import TrustedChatCompletion, TrustedModel
+
+@pytest.fixture
+def restore_backend():
+    backend = codec.get_backend()
+    yield
+    codec.set_backend(backend)
+
+@pytest.mark.parametrize("backend", list(codec.BACKENDS))
+def test_codec_round_trip(backend, restore_backend, sample_responses):
+    codec.set_backend(backend)
+
+    payload = sample_responses["chat_completion"]
+    encoded = codec.dumps(payload)
+
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == payload
+    assert codec.loads(bytearray(encoded)) == payload
+
+@pytest.mark.parametrize("backend", list(codec.BACKENDS))
+def test_codec_serializes_models(backend, restore_backend):
+    codec.set_backend(backend)
+
+    encoded = codec.dumps({"messages": [Message(role="user", content="Hi")]})
+    assert codec.loads(encoded) == {"messages": [{"role": "user", "content": "Hi"}]}
+
+@pytest.mark.parametrize("backend", list(codec.BACKENDS))
+def test_codec_serializes_trusted_models(backend, restore_backend, sample_responses):
+    codec.set_backend(backend)
+    payload = sample_responses["chat_completion"]
+
+    # Fields the response didn't carry are dropped like on pydantic models
+    encoded = codec.dumps(TrustedChatCompletion.from_dict(payload))
+    assert codec.loads(encoded) == payload
+
+def test_trusted_model_is_abstract():
+    with pytest.raises(TypeError):
+        TrustedModel()
+
+@pytest.mark.parametrize("backend", list(codec.BACKENDS))
+def test_codec_decode_error(backend, restore_backend):
+    codec.set_backend(backend)
+
+    with pytest.raises(codec.DecodeError):
+        codec.loads(b"{not json")
+
+def test_codec_unknown_backend():
+    with pytest.raises(ValueError, match="not available"):
+        codec.set_backend("simdjson")
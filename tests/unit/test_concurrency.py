@@ -0,0 +1,101 @@
+import asyncio
+import random
+import pytest
+from inferra.utils.concurrency import bounded_map
+
+@pytest.mark.asyncio
+async def test_bounded_map_limits_in_flight():
+    in_flight = 0
+    peak = 0
+
+    async def work(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(random.random() / 100)
+        in_flight -= 1
+        return item * 2
+
+    results = {index: result async for index, result in bounded_map(work, range(100), max_concurrency=5)}
+
+    assert peak == 5
+    assert results == {i: i * 2 for i in range(100)}
+
+@pytest.mark.asyncio
+async def test_bounded_map_pulls_inputs_lazily():
+    pulled = 0
+
+    async def inputs():
+        nonlocal pulled
+        for i in range(1000):
+            pulled += 1
+            yield i
+
+    async def work(item):
+        await asyncio.sleep(0)
+        return item
+
+    async for index, _ in bounded_map(work, inputs(), max_concurrency=4):
+        # Never more than the in-flight window ahead of what was consumed
+        assert pulled <= index + 1 + 4
+        if index >= 10:
+            break
+
+@pytest.mark.asyncio
+async def test_bounded_map_ordered_results_and_exceptions():
+    async def work(item):
+        await asyncio.sleep((10 - item) / 1000)
+        if item == 3:
+            raise ValueError("bad input")
+        return item
+
+    results = [pair async for pair in bounded_map(work, range(10), max_concurrency=3, ordered=True, return_exceptions=True)]
+
+    assert [index for index, _ in results] == list(range(10))
+    assert isinstance(results[3][1], ValueError)
+    assert results[4] == (4, 4)
+
+@pytest.mark.asyncio
+async def test_bounded_map_raises_when_not_returning_exceptions():
+    started = []
+    unwound = []
+
+    async def work(item):
+        started.append(item)
+        if item == 0:
+            raise ValueError("boom")
+        try:
+            await asyncio.sleep(1)
+        finally:
+            unwound.append(item)
+
+    with pytest.raises(ValueError, match="boom"):
+        async for _ in bounded_map(work, range(100), max_concurrency=2):
+            pass
+    assert len(started) <= 3
+    # The remaining calls were cancelled and awaited before the error surfaced
+    assert unwound == started[1:]
+
+@pytest.mark.asyncio
+async def test_create_many_uses_bounded_concurrency(client, mocker):
+    in_flight = 0
+    peak = 0
+
+    async def fake_create(model, messages, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return messages
+
+    mocker.patch.object(client.chat, "create", side_effect=fake_create)
+
+    results = await client.chat.create_many(
+        "meta-llama/llama-3.1-8b-instruct/fp-8",
+        ([i] for i in range(50)),
+        max_concurrency=7
+    )
+
+    assert results == [[i] for i in range(50)]
+    assert peak == 7
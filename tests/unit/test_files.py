@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import re
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from inferra import InferraClient
+
+@pytest_asyncio.fixture
+async def upload_server(stub_server):
+    received = {}
+
+    async def handler(request):
+        received["content_type"] = request.headers["Content-Type"]
+        reader = await request.multipart()
+        async for part in reader:
+            data = bytearray()
+            while True:
+                chunk = await part.read_chunk()
+                if not chunk:
+                    break
+                data += chunk
+            received[part.name] = bytes(data)
+            if part.filename:
+                received["filename"] = part.filename
+        return web.json_response({
+            "id": "file-123",
+            "object": "file",
+            "purpose": received["purpose"].decode(),
+            "filename": received["filename"],
+            "size": len(received["file"]),
+            "created_at": 1677649420,
+            "status": "uploaded",
+        })
+
+    base_url = await stub_server([("POST", "/files", handler)])
+    return base_url, received
+
+def records(count):
+    return [{"custom_id": f"request-{i}", "body": {"prompt": "x" * 100}} for i in range(count)]
+
+@pytest.mark.asyncio
+async def test_upload_records_in_chunks(test_api_key, upload_server):
+    base_url, received = upload_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    uploaded = await client.files.create(records(500), chunk_size=1024)
+    await client.close()
+
+    lines = received["file"].decode().splitlines()
+    assert received["content_type"].startswith("multipart/form-data")
+    assert received["purpose"] == b"batch"
+    assert uploaded.filename == "batch.jsonl"
+    assert uploaded.size == len(received["file"])
+    assert [json.loads(line) for line in lines] == records(500)
+
+@pytest.mark.asyncio
+async def test_upload_async_iterable(test_api_key, upload_server):
+    base_url, received = upload_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    async def generate():
+        for record in records(10):
+            yield record
+
+    await client.files.create(generate(), filename="generated.jsonl")
+    await client.close()
+
+    assert received["filename"] == "generated.jsonl"
+    assert len(received["file"].splitlines()) == 10
+
+@pytest.mark.asyncio
+async def test_upload_path_is_streamed_from_disk(test_api_key, upload_server, tmp_path):
+    base_url, received = upload_server
+    path = tmp_path / "input.jsonl"
+    content = b"".join(json.dumps(record).encode() + b"\n" for record in records(200))
+    path.write_bytes(content)
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    uploaded = await client.files.create(path, chunk_size=4096)
+    await client.close()
+
+    assert uploaded.filename == "input.jsonl"
+    assert received["file"] == content
+
+@pytest.mark.asyncio
+async def test_slow_upload_outlives_the_total_timeout(test_api_key, upload_server):
+    base_url, received = upload_server
+    client = InferraClient(api_key=test_api_key, base_url=base_url, timeout=0.2)
+
+    async def generate():
+        for record in records(10):
+            await asyncio.sleep(0.05)
+            yield record
+
+    await client.files.create(generate(), chunk_size=64)
+    await client.close()
+
+    assert len(received["file"].splitlines()) == 10
+
+@pytest_asyncio.fixture
+async def range_server(stub_server):
+    content = os.urandom(300 * 1024)
+    state = {"ranges": True, "failures": 0, "served": 0}
+
+    async def handler(request):
+        header = request.headers.get("Range")
+        if not state["ranges"] or header is None:
+            state["served"] += len(content)
+            return web.Response(body=content)
+
+        start, end = (int(value) for value in re.match(r"bytes=(\d+)-(\d+)", header).groups())
+        if start > 0 and state["failures"]:
+            state["failures"] -= 1
+            return web.json_response({"error": {"message": "busy"}}, status=503)
+
+        body = content[start:end + 1]
+        state["served"] += len(body)
+        return web.Response(
+            status=206,
+            body=body,
+            headers={"Content-Range": f"bytes {start}-{end}/{len(content)}"}
+        )
+
+    base_url = await stub_server([("GET", "/files/{file_id}/content", handler)])
+    return base_url, content, state
+
+@pytest.mark.asyncio
+async def test_parallel_ranged_download(test_api_key, range_server, tmp_path):
+    base_url, content, state = range_server
+    state["failures"] = 2
+    output = tmp_path / "output.jsonl"
+    reported = []
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    await client.files.download(
+        "file-123",
+        output,
+        max_connections=4,
+        min_segment_size=64 * 1024,
+        chunk_size=16 * 1024,
+        progress=lambda done, total: reported.append((done, total))
+    )
+    await client.close()
+
+    assert output.read_bytes() == content
+    assert reported[-1] == (len(content), len(content))
+    assert not (tmp_path / "output.jsonl.download").exists()
+
+@pytest.mark.asyncio
+async def test_download_resumes_from_partial_file(test_api_key, range_server, tmp_path):
+    base_url, content, state = range_server
+    output = tmp_path / "output.jsonl"
+    half = len(content) // 2
+    output.write_bytes(content[:half] + bytes(len(content) - half))
+    (tmp_path / "output.jsonl.download").write_text(json.dumps({
+        "file_id": "file-123",
+        "size": len(content),
+        "segments": [[0, half, half], [half, len(content), 0]],
+    }))
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    await client.files.download("file-123", output)
+    await client.close()
+
+    assert output.read_bytes() == content
+    # Only the probe byte and the missing half were fetched again
+    assert state["served"] == 1 + len(content) - half
+
+@pytest.mark.asyncio
+async def test_download_without_range_support(test_api_key, range_server, tmp_path):
+    base_url, content, state = range_server
+    state["ranges"] = False
+    output = tmp_path / "output.jsonl"
+    client = InferraClient(api_key=test_api_key, base_url=base_url)
+
+    await client.files.download("file-123", output)
+    assert await client.files.download("file-123") == content
+    await client.close()
+
+    assert output.read_bytes() == content
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import pytest
+import inferra
+
+HEAVY_DEPENDENCIES = {"aiohttp", "pydantic", "tiktoken"}
+
+def import_times(code):
+    """Run code in a fresh interpreter under -X importtime.
+
+    Returns:
+        Dictionary mapping each imported module to its cumulative import
+        time in microseconds
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(inferra.__file__)))
+    env = {**os.environ, "PYTHONPATH": package_root}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+def top_level(times):
+    return {module.split(".")[0] for module in times}
+
+def test_import_package_is_lightweight():
+    times = import_times("import inferra")
+
+    assert not top_level(times) & HEAVY_DEPENDENCIES
+    # Generous budget: the package itself only loads its exceptions
+    assert times["inferra"] < 100_000
+
+def test_client_does_not_load_models_or_tiktoken():
+    times = import_times(
+        "from inferra import InferraClient\n"
+        "client = InferraClient(api_key='test')\n"
+        "from inferra.utils import TokenCounter\n"
+        "TokenCounter('meta-llama/llama-3.1-8b-instruct/fp-8')"
+    )
+
+    assert "aiohttp" in top_level(times)
+    assert not top_level(times) & {"pydantic", "tiktoken"}
+    assert not any(module.startswith("inferra.models") for module in times)
+
+def test_api_surfaces_load_on_first_access():
+    times = import_times(
+        "from inferra import InferraClient\n"
+        "InferraClient(api_key='test').files"
+    )
+
+    assert "inferra.api.files" in times
+    assert "inferra.api.chat" not in times
+
+def test_lazy_attributes():
+    from inferra.client import InferraClient
+    from inferra.models.chat import Message
+    import inferra.api
+    import inferra.models
+    import inferra.utils
+
+    assert inferra.InferraClient is InferraClient
+    assert inferra.models.Message is Message
+    assert "SyncInferraClient" in dir(inferra)
+    assert "BatchWatcher" in dir(inferra.api)
+    with pytest.raises(AttributeError, match="'inferra' has no attribute"):
+        inferra.NotAnAttribute
+    with pytest.raises(AttributeError, match="'inferra.utils' has no attribute"):
+        inferra.utils.NotAnAttribute
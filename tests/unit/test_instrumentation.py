@@ -0,0 +1,169 @@
+import json
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from inferra import InferraClient, InferraAPIError
+from inferra.utils.instrumentation import MetricsRegistry, OpenTelemetryHook, RequestMetrics, path_template
+
+@pytest_asyncio.fixture
+async def metrics_server(stub_server):
+    async def completions(request):
+        body = await request.json()
+        if not body.get("stream"):
+            return web.json_response({
+                "id": "chatcmpl-1",
+                "choices": [],
+                "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17}
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for index in range(3):
+            event = {"id": "chatcmpl-1", "choices": [{"index": 0, "delta": {"content": str(index)}}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def missing(request):
+        return web.json_response({"error": {"message": "Not found"}}, status=404)
+
+    base_url = await stub_server([
+        ("POST", "/chat/completions", completions),
+        ("GET", "/missing", missing),
+    ])
+    return base_url
+
+@pytest.mark.asyncio
+async def test_hooks_receive_request_metrics(test_api_key, metrics_server):
+    recorded = []
+    async with InferraClient(api_key=test_api_key, base_url=metrics_server, hooks=[recorded.append]) as client:
+        await client.post("/chat/completions", json={"model": "m", "messages": []})
+        await client.post("/chat/completions", json={"model": "m", "messages": []})
+
+    first, second = recorded
+    assert isinstance(first, RequestMetrics)
+    assert (first.method, first.path, first.status, first.error) == ("POST", "/chat/completions", 200, None)
+    assert first.attempt == 0 and not first.stream
+    assert (first.prompt_tokens, first.completion_tokens) == (12, 5)
+    assert first.bytes_out > 0
+    assert first.bytes_in > 0
+    assert 0 <= first.queue_wait <= first.latency
+    assert 0 < first.time_to_headers <= first.latency
+    assert first.time_to_first_token is None
+
+    # The second request reuses the pooled connection
+    assert not first.connection_reused
+    assert second.connection_reused
+
+@pytest.mark.asyncio
+async def test_hooks_measure_streams(test_api_key, metrics_server):
+    recorded = []
+    async with InferraClient(api_key=test_api_key, base_url=metrics_server, hooks=[recorded.append]) as client:
+        events = await client.post(
+            "/chat/completions", json={"model": "m", "messages": [], "stream": True}, stream=True
+        )
+        assert recorded == []
+        received = [event async for event in events]
+
+    assert len(received) == 3
+    metrics, = recorded
+    assert metrics.stream and metrics.status == 200
+    assert metrics.time_to_headers <= metrics.time_to_first_token <= metrics.latency
+
+@pytest.mark.asyncio
+async def test_hooks_record_errors_and_survive_failing_hooks(test_api_key, metrics_server):
+    recorded = []
+
+    def broken(metrics):
+        raise RuntimeError("hook failure")
+
+    async with InferraClient(
+        api_key=test_api_key, base_url=metrics_server, hooks=[broken, recorded.append]
+    ) as client:
+        with pytest.raises(InferraAPIError):
+            await client.get("/missing")
+
+    metrics, = recorded
+    assert metrics.status == 404
+    assert metrics.error == "InferraAPIError"
+    assert metrics.latency is not None
+
+def test_client_without_hooks_skips_tracing(test_api_key):
+    client = InferraClient(api_key=test_api_key)
+    assert client.hooks == []
+
+def test_metrics_registry_renders_prometheus_text(finished_metrics):
+    registry = MetricsRegistry()
+    registry(finished_metrics(bytes_out=300, bytes_in=2000, prompt_tokens=12, completion_tokens=5))
+    registry(finished_metrics(status=429, attempt=1))
+
+    snapshot = registry.snapshot()
+    requests = snapshot["inferra_requests_total"]
+    assert requests[(("method", "POST"), ("outcome", "200"), ("path", "/chat/completions"))] == 1
+    assert requests[(("method", "POST"), ("outcome", "429"), ("path", "/chat/completions"))] == 1
+    latency, = snapshot["inferra_request_duration_seconds"].values()
+    assert latency["count"] == 2
+    assert latency["buckets"][0.025] == 0
+    assert latency["buckets"][0.05] == 2
+
+    text = registry.render()
+    assert "# TYPE inferra_request_duration_seconds histogram" in text
+    assert 'inferra_request_duration_seconds_bucket{path="/chat/completions",le="+Inf"} 2' in text
+    assert 'inferra_retries_total{path="/chat/completions"} 1' in text
+    assert 'inferra_tokens_total{kind="prompt",path="/chat/completions"} 12' in text
+    assert text.endswith("\n")
+
+def test_path_template_replaces_resource_ids():
+    assert path_template("/chat/completions") == "/chat/completions"
+    assert path_template("/files") == "/files"
+    assert path_template("/files/file-123/content") == "/files/{id}/content"
+    assert path_template("batch/batch-42?expand=1") == "/batch/{id}"
+
+def test_metrics_registry_labels_templates_and_coalesced_requests(finished_metrics):
+    registry = MetricsRegistry()
+    for batch_id in ("batch-1", "batch-2"):
+        registry(finished_metrics(method="GET", path=f"/batch/{batch_id}"))
+    registry(finished_metrics(status=None, coalesced=True))
+
+    requests = registry.snapshot()["inferra_requests_total"]
+    assert requests == {
+        (("method", "GET"), ("outcome", "200"), ("path", "/batch/{id}")): 2,
+        (("method", "POST"), ("outcome", "coalesced"), ("path", "/chat/completions")): 1,
+    }
+
+class FakeSpan:
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.events = []
+        self.end_time = None
+
+    def add_event(self, name, timestamp):
+        self.events.append((name, timestamp))
+
+    def end(self, end_time):
+        self.end_time = end_time
+
+class FakeTracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time, attributes):
+        span = FakeSpan(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+def test_opentelemetry_hook_exports_spans(finished_metrics):
+    tracer = FakeTracer()
+    metrics = finished_metrics(prompt_tokens=12)
+    OpenTelemetryHook(tracer=tracer)(metrics)
+
+    span, = tracer.spans
+    assert span.name == "POST /chat/completions"
+    assert span.start_time == metrics.started_ns
+    assert span.end_time - span.start_time == pytest.approx(40_000_000, abs=1000)
+    assert span.attributes["http.response.status_code"] == 200
+    assert span.attributes["gen_ai.usage.input_tokens"] == 12
+    assert "gen_ai.usage.output_tokens" not in span.attributes
+    assert [name for name, _ in span.events] == ["limiters_passed", "response_headers"]
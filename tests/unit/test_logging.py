@@ -0,0 +1,66 @@
+import logging
+import pytest
+from inferra.utils.logging import InferraLogger
+
+class Unprintable:
+    def __str__(self):
+        raise AssertionError("formatted although the level is disabled")
+
+def test_logger_installs_handlers_once():
+    InferraLogger("inferra.test.once", console=False)
+    logger = InferraLogger("inferra.test.once", console=False)
+    assert len(logger.logger.handlers) == 1
+
+def test_logger_rejects_conflicting_handler_options(tmp_path):
+    InferraLogger("inferra.test.conflict", console=False)
+
+    with pytest.raises(ValueError, match="other options"):
+        InferraLogger("inferra.test.conflict", log_file=str(tmp_path / "inferra.log"), console=False)
+    with pytest.raises(ValueError, match="other options"):
+        InferraLogger("inferra.test.conflict", console=False, format_string="%(message)s")
+    # Level and sampling are per instance
+    InferraLogger("inferra.test.conflict", level=logging.DEBUG, sample_rate=0.5, console=False)
+
+def test_logger_writes_from_listener_thread(tmp_path):
+    log_file = tmp_path / "inferra.log"
+    logger = InferraLogger("inferra.test.file", log_file=str(log_file), console=False)
+    logger.logger.propagate = False
+
+    logger.log_request("POST", "/chat/completions", headers={"X-Request-Id": "abc"})
+    logger.log_error(ValueError("boom"), {"path": "/chat/completions"})
+    logger.flush()
+
+    lines = log_file.read_text().splitlines()
+    assert 'API Request: {"method": "POST", "url": "/chat/completions", "params": null, "headers": {"X-Request-Id": "abc"}}' in lines[0]
+    assert '"error_type": "ValueError"' in lines[1]
+
+def test_logger_skips_disabled_levels(mocker, finished_metrics):
+    logger = InferraLogger("inferra.test.disabled", level=logging.ERROR, console=False)
+    log = mocker.spy(logger.logger, "_log")
+
+    logger.log_request("POST", "/chat/completions", params=Unprintable())
+    logger(finished_metrics())
+    assert log.call_count == 0
+
+def test_logger_response_length_does_not_read_body(mocker):
+    logger = InferraLogger("inferra.test.response", console=False)
+    response = mocker.Mock(status_code=200, headers={"Content-Length": "42"}, content_length=None)
+    type(response).content = mocker.PropertyMock(side_effect=AssertionError("body read"))
+
+    assert logger._format_response(response).fields["length"] == 42
+
+def test_logger_samples_successes_but_not_failures(mocker, finished_metrics):
+    logger = InferraLogger("inferra.test.sampled", sample_rate=0.0, console=False)
+    log = mocker.spy(logger.logger, "_log")
+
+    logger(finished_metrics())
+    logger.log_request("POST", "/chat/completions")
+    assert log.call_count == 0
+
+    logger(finished_metrics(status=429))
+    logger(finished_metrics(status=None, error="ClientConnectionError"))
+    assert [call.args[0] for call in log.call_args_list] == [logging.WARNING, logging.WARNING]
+
+def test_logger_rejects_invalid_sample_rate():
+    with pytest.raises(ValueError):
+        InferraLogger("inferra.test.invalid", sample_rate=2)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import Counter
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from inferra import InferraClientPool, InferraAuthenticationError
+from inferra.models.chat import Message
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+@pytest_asyncio.fixture
+async def accounts_server(stub_server):
+    state = {"calls": Counter(), "limited": set(), "rejected": set()}
+
+    async def completions(request):
+        key = request.headers["Authorization"].split()[-1]
+        state["calls"][key] += 1
+        if key in state["rejected"]:
+            return web.json_response({"error": {"message": "Invalid API key"}}, status=401)
+        if key in state["limited"]:
+            return web.json_response(
+                {"error": {"message": "Rate limit exceeded"}}, status=429, headers={"Retry-After": "30"}
+            )
+        await asyncio.sleep(0.005)
+        return web.json_response({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": MODEL,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": key}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        })
+
+    base_url = await stub_server([("POST", "/chat/completions", completions)])
+    return base_url, state
+
+async def throughput(pool: InferraClientPool, requests: int) -> float:
+    messages = [Message(role="user", content="Hello")]
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.chat.create(model=MODEL, messages=messages) for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+@pytest.mark.asyncio
+async def test_pool_throughput_scales_with_accounts(accounts_server):
+    base_url, state = accounts_server
+    # Each account is capped at 100 requests per second by its own limiter
+    limits = {"requests_per_minute": 6000, "burst_size": 1, "base_url": base_url}
+
+    async with InferraClientPool(["key-0"], **limits) as pool:
+        single = await throughput(pool, 40)
+    async with InferraClientPool([f"key-{i}" for i in range(4)], **limits) as pool:
+        pooled = await throughput(pool, 160)
+
+    assert pooled / single > 3.2
+    assert [state["calls"][f"key-{i}"] for i in range(1, 4)] == [40, 40, 40]
+
+@pytest.mark.asyncio
+async def test_pool_weighted_routing(accounts_server):
+    base_url, state = accounts_server
+    accounts = [{"api_key": "heavy", "weight": 3}, {"api_key": "light"}]
+
+    async with InferraClientPool(accounts, strategy="weighted", base_url=base_url) as pool:
+        for _ in range(40):
+            await pool.post("/chat/completions", json={})
+
+    assert state["calls"] == {"heavy": 30, "light": 10}
+
+@pytest.mark.asyncio
+async def test_pool_drains_rate_limited_accounts(accounts_server):
+    base_url, state = accounts_server
+    state["limited"].add("key-0")
+
+    async with InferraClientPool(["key-0", "key-1"], base_url=base_url) as pool:
+        # The first request is rejected by key-0 and sent again on key-1
+        responses = [await pool.post("/chat/completions", json={})]
+        responses += await asyncio.gather(*(pool.post("/chat/completions", json={}) for _ in range(10)))
+        stats = pool.stats()
+
+    assert {response["choices"][0]["message"]["content"] for response in responses} == {"key-1"}
+    assert state["calls"]["key-0"] == 1
+    assert stats[0]["drained_for"] > 25
+    assert not stats[0]["disabled"]
+
+@pytest.mark.asyncio
+async def test_pool_disables_rejected_keys(accounts_server):
+    base_url, state = accounts_server
+    state["rejected"].add("bad")
+
+    async with InferraClientPool(["bad", "good"], base_url=base_url) as pool:
+        for _ in range(4):
+            response = await pool.post("/chat/completions", json={})
+            assert response["choices"][0]["message"]["content"] == "good"
+        assert pool.stats()[0]["disabled"]
+        assert state["calls"]["bad"] == 1
+
+        state["rejected"].add("good")
+        with pytest.raises(InferraAuthenticationError):
+            await pool.post("/chat/completions", json={})
+        with pytest.raises(InferraAuthenticationError, match="Every API key"):
+            await pool.post("/chat/completions", json={})
+
+        state["rejected"].clear()
+        pool.restore()
+        await pool.post("/chat/completions", json={})
+
+def test_pool_validates_arguments():
+    with pytest.raises(ValueError):
+        InferraClientPool([])
+    with pytest.raises(ValueError):
+        InferraClientPool(["key"], strategy="random")
+    with pytest.raises(ValueError):
+        InferraClientPool([{"api_key": "key", "weight": 0}])
+
+def test_pool_budgets_tokens_over_every_account():
+    pool = InferraClientPool(["key-0", {"api_key": "key-1", "tokens_per_minute": 2000}], tokens_per_minute=1000)
+    assert pool.token_budget.bucket.rate == 3000 / 60
+    assert InferraClientPool(["key-0"]).token_budget is None
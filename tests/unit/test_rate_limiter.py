@@ -0,0 +1,208 @@
+import asyncio
+import time
+import pytest
+from inferra import InferraClient
+from inferra.utils.rate_limiter import RateLimiter, TokenBudget, AdaptiveConcurrencyLimiter
+from inferra.exceptions import InferraRateLimitError
+
+@pytest.mark.asyncio
+async def test_rate_limiter_queues_instead_of_raising():
+    limiter = RateLimiter(requests_per_minute=600, burst_size=2)  # 10/s
+
+    start = time.monotonic()
+    await asyncio.gather(*[limiter.acquire() for _ in range(5)])
+    elapsed = time.monotonic() - start
+
+    # Two tokens are free, the remaining three are spaced 100ms apart
+    assert 0.25 <= elapsed < 0.6
+
+@pytest.mark.asyncio
+async def test_rate_limiter_is_fifo():
+    limiter = RateLimiter(requests_per_minute=1200, burst_size=1)
+    order = []
+
+    async def worker(i):
+        await limiter.acquire()
+        order.append(i)
+
+    await asyncio.gather(*[worker(i) for i in range(6)])
+    assert order == list(range(6))
+
+@pytest.mark.asyncio
+async def test_rate_limiter_max_wait():
+    limiter = RateLimiter(requests_per_minute=60, burst_size=1, max_wait=0.5)
+    await limiter.acquire()
+
+    with pytest.raises(InferraRateLimitError) as exc_info:
+        await limiter.acquire()
+    assert exc_info.value.retry_after > 0.5
+
+@pytest.mark.asyncio
+async def test_rate_limiter_cancel_returns_tokens():
+    limiter = RateLimiter(requests_per_minute=60, burst_size=1)
+    await limiter.acquire()
+
+    task = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert limiter.available > -0.5
+
+@pytest.mark.asyncio
+async def test_rate_limiter_cancel_hands_tokens_to_queued_callers():
+    limiter = RateLimiter(requests_per_minute=600, burst_size=10)  # 10/s
+    await limiter.acquire(10)
+    order = []
+
+    async def worker(name, tokens):
+        await limiter.acquire(tokens)
+        order.append((name, time.monotonic()))
+
+    start = time.monotonic()
+    cancelled = asyncio.ensure_future(worker("cancelled", 5))
+    await asyncio.sleep(0)
+    queued = asyncio.ensure_future(worker("queued", 5))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    # A newcomer needing fewer tokens must still wait behind the queue
+    await asyncio.gather(queued, worker("newcomer", 1))
+    assert [name for name, _ in order] == ["queued", "newcomer"]
+    # The queued caller moved up into the cancelled caller's slot
+    assert order[0][1] - start < 0.8
+
+@pytest.mark.asyncio
+async def test_rate_limiter_release_advances_queue_by_tokens_added():
+    limiter = RateLimiter(requests_per_minute=600, burst_size=2)  # 10/s
+    await limiter.acquire(2)
+
+    queued = asyncio.ensure_future(limiter.acquire(1))
+    await asyncio.sleep(0)
+    waiter = limiter._waiters[0]
+    ready_at = waiter.ready_at
+
+    # Only three tokens fit under the burst size, so the queue moves up by
+    # 300ms rather than by the ten seconds the full refund is worth
+    limiter.release(100)
+    assert waiter.ready_at == pytest.approx(ready_at - 0.3, abs=0.05)
+    await queued
+
+def test_client_shares_one_limiter(test_api_key):
+    client = InferraClient(api_key=test_api_key, requests_per_minute=120)
+    assert client.rate_limiter.rate == 2.0
+
+    shared = RateLimiter(requests_per_minute=60)
+    other = InferraClient(api_key=test_api_key, rate_limiter=shared)
+    assert other.rate_limiter is shared
+
+@pytest.mark.asyncio
+async def test_token_budget_refunds_unused_tokens():
+    budget = TokenBudget(tokens_per_minute=1000)
+
+    reserved = await budget.reserve(400)
+    assert reserved == 400
+    assert budget.available == pytest.approx(600, abs=1)
+
+    budget.settle(reserved, actual_tokens=150)
+    assert budget.available == pytest.approx(850, abs=1)
+
+@pytest.mark.asyncio
+async def test_token_budget_charges_overspend():
+    budget = TokenBudget(tokens_per_minute=1000)
+
+    reserved = await budget.reserve(100)
+    budget.settle(reserved, actual_tokens=1500)
+
+    # The overspend puts the bucket into debt, delaying the next caller
+    assert budget.available < 0
+
+@pytest.mark.asyncio
+async def test_token_budget_cancel_and_unknown_usage():
+    budget = TokenBudget(tokens_per_minute=1000)
+
+    reserved = await budget.reserve(300)
+    budget.settle(reserved, actual_tokens=None)
+    assert budget.available == pytest.approx(700, abs=1)
+
+    reserved = await budget.reserve(200)
+    budget.cancel(reserved)
+    assert budget.available == pytest.approx(700, abs=1)
+
+def test_client_token_budget(test_api_key):
+    client = InferraClient(api_key=test_api_key)
+    assert client.token_budget is None
+
+    client = InferraClient(api_key=test_api_key, tokens_per_minute=100000)
+    assert client.token_budget.bucket.burst_size == 100000
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_caps_inflight():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        await limiter.acquire()
+        peak = max(peak, limiter.inflight)
+        await asyncio.sleep(0.01)
+        limiter.release(200, 0.01)
+
+    await asyncio.gather(*[worker() for _ in range(10)])
+    assert peak == 2
+    assert limiter.state["inflight"] == 0
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_additive_increase():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=100)
+
+    for _ in range(40):
+        await limiter.acquire()
+        limiter.release(200, 0.01)
+
+    assert limiter.state["limit"] > 4
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_backs_off_on_errors():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=32)
+
+    await limiter.acquire()
+    limiter.release(503, 0.01)
+    assert limiter.state["limit"] == 16
+
+    # A burst of failures from the same round trip only counts once
+    await limiter.acquire()
+    limiter.release(503, 0.01)
+    assert limiter.state["limit"] == 16
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_retry_after_pauses_everyone():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+    await limiter.acquire()
+    limiter.release(429, 0.01, retry_after=0.2)
+    assert limiter.state["limit"] == 4
+    assert limiter.state["paused_for"] > 0.1
+
+    start = time.monotonic()
+    await asyncio.gather(*[limiter.acquire() for _ in range(3)])
+    assert time.monotonic() - start >= 0.15
+    assert limiter.inflight == 3
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_backs_off_on_latency():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=20)
+
+    for _ in range(40):
+        await limiter.acquire()
+        limiter.release(200, 0.01)
+    limiter._last_decrease = 0.0
+
+    for _ in range(40):
+        await limiter.acquire()
+        limiter.release(200, 0.5)
+
+    assert limiter.state["limit"] < 20
+    assert limiter.state["p95_latency"] > limiter.state["baseline_latency"]
@@ -0,0 +1,121 @@
+import pytest
+from inferra.utils.retry import (
+    RetryPolicy,
+    RetryBudget,
+    RetryMetrics,
+    request_deadline,
+    retry_with_exponential_backoff,
+)
+from inferra.exceptions import (
+    InferraAPIError,
+    InferraAuthenticationError,
+    InferraConnectionError,
+    InferraRateLimitError,
+)
+
+def make_policy(**kwargs):
+    kwargs.setdefault("initial_delay", 0.001)
+    kwargs.setdefault("max_delay", 0.01)
+    kwargs.setdefault("budget", RetryBudget())
+    kwargs.setdefault("metrics", RetryMetrics())
+    return RetryPolicy(**kwargs)
+
+def failing(errors, result="ok"):
+    calls = []
+
+    async def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return func, calls
+
+@pytest.mark.asyncio
+async def test_retries_server_errors():
+    policy = make_policy()
+    func, calls = failing([InferraAPIError("unavailable", status_code=503)] * 2)
+
+    assert await policy(func)() == "ok"
+    assert len(calls) == 3
+    metrics = policy.metrics.snapshot()
+    assert metrics["retries"] == 2
+    assert metrics["retries_by_status"] == {503: 2}
+    assert metrics["successes_after_retry"] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [
+    InferraAPIError("bad request", status_code=400),
+    InferraAuthenticationError("Invalid API key"),
+    InferraAPIError("Model 'x' is not supported"),
+])
+async def test_does_not_retry_client_errors(error):
+    policy = make_policy()
+    func, calls = failing([error])
+
+    with pytest.raises(InferraAPIError):
+        await policy(func)()
+    assert len(calls) == 1
+    assert policy.metrics.snapshot()["not_retryable"] == 1
+
+@pytest.mark.asyncio
+async def test_non_idempotent_calls_only_retry_rejected_requests():
+    policy = make_policy(idempotent=False)
+
+    func, calls = failing([InferraAPIError("bad gateway", status_code=502)])
+    with pytest.raises(InferraAPIError):
+        await policy(func)()
+    assert len(calls) == 1
+
+    func, calls = failing([
+        InferraRateLimitError("Rate limit exceeded", retry_after=0.001),
+        InferraConnectionError("Request failed: connect", request_sent=False),
+    ])
+    assert await policy(func)() == "ok"
+    assert len(calls) == 3
+
+@pytest.mark.parametrize("jitter", ["full", "decorrelated"])
+def test_jittered_delays_stay_in_bounds(jitter):
+    policy = make_policy(initial_delay=1, max_delay=8, jitter=jitter)
+    error = InferraAPIError("unavailable", status_code=503)
+
+    delays = []
+    delay = 0.0
+    for attempt in range(20):
+        delay = policy.next_delay(attempt, delay, error)
+        delays.append(delay)
+
+    assert all(0 <= d <= 8 for d in delays)
+    assert len(set(delays)) > 1
+
+@pytest.mark.asyncio
+async def test_retry_budget_caps_retries():
+    policy = make_policy(budget=RetryBudget(retry_ratio=0, min_retries_per_second=0, max_tokens=1))
+    func, calls = failing([InferraAPIError("unavailable", status_code=503)] * 3)
+
+    with pytest.raises(InferraAPIError):
+        await policy(func)()
+    assert len(calls) == 2
+    assert policy.metrics.snapshot()["budget_exhausted"] == 1
+
+@pytest.mark.asyncio
+async def test_deadline_stops_retries():
+    policy = make_policy(deadline=0.5)
+    func, calls = failing([InferraRateLimitError("Rate limit exceeded", retry_after=5)])
+
+    with pytest.raises(InferraRateLimitError):
+        await policy(func)()
+    assert len(calls) == 1
+    assert policy.metrics.snapshot()["deadline_exceeded"] == 1
+
+@pytest.mark.asyncio
+async def test_deadline_is_visible_to_requests():
+    seen = []
+
+    @retry_with_exponential_backoff(policy=make_policy(deadline=10))
+    async def func():
+        seen.append(request_deadline.get())
+
+    await func()
+    assert seen[0] is not None
+    assert request_deadline.get() is None
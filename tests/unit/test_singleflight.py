@@ -0,0 +1,231 @@
+import asyncio
+import json
+import pytest
+from inferra import InferraClient
+from inferra.models.chat import Message
+from inferra.utils import codec
+from inferra.utils.prompts import MessagePrefix
+from inferra.utils.singleflight import SingleFlight
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_request():
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    results = await asyncio.gather(*(single_flight.do("key", fetch) for _ in range(5)))
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.stats.snapshot()["deduplicated"] == 4
+
+    # Once finished, the next call goes out again
+    await single_flight.do("key", fetch)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_request():
+    single_flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(single_flight.do("key", fetch))
+    await started.wait()
+    second = asyncio.ensure_future(single_flight.do("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_errors_are_shared():
+    single_flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", fetch) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+@pytest.mark.asyncio
+async def test_stream_is_teed_to_every_consumer():
+    single_flight = SingleFlight(stream_buffer_size=2)
+    opened = 0
+
+    async def events():
+        for i in range(10):
+            yield i
+
+    async def open_stream():
+        nonlocal opened
+        opened += 1
+        await asyncio.sleep(0.01)
+        return events()
+
+    streams = await asyncio.gather(*(single_flight.stream("key", open_stream) for _ in range(3)))
+
+    async def consume(stream):
+        return [event async for event in stream]
+
+    results = await asyncio.gather(*(consume(stream) for stream in streams))
+
+    assert opened == 1
+    assert results == [list(range(10))] * 3
+    assert single_flight.stats.snapshot()["stream_deduplicated"] == 2
+
+@pytest.mark.asyncio
+async def test_stalled_stream_consumer_is_detached():
+    single_flight = SingleFlight(stream_buffer_size=1, stall_timeout=0.01)
+
+    async def events():
+        for i in range(5):
+            yield i
+
+    async def open_stream():
+        await asyncio.sleep(0.01)
+        return events()
+
+    fast, slow = await asyncio.gather(
+        single_flight.stream("key", open_stream),
+        single_flight.stream("key", open_stream)
+    )
+
+    assert [event async for event in fast] == list(range(5))
+    with pytest.raises(Exception, match="detached"):
+        async for _ in slow:
+            pass
+    assert single_flight.stats.snapshot()["slow_consumers"] == 1
+
+@pytest.mark.asyncio
+async def test_departed_stream_consumer_does_not_stall_the_others():
+    single_flight = SingleFlight(stream_buffer_size=2, stall_timeout=3)
+
+    async def events():
+        for i in range(10):
+            yield i
+
+    async def open_stream():
+        await asyncio.sleep(0.01)
+        return events()
+
+    async def leave_early(stream):
+        async for _ in stream:
+            # Let the buffer fill up before walking away
+            await asyncio.sleep(0.05)
+            break
+        await stream.aclose()
+
+    async def consume(stream):
+        return [event async for event in stream]
+
+    leaver, reader = await asyncio.gather(
+        single_flight.stream("key", open_stream),
+        single_flight.stream("key", open_stream)
+    )
+    start = asyncio.get_running_loop().time()
+    _, received = await asyncio.gather(leave_early(leaver), consume(reader))
+
+    assert received == list(range(10))
+    assert asyncio.get_running_loop().time() - start < 1
+    assert single_flight.stats.snapshot()["slow_consumers"] == 0
+
+def mock_slow_completion(mocker, sample_responses):
+    mock_response = mocker.Mock()
+    mock_response.status = 200
+    mock_response.read = mocker.AsyncMock(
+        return_value=json.dumps(sample_responses["chat_completion"]).encode()
+    )
+
+    async def slow_request(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return mock_response
+
+    return mocker.patch("aiohttp.ClientSession.request", side_effect=slow_request)
+
+@pytest.mark.asyncio
+async def test_client_coalesces_identical_requests(test_api_key, mocker, sample_responses):
+    client = InferraClient(api_key=test_api_key, coalesce_requests=True)
+    request = mock_slow_completion(mocker, sample_responses)
+    messages = [Message(role="user", content="Popular question")]
+
+    results = await asyncio.gather(
+        *(client.chat.create(model=MODEL, messages=messages, temperature=0) for _ in range(4))
+    )
+
+    assert request.call_count == 1
+    assert len({result.id for result in results}) == 1
+    assert client.single_flight.stats.snapshot()["deduplicated"] == 3
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_client_does_not_coalesce_sampled_requests(test_api_key, mocker, sample_responses):
+    client = InferraClient(api_key=test_api_key, coalesce_requests=True)
+    request = mock_slow_completion(mocker, sample_responses)
+    messages = [Message(role="user", content="Write a poem")]
+
+    await asyncio.gather(
+        *(client.chat.create(model=MODEL, messages=messages, temperature=0.8) for _ in range(4))
+    )
+
+    assert request.call_count == 4
+    assert client.single_flight.stats.snapshot()["deduplicated"] == 0
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_client_coalesces_prefixed_requests_without_decoding_them(test_api_key, mocker, sample_responses):
+    client = InferraClient(api_key=test_api_key, coalesce_requests=True)
+    request = mock_slow_completion(mocker, sample_responses)
+    loads = mocker.spy(codec, "loads")
+    prefix = MessagePrefix([Message(role="system", content="Be brief.")])
+    messages = [Message(role="user", content="Popular question")]
+
+    for temperature, sent in ((0, 1), (0.8, 4)):
+        request.reset_mock()
+        await asyncio.gather(*(
+            client.chat.create(model=MODEL, messages=messages, prefix=prefix, temperature=temperature)
+            for _ in range(4)
+        ))
+        assert request.call_count == sent
+
+    # Only the responses were decoded, never the spliced request bodies
+    response_body = json.dumps(sample_responses["chat_completion"]).encode()
+    assert all(call.args[0] == response_body for call in loads.call_args_list)
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_coalesced_requests_reserve_tokens_once(test_api_key, mocker, sample_responses):
+    client = InferraClient(api_key=test_api_key, coalesce_requests=True, tokens_per_minute=10000)
+    counter = mocker.patch("inferra.utils.token_counter.TokenCounter").return_value
+    counter.count_message_tokens.return_value = {"prompt_tokens": 25}
+    reserve = mocker.spy(client.token_budget, "reserve")
+    settle = mocker.spy(client.token_budget, "settle")
+    request = mock_slow_completion(mocker, sample_responses)
+    messages = [Message(role="user", content="Popular question")]
+
+    await asyncio.gather(
+        *(client.chat.create(model=MODEL, messages=messages, max_tokens=100) for _ in range(4))
+    )
+
+    assert request.call_count == 1
+    assert reserve.call_count == 1
+    # The shared call is settled once against the usage it reported
+    settle.assert_called_once_with(125, 57)
+    await client.close()
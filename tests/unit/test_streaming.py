@@ -0,0 +1,94 @@
+import gc
+import pytest
+from inferra.utils.streaming import SSEDecoder, iter_sse_events
+from inferra.exceptions import InferraAPIError
+
+class FakeContent:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+class FakeResponse:
+    def __init__(self, chunks):
+        self.content = FakeContent(chunks)
+        self.released = False
+        self.closed = False
+
+    def release(self):
+        self.released = True
+
+    def close(self):
+        self.closed = True
+
+def test_sse_decoder_handles_split_events():
+    decoder = SSEDecoder()
+
+    assert decoder.feed(b'data: {"a"') == []
+    assert decoder.feed(b': 1}\n') == []
+    assert decoder.feed(b'\ndata: {"b": 2}\n\n: keep-alive\n\ndata: [DO') == [
+        b'{"a": 1}',
+        b'{"b": 2}',
+    ]
+    assert decoder.feed(b'NE]\n\n') == [b"[DONE]"]
+
+def test_sse_decoder_crlf_and_multiline_data():
+    decoder = SSEDecoder()
+
+    events = decoder.feed(b'event: message\r\ndata: {"a":\r\ndata: 1}\r\n\r\n')
+    assert events == [b'{"a":\n1}']
+
+def test_sse_decoder_flushes_unterminated_event():
+    decoder = SSEDecoder()
+
+    assert decoder.feed(b'data: {"a": 1}') == []
+    assert decoder.flush() == [b'{"a": 1}']
+    assert decoder.flush() == []
+
+@pytest.mark.asyncio
+async def test_iter_sse_events_stops_at_done():
+    response = FakeResponse([
+        b'data: {"id": "1"}\n\ndata: {"id": "2"}\n\n',
+        b'data: [DONE]\n\n',
+        b'data: {"id": "ignored"}\n\n',
+    ])
+
+    events = [event async for event in iter_sse_events(response)]
+
+    assert [event["id"] for event in events] == ["1", "2"]
+    assert response.released and not response.closed
+
+@pytest.mark.asyncio
+async def test_iter_sse_events_closes_on_early_exit():
+    response = FakeResponse([b'data: {"id": "1"}\n\ndata: {"id": "2"}\n\n'])
+
+    events = iter_sse_events(response)
+    async for event in events:
+        break
+    await events.aclose()
+
+    assert response.closed and not response.released
+
+@pytest.mark.asyncio
+async def test_iter_sse_events_raises_stream_errors():
+    response = FakeResponse([b'data: {"error": {"message": "overloaded"}}\n\n'])
+
+    with pytest.raises(InferraAPIError, match="overloaded"):
+        async for _ in iter_sse_events(response):
+            pass
+    assert response.closed
+
+@pytest.mark.asyncio
+async def test_iter_sse_events_closes_unconsumed_streams():
+    response = FakeResponse([b'data: {"id": "1"}\n\n'])
+    async with iter_sse_events(response):
+        pass
+    assert response.closed and not response.released
+
+    response = FakeResponse([b'data: {"id": "1"}\n\n'])
+    events = iter_sse_events(response)
+    del events
+    gc.collect()
+    assert response.closed
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from inferra.sync_client import SyncInferraClient
+from inferra.models.chat import Message, ChatCompletion
+
+MODEL = "meta-llama/llama-3.1-8b-instruct/fp-8"
+
+@pytest.fixture
+def sync_client(test_api_key):
+    client = SyncInferraClient(api_key=test_api_key)
+    yield client
+    client.close()
+
+def test_blocking_create(sync_client, mocker, sample_responses, mock_json_response):
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_json_response(sample_responses["chat_completion"])
+    )
+
+    response = sync_client.chat.create(
+        model=MODEL,
+        messages=[Message(role="user", content="What is the meaning of life?")]
+    )
+
+    assert isinstance(response, ChatCompletion)
+    assert response.choices[0].message.content.startswith("The meaning of life")
+
+def test_streaming_returns_iterator(sync_client, mocker, sample_responses, mock_stream_response):
+    mock_response = mock_stream_response([sample_responses["streaming_chunk"]] * 3)
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_response
+    )
+
+    chunks = list(sync_client.chat.create(
+        model=MODEL,
+        messages=[Message(role="user", content="Hi")],
+        stream=True
+    ))
+
+    assert [chunk.choices[0].delta.content for chunk in chunks] == ["The meaning"] * 3
+    mock_response.release.assert_called_once()
+
+def test_concurrent_calls_share_one_session(sync_client, mocker, sample_responses, mock_json_response):
+    mocker.patch(
+        "aiohttp.ClientSession.request",
+        new_callable=mocker.AsyncMock,
+        return_value=mock_json_response(sample_responses["chat_completion"])
+    )
+
+    def call(i):
+        sync_client.chat.create(model=MODEL, messages=[Message(role="user", content=f"Question {i}")])
+        return sync_client.client._session
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sessions = list(executor.map(call, range(32)))
+
+    assert len({id(session) for session in sessions}) == 1
+
+def test_closed_client_rejects_calls(test_api_key):
+    client = SyncInferraClient(api_key=test_api_key)
+    client.close()
+
+    with pytest.raises(RuntimeError):
+        client.run(client.client.close())
+
+def test_failed_construction_stops_the_loop_thread(monkeypatch):
+    monkeypatch.delenv("INFERRA_API_KEY", raising=False)
+    before = set(threading.enumerate())
+
+    with pytest.raises(ValueError):
+        SyncInferraClient()
+
+    assert set(threading.enumerate()) == before
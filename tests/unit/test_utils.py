@@ -1,6 +1,8 @@
 import pytest
-from inferra.utils.token_counter import TokenCounter
-from inferra.utils.validators import validate_model, validate_messages
+import tiktoken
+from inferra.utils import token_counter
+from inferra.utils.token_counter import TokenCounter, TokenCountMemo
+from inferra.utils.validators import MessageValidator, validate_model, validate_messages
 from inferra.exceptions import InferraAPIError
 from inferra.models.chat import Message
 
@@ -15,6 +17,58 @@ def test_token_counter():
     assert token_count["prompt_tokens"] > 0
     assert "total_tokens" in token_count
 
+@pytest.fixture
+def byte_encoding(mocker):
+    # One token per byte, so counts are predictable without downloading an encoding
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+    mocker.patch.object(token_counter, "get_encoding", return_value=encoding)
+    return encoding
+
+def test_token_counter_count_many(byte_encoding):
+    counter = TokenCounter("meta-llama/llama-3.1-8b-instruct/fp-8", memo=TokenCountMemo())
+    system = Message(role="system", content="s" * 100)
+    conversations = [
+        [system, Message(role="user", content="Hello!")],
+        [system, Message(role="user", content="Hi", name="bob")],
+    ]
+
+    counts = counter.count_many(conversations + ["plain prompt"])
+
+    # 3 priming tokens, 4 per message, 2 per name, one token per byte
+    assert counts[0] == 3 + 2 * 4 + len("system") + 100 + len("user") + len("Hello!")
+    assert counts[1] == 3 + 2 * 4 + 2 + len("system") + 100 + len("user") + len("Hi") + len("bob")
+    assert counts[2] == len("plain prompt")
+    assert counter.count_message_tokens(conversations[0])["prompt_tokens"] == counts[0]
+    assert counter.count_string_tokens("<|endoftext|>") == len("<|endoftext|>")
+
+def test_token_counter_memoizes_repeated_texts(byte_encoding, mocker):
+    memo = TokenCountMemo(max_entries=3)
+    counter = TokenCounter("meta-llama/llama-3.1-8b-instruct/fp-8", memo=memo)
+    encode = mocker.spy(byte_encoding, "encode_ordinary")
+
+    prompt = "x" * 1000
+    assert counter.count_many([prompt, prompt]) == [1000, 1000]
+    assert counter.count_string_tokens(prompt) == 1000
+    assert encode.call_count == 1
+    assert memo.hits == 1
+
+    # Least recently used counts are evicted
+    counter.count_many(["a", "b", "c"])
+    assert len(memo) == 3
+    assert counter.count_string_tokens(prompt) == 1000
+    assert encode.call_count == 5
+
+def test_token_counter_count_many_threads(byte_encoding):
+    counter = TokenCounter("model", memo=TokenCountMemo(max_entries=0))
+    prompts = [f"prompt {i}" for i in range(1000)]
+
+    assert counter.count_many(prompts, num_threads=4) == [len(p) for p in prompts]
+
 def test_model_validation():
     # Valid model
     validate_model("meta-llama/llama-3.1-8b-instruct/fp-8")
@@ -35,3 +89,29 @@ def test_message_validation():
     # Empty content
     with pytest.raises(InferraAPIError):
         validate_messages([Message(role="user", content="")])
+    
+    # Whitespace-only content
+    with pytest.raises(InferraAPIError, match="cannot be empty"):
+        validate_messages([Message(role="user", content=" \n\t ")])
+
+def test_message_validator_validates_tuples_once(mocker):
+    validator = MessageValidator(validate_once=True, max_memo=1)
+    check = mocker.spy(validator, "_check")
+    prefix = (Message(role="system", content="Be brief."), Message(role="user", content="Hi"))
+
+    validator.validate_messages(prefix)
+    validator.validate_messages(prefix)
+    assert check.call_count == 1
+
+    # Lists may change between calls, so they are always checked
+    validator.validate_messages(list(prefix))
+    validator.validate_messages(list(prefix))
+    assert check.call_count == 3
+
+    # The oldest tuple is forgotten once the memo is full
+    validator.validate_messages(prefix[:1])
+    validator.validate_messages(prefix)
+    assert check.call_count == 5
+
+    with pytest.raises(InferraAPIError, match="Must be one of: assistant, system, user"):
+        validator.validate_messages((Message(role="tool", content="x"),))
@@ -1,15 +1,67 @@
+from typing import TYPE_CHECKING
+from .._lazy import lazy_module
 
-from .retry import retry_with_exponential_backoff
-from .rate_limiter import RateLimiter
-from .token_counter import TokenCounter
-from .validators import validate_model, validate_messages
-from .streaming import StreamProcessor
+if TYPE_CHECKING:
+    from .retry import retry_with_exponential_backoff, RetryPolicy, RetryBudget, retry_metrics
+    from .rate_limiter import RateLimiter
+    from .token_counter import TokenCounter
+    from .validators import validate_model, validate_messages
+    from .streaming import SSEDecoder, SSEStream, iter_sse_events
+    from .concurrency import bounded_map
+    from .cache import ResponseCache, MemoryCache, SQLiteCache
+    from .singleflight import SingleFlight
+    from .batch_results import BatchResultReader
+    from .prompts import MessagePrefix
+    from .instrumentation import RequestMetrics, MetricsRegistry, OpenTelemetryHook
+
+# Imported on first access: importing one utility (e.g. retry from the
+# client) must not load the models and tiktoken through the others
+_LAZY_ATTRIBUTES = {
+    "retry_with_exponential_backoff": ".retry",
+    "RetryPolicy": ".retry",
+    "RetryBudget": ".retry",
+    "retry_metrics": ".retry",
+    "RateLimiter": ".rate_limiter",
+    "TokenCounter": ".token_counter",
+    "validate_model": ".validators",
+    "validate_messages": ".validators",
+    "SSEDecoder": ".streaming",
+    "SSEStream": ".streaming",
+    "iter_sse_events": ".streaming",
+    "bounded_map": ".concurrency",
+    "ResponseCache": ".cache",
+    "MemoryCache": ".cache",
+    "SQLiteCache": ".cache",
+    "SingleFlight": ".singleflight",
+    "BatchResultReader": ".batch_results",
+    "MessagePrefix": ".prompts",
+    "RequestMetrics": ".instrumentation",
+    "MetricsRegistry": ".instrumentation",
+    "OpenTelemetryHook": ".instrumentation",
+}
 
 __all__ = [
     "retry_with_exponential_backoff",
+    "RetryPolicy",
+    "RetryBudget",
+    "retry_metrics",
     "RateLimiter",
     "TokenCounter",
     "validate_model",
     "validate_messages",
-    "StreamProcessor"
+    "SSEDecoder",
+    "SSEStream",
+    "iter_sse_events",
+    "bounded_map",
+    "ResponseCache",
+    "MemoryCache",
+    "SQLiteCache",
+    "SingleFlight",
+    "BatchResultReader",
+    "MessagePrefix",
+    "RequestMetrics",
+    "MetricsRegistry",
+    "OpenTelemetryHook"
 ]
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_ATTRIBUTES)
@@ -0,0 +1,173 @@
+import mmap
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from . import codec
+from ..models.batch import BatchResult
+
+# Finds custom_id without decoding the whole line. IDs containing escape
+# sequences don't match and fall back to a full decode.
+_CUSTOM_ID = re.compile(rb'"custom_id"\s*:\s*"([^"\\]*)"')
+
+class BatchResultReader:
+    """
+    Lazy reader over a downloaded batch output (or error) JSONL file.
+
+    The file is memory-mapped rather than read, so opening it costs nothing
+    regardless of its size, and lines are only decoded when they are
+    iterated or looked up. An index from ``custom_id`` to line offset is
+    built on first random access, giving O(1) lookups afterwards.
+
+    Example:
+        with BatchResultReader("output.jsonl") as results:
+            for result in results:
+                ...
+            result = results["request-42"]
+    """
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: Path of the JSONL file
+        """
+        self.path = Path(path)
+        self._file = None
+        self._buffer: Optional[Union[mmap.mmap, bytes]] = None
+        self._index: Optional[Dict[str, int]] = None
+
+    def __enter__(self) -> "BatchResultReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Unmap and close the file."""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+        self._buffer = None
+        self._file = None
+
+    @property
+    def buffer(self) -> Union[mmap.mmap, bytes]:
+        """The mapped file contents."""
+        if self._buffer is None:
+            self._file = open(self.path, "rb")
+            try:
+                self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                self._buffer = b""
+        return self._buffer
+
+    def iter_lines(self) -> Iterator[Tuple[int, bytes]]:
+        """
+        Iterate over the non-empty lines of the file.
+
+        Yields:
+            (offset, line) tuples, where line is the undecoded JSON
+        """
+        buffer = self.buffer
+        size = len(buffer)
+        position = 0
+        while position < size:
+            end = buffer.find(b"\n", position)
+            if end == -1:
+                end = size
+            line = buffer[position:end]
+            if line.strip():
+                yield position, line
+            position = end + 1
+
+    def iter_raw(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the results as decoded dictionaries."""
+        for _, line in self.iter_lines():
+            yield codec.loads(line)
+
+    def __iter__(self) -> Iterator[BatchResult]:
+        for data in self.iter_raw():
+            yield BatchResult(**data)
+
+    def build_index(self) -> Dict[str, int]:
+        """
+        Build (or return) the index from custom_id to line offset.
+
+        Returns:
+            Dictionary mapping each custom_id to the offset of its line
+        """
+        if self._index is None:
+            index = {}
+            for offset, line in self.iter_lines():
+                match = _CUSTOM_ID.search(line)
+                if match is not None:
+                    custom_id = match.group(1).decode("utf-8")
+                else:
+                    custom_id = codec.loads(line).get("custom_id")
+                if custom_id is not None:
+                    index[custom_id] = offset
+            self._index = index
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.build_index())
+
+    def __contains__(self, custom_id: str) -> bool:
+        return custom_id in self.build_index()
+
+    def get_raw(self, custom_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the decoded result of one request.
+
+        Args:
+            custom_id: custom_id of the input request
+
+        Returns:
+            The result as a dictionary, or None if there is none
+        """
+        offset = self.build_index().get(custom_id)
+        if offset is None:
+            return None
+        buffer = self.buffer
+        end = buffer.find(b"\n", offset)
+        return codec.loads(buffer[offset:end if end != -1 else len(buffer)])
+
+    def get(self, custom_id: str) -> Optional[BatchResult]:
+        """
+        Look up the result of one request.
+
+        Args:
+            custom_id: custom_id of the input request
+
+        Returns:
+            The BatchResult, or None if there is none
+        """
+        data = self.get_raw(custom_id)
+        return BatchResult(**data) if data is not None else None
+
+    def __getitem__(self, custom_id: str) -> BatchResult:
+        result = self.get(custom_id)
+        if result is None:
+            raise KeyError(custom_id)
+        return result
+
+    def join(
+        self,
+        inputs: Union[str, Path, Iterable[Dict[str, Any]]]
+    ) -> Iterator[Tuple[Dict[str, Any], Optional[BatchResult]]]:
+        """
+        Pair input records with their results, in input order.
+
+        Args:
+            inputs: The batch input records, or the path of the input JSONL
+
+        Yields:
+            (input record, BatchResult or None) tuples
+        """
+        if isinstance(inputs, (str, Path)):
+            with BatchResultReader(inputs) as reader:
+                yield from self.join(reader.iter_raw())
+            return
+
+        for record in inputs:
+            yield record, self.get(record["custom_id"])
@@ -0,0 +1,425 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, Union
+from . import codec
+
+class CacheStats:
+    """Counters describing cache effectiveness."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def increment(self, counter: str, amount: int = 1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def snapshot(self) -> dict:
+        """Get a copy of the current counters."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+class ResponseCache(ABC):
+    """
+    Base class for response cache backends.
+
+    Values are encoded response bodies. Subclasses implement ``_get`` and
+    ``_set``, and ``close`` if they hold resources; key derivation and
+    statistics are shared.
+    """
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Args:
+            ttl: Seconds an entry stays valid (None keeps entries until evicted)
+        """
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    @staticmethod
+    def key(endpoint: str, payload: Dict[str, Any]) -> str:
+        """
+        Derive the cache key of a request.
+
+        The key is a hash of the canonical (sorted-key) JSON of the payload.
+        The ``stream`` flag is left out so a streamed request can be served
+        from the full response of a non-streamed one, and vice versa.
+
+        Args:
+            endpoint: API endpoint the payload is sent to
+            payload: Request payload as built by the API wrapper
+
+        Returns:
+            Hex digest identifying the request
+        """
+        canonical = {k: v for k, v in payload.items() if k != "stream"}
+        return codec.canonical_hash(endpoint, canonical)
+
+    async def get(self, key: str) -> Optional[dict]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from ResponseCache.key()
+
+        Returns:
+            The decoded response, or None on a miss
+        """
+        value = await self._get(key)
+        if value is None:
+            self.stats.increment("misses")
+            return None
+        self.stats.increment("hits")
+        return codec.loads(value)
+
+    async def set(self, key: str, response: dict):
+        """
+        Store a response.
+
+        Args:
+            key: Key from ResponseCache.key()
+            response: Decoded response body
+        """
+        await self._set(key, codec.dumps(response))
+        self.stats.increment("stores")
+
+    async def close(self):
+        """Release the resources held by the backend."""
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[bytes]:
+        """Get the encoded response stored under a key, or None."""
+
+    @abstractmethod
+    async def _set(self, key: str, value: bytes):
+        """Store an encoded response under a key."""
+
+class ResponseCacheMixin:
+    """
+    Response cache lookups shared by the chat and completions APIs.
+
+    Subclasses name the endpoint their requests go to and the response
+    classes a decoded body is built into, and have a ``client`` attribute.
+    """
+    _cache_endpoint: str
+    _response_model: Type
+    _trusted_response_model: Type
+
+    def _cache_key(
+        self,
+        payload: Dict[str, Any],
+        temperature: Optional[float],
+        cache: Optional[bool]
+    ) -> Optional[str]:
+        """
+        Get the response cache key of a request.
+
+        Args:
+            payload: Request payload
+            temperature: Sampling temperature of the request
+            cache: Per-call cache override (None caches temperature=0 requests)
+
+        Returns:
+            The cache key, or None if the response should not be cached
+        """
+        response_cache = self.client.response_cache
+        if response_cache is None or cache is False:
+            return None
+        if cache is None and temperature != 0:
+            return None
+        return response_cache.key(self._cache_endpoint, payload)
+
+    def _decode_completion(self, response: Dict[str, Any]) -> Any:
+        """Build the response object from a decoded response body."""
+        if self.client.config.trusted_decode:
+            return self._trusted_response_model.from_dict(response)
+        return self._response_model(**response)
+
+class MemoryCache(ResponseCache):
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 3600
+    ):
+        """
+        In-process LRU cache bounded by entry count and total size.
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of the encoded responses
+            ttl: Seconds an entry stays valid
+        """
+        super().__init__(ttl=ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            self._remove(key)
+            self.stats.increment("expirations")
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._entries[key] = (value, expires_at)
+        self.size += len(value)
+
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.increment("evictions")
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.size -= len(value)
+
+class SQLiteCache(ResponseCache):
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: Optional[float] = 86400,
+        max_entries: Optional[int] = None
+    ):
+        """
+        On-disk cache shared between worker processes through a SQLite file.
+
+        The database runs in WAL mode so readers in other processes are not
+        blocked by writers. Queries run in a worker thread to keep the event
+        loop responsive.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of entries kept (oldest are evicted)
+        """
+        super().__init__(ttl=ttl)
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        # Every thread's connection, so close() can reach them all
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at)")
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Each connection is still used by its own thread only; the check
+            # is disabled so close() can run from the event loop thread
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    async def close(self):
+        """
+        Close the database connection of every thread.
+
+        The cache reconnects if it is used again afterwards.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    def _get_sync(self, key: str) -> Optional[bytes]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at and expires_at < time.time():
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            connection.commit()
+            self.stats.increment("expirations")
+            return None
+        return value
+
+    def _set_sync(self, key: str, value: bytes):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else 0.0
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now)
+        )
+        if self.max_entries:
+            evicted = connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            if evicted > 0:
+                self.stats.increment("evictions", evicted)
+        connection.commit()
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        return await self._run(self._get_sync, key)
+
+    async def _set(self, key: str, value: bytes):
+        await self._run(self._set_sync, key, value)
+
+async def replay_stream(response: dict, object_type: str) -> AsyncIterator[dict]:
+    """
+    Replay a cached full response as a stream of chunk events.
+
+    Each choice becomes one chunk carrying its whole content, followed by
+    a final chunk with the usage, mirroring what the API streams.
+
+    Args:
+        response: Cached (non-streamed) response body
+        object_type: Object type of the chunks (e.g. "chat.completion.chunk")
+
+    Yields:
+        Chunk events in the same shape as the API's streamed events
+    """
+    base = {
+        "id": response.get("id"),
+        "object": object_type,
+        "created": response.get("created"),
+        "model": response.get("model"),
+    }
+    for choice in response.get("choices", ()):
+        chunk_choice = {
+            "index": choice.get("index", 0),
+            "finish_reason": choice.get("finish_reason"),
+        }
+        if "message" in choice:
+            chunk_choice["delta"] = choice["message"]
+        if "text" in choice:
+            chunk_choice["text"] = choice["text"]
+        yield {**base, "choices": [chunk_choice]}
+
+    if response.get("usage") is not None:
+        yield {**base, "choices": [], "usage": response["usage"]}
+
+class StreamRecorder:
+    """
+    Reassemble streamed chunk events into a full response body.
+
+    Used to populate the cache from a streamed request so later calls,
+    streamed or not, can be served from it.
+    """
+    def __init__(self, object_type: str):
+        self.object_type = object_type
+        self.response: Dict[str, Any] = {}
+        self.choices: Dict[int, Dict[str, Any]] = {}
+
+    def add(self, event: dict):
+        """Fold one chunk event into the response."""
+        for field in ("id", "created", "model"):
+            if field in event and field not in self.response:
+                self.response[field] = event[field]
+        if event.get("usage") is not None:
+            self.response["usage"] = event["usage"]
+
+        for chunk_choice in event.get("choices", ()):
+            index = chunk_choice.get("index", 0)
+            choice = self.choices.setdefault(index, {"index": index, "finish_reason": None})
+
+            delta = chunk_choice.get("delta")
+            if delta:
+                message = choice.setdefault("message", {"role": "assistant", "content": ""})
+                if delta.get("role"):
+                    message["role"] = delta["role"]
+                if delta.get("content"):
+                    message["content"] += delta["content"]
+            if chunk_choice.get("text"):
+                choice["text"] = choice.get("text", "") + chunk_choice["text"]
+            if chunk_choice.get("finish_reason"):
+                choice["finish_reason"] = chunk_choice["finish_reason"]
+
+    def result(self) -> dict:
+        """Get the reassembled response body."""
+        return {
+            **self.response,
+            "object": self.object_type,
+            "choices": [self.choices[index] for index in sorted(self.choices)],
+        }
+
+async def record_stream(
+    events: AsyncIterator[dict],
+    cache: ResponseCache,
+    key: str,
+    object_type: str
+) -> AsyncIterator[dict]:
+    """
+    Pass stream events through, caching the reassembled response once the stream completes.
+
+    Nothing is cached if the consumer stops early, the stream fails, or the
+    stream did not report usage (full responses always carry it).
+
+    Args:
+        events: Upstream chunk events
+        cache: Cache to store the response in
+        key: Cache key of the request
+        object_type: Object type of the full response (e.g. "chat.completion")
+
+    Yields:
+        The upstream events, unchanged
+    """
+    recorder = StreamRecorder(object_type)
+    try:
+        async for event in events:
+            recorder.add(event)
+            yield event
+    finally:
+        await events.aclose()
+
+    response = recorder.result()
+    if response.get("usage") is not None:
+        await cache.set(key, response)
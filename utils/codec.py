@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+# All backends raise a ValueError subclass on malformed input
+DecodeError = ValueError
+
+def _default(obj: Any) -> Any:
+    """Serialize objects the JSON backends don't know about natively."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(
+        obj,
+        default=_default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def _stdlib_loads(data: Any) -> Any:
+    return json.loads(data)
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default)
+
+def _msgspec_backend() -> Tuple[Callable[[Any], bytes], Callable[[Any], Any]]:
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+    return encoder.encode, decoder.decode
+
+def _available_backends() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[Any], Any]]]:
+    backends = {}
+    if orjson is not None:
+        backends["orjson"] = (_orjson_dumps, orjson.loads)
+    if msgspec is not None:
+        backends["msgspec"] = _msgspec_backend()
+    backends["json"] = (_stdlib_dumps, _stdlib_loads)
+    return backends
+
+BACKENDS = _available_backends()
+
+BACKEND = "json"
+dumps: Callable[[Any], bytes] = _stdlib_dumps
+loads: Callable[[Any], Any] = _stdlib_loads
+
+def set_backend(name: str) -> None:
+    """
+    Select the JSON backend used for request bodies and responses.
+
+    Args:
+        name: One of "orjson", "msgspec" or "json"
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    global BACKEND, dumps, loads
+
+    if name not in BACKENDS:
+        raise ValueError(
+            f"JSON backend '{name}' is not available. Installed backends: {', '.join(BACKENDS)}"
+        )
+    BACKEND = name
+    dumps, loads = BACKENDS[name]
+
+def get_backend() -> str:
+    """Get the name of the active JSON backend."""
+    return BACKEND
+
+def canonical_hash(namespace: str, obj: Any) -> str:
+    """
+    Hash an object by its canonical JSON form.
+
+    Keys are sorted so equal payloads hash equally regardless of the order
+    they were built in. The stdlib encoder is used on purpose: its output
+    must not change with the selected backend.
+
+    Args:
+        namespace: Prefix separating otherwise equal objects (e.g. the endpoint)
+        obj: JSON-serializable object
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    encoded = json.dumps(
+        obj,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_default
+    )
+    return hashlib.sha256(f"{namespace}\n{encoded}".encode("utf-8")).hexdigest()
+
+# Prefer the fastest installed backend unless overridden by the environment
+set_backend(os.getenv("INFERRA_JSON_BACKEND") or next(iter(BACKENDS)))
@@ -0,0 +1,107 @@
+import asyncio
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+async def bounded_map(
+    func: Callable[[T], Awaitable[R]],
+    inputs: Union[Iterable[T], AsyncIterable[T]],
+    max_concurrency: int = 16,
+    ordered: bool = False,
+    return_exceptions: bool = False
+) -> AsyncIterator[Tuple[int, Union[R, BaseException]]]:
+    """
+    Apply an async function to many inputs with a bounded number in flight.
+
+    Inputs are pulled lazily, so at most ``max_concurrency`` calls are running
+    at any time and memory use does not grow with the number of inputs. This
+    works with generators and async generators of any length.
+
+    Args:
+        func: Async function called once per input
+        inputs: Iterable or async iterable of inputs
+        max_concurrency: Maximum number of calls in flight
+        ordered: Yield results in input order instead of completion order.
+            At most ``max_concurrency`` finished results are held back while
+            waiting for a slower earlier input.
+        return_exceptions: Yield exceptions as results instead of raising
+            the first one (which cancels the remaining calls)
+
+    Yields:
+        (index, result_or_exception) tuples
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    if hasattr(inputs, "__aiter__"):
+        async_iterator = inputs.__aiter__()
+        sync_iterator = None
+    else:
+        async_iterator = None
+        sync_iterator = iter(inputs)
+
+    pending: Dict[asyncio.Future, int] = {}
+    buffered: Dict[int, Any] = {}
+    next_index = 0
+    next_to_yield = 0
+    exhausted = False
+
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(pending) < max_concurrency
+                and (not ordered or len(buffered) < max_concurrency)
+            ):
+                try:
+                    if async_iterator is not None:
+                        item = await async_iterator.__anext__()
+                    else:
+                        item = next(sync_iterator)
+                except (StopIteration, StopAsyncIteration):
+                    exhausted = True
+                    break
+
+                pending[asyncio.ensure_future(func(item))] = next_index
+                next_index += 1
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Process completions in input order so ties are deterministic
+            for task in sorted(done, key=pending.__getitem__):
+                index = pending.pop(task)
+                if task.cancelled():
+                    result = asyncio.CancelledError()
+                else:
+                    result = task.exception() or task.result()
+
+                if isinstance(result, BaseException) and not return_exceptions:
+                    raise result
+
+                if not ordered:
+                    yield index, result
+                    continue
+
+                buffered[index] = result
+                while next_to_yield in buffered:
+                    yield next_to_yield, buffered.pop(next_to_yield)
+                    next_to_yield += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        # Let the cancelled calls unwind before returning to the caller
+        await asyncio.gather(*pending, return_exceptions=True)
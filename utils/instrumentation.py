@@ -0,0 +1,411 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from ..constants import ENDPOINTS
+
+logger = logging.getLogger("inferra")
+
+# Collections whose resources are addressed by id, as /<collection>/<id>[/<action>]
+ID_COLLECTIONS = frozenset({ENDPOINTS["batch"], ENDPOINTS["files"], ENDPOINTS["models"]})
+
+def path_template(path: str) -> str:
+    """
+    Get the endpoint template of a request path.
+
+    Resource ids are replaced (``/files/file-123/content`` becomes
+    ``/files/{id}/content``), so metric labels don't take a new value for
+    every batch or file.
+    """
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    if len(segments) > 1 and f"/{segments[0]}" in ID_COLLECTIONS:
+        segments[1] = "{id}"
+    return "/" + "/".join(segments)
+
+class RequestMetrics:
+    """
+    Timing and size measurements of one request, passed to request hooks.
+
+    Timestamps are ``time.monotonic()`` values and are None for phases the
+    request didn't reach; the properties derive the phase durations from
+    them, in seconds.
+    """
+    __slots__ = (
+        "method", "path", "stream", "attempt", "status", "error", "coalesced",
+        "started", "started_ns", "sent", "headers", "first_token", "ended",
+        "connect", "connection_reused", "bytes_out", "bytes_in",
+        "prompt_tokens", "completion_tokens", "_content", "_connect_started"
+    )
+
+    def __init__(self, method: str, path: str, stream: bool, attempt: int = 0):
+        self.method = method
+        self.path = path
+        self.stream = stream
+        # 0 for the first attempt of a call, 1 for its first retry...
+        self.attempt = attempt
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        # True when the response was shared with an identical in-flight request
+        self.coalesced = False
+
+        self.started = time.monotonic()
+        self.started_ns = time.time_ns()
+        self.sent: Optional[float] = None
+        self.headers: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.ended: Optional[float] = None
+
+        self.connect = 0.0
+        self.connection_reused = False
+        self.bytes_out = 0
+        self.bytes_in: Optional[int] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+        self._content = None
+        self._connect_started: Optional[float] = None
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        """Time spent waiting for the rate and concurrency limiters."""
+        return None if self.sent is None else self.sent - self.started
+
+    @property
+    def time_to_headers(self) -> Optional[float]:
+        """Time from leaving the limiters to the response headers, connecting included."""
+        if self.sent is None or self.headers is None:
+            return None
+        return self.headers - self.sent
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Time from the start of the request to the first streamed event."""
+        return None if self.first_token is None else self.first_token - self.started
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Total time of the request, until the stream ended for streams."""
+        return None if self.ended is None else self.ended - self.started
+
+    def record_usage(self, usage: Optional[Dict[str, Any]]):
+        """Record the token usage reported by a response."""
+        if usage:
+            self.prompt_tokens = usage.get("prompt_tokens")
+            self.completion_tokens = usage.get("completion_tokens")
+
+    def finish(self, hooks: Sequence[Callable[["RequestMetrics"], None]], error: Optional[BaseException] = None):
+        """Close the measurements and report them to every hook."""
+        self.ended = time.monotonic()
+        if error is not None:
+            self.error = type(error).__name__
+        if self._content is not None:
+            total_bytes = getattr(self._content, "total_bytes", None)
+            if isinstance(total_bytes, int):
+                self.bytes_in = total_bytes
+            self._content = None
+        for hook in hooks:
+            try:
+                hook(self)
+            except Exception:
+                # A broken hook must never fail the request it observes
+                logger.exception("Request hook %r failed", hook)
+
+def build_trace_config():
+    """
+    Build the aiohttp trace config feeding connection and upload measurements.
+
+    The RequestMetrics of a request is passed as its ``trace_request_ctx``.
+    """
+    import aiohttp
+
+    async def connect_start(session, context, params):
+        metrics = context.trace_request_ctx
+        if isinstance(metrics, RequestMetrics):
+            metrics._connect_started = time.monotonic()
+
+    async def connect_end(session, context, params):
+        metrics = context.trace_request_ctx
+        if isinstance(metrics, RequestMetrics) and metrics._connect_started is not None:
+            metrics.connect += time.monotonic() - metrics._connect_started
+            metrics._connect_started = None
+
+    async def connection_reused(session, context, params):
+        metrics = context.trace_request_ctx
+        if isinstance(metrics, RequestMetrics):
+            metrics.connection_reused = True
+
+    async def chunk_sent(session, context, params):
+        metrics = context.trace_request_ctx
+        if isinstance(metrics, RequestMetrics):
+            metrics.bytes_out += len(params.chunk)
+
+    trace_config = aiohttp.TraceConfig()
+    # Waiting for a free pooled connection and opening a new one both count
+    trace_config.on_connection_queued_start.append(connect_start)
+    trace_config.on_connection_queued_end.append(connect_end)
+    trace_config.on_connection_create_start.append(connect_start)
+    trace_config.on_connection_create_end.append(connect_end)
+    trace_config.on_connection_reuseconn.append(connection_reused)
+    trace_config.on_request_chunk_sent.append(chunk_sent)
+    return trace_config
+
+# Latency buckets in seconds, covering fast cached calls to long generations
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+DEFAULT_SIZE_BUCKETS = tuple(2 ** exponent for exponent in range(8, 25, 2))
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize a Prometheus-style cumulative histogram.
+
+        Args:
+            name: Metric name
+            help: Description of the metric
+            buckets: Upper bounds of the buckets, in increasing order
+        """
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # Per label set: counts per bucket (the last one is +Inf), sum, count
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: str):
+        """Record one observation."""
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[Tuple[str, str], ...], dict]:
+        """Get the cumulative bucket counts, sum and count of every label set."""
+        with self.lock:
+            snapshot = {}
+            for key, (counts, total, count) in self._series.items():
+                cumulative, running = [], 0
+                for bucket_count in counts:
+                    running += bucket_count
+                    cumulative.append(running)
+                snapshot[key] = {
+                    "buckets": dict(zip(self.buckets + (float("inf"),), cumulative)),
+                    "sum": total,
+                    "count": count,
+                }
+            return snapshot
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            for bound, count in series["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', le),))} {count}")
+            lines.append(f"{self.name}_sum{_labels(key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_labels(key)} {series['count']}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        """
+        Initialize a Prometheus-style counter.
+
+        Args:
+            name: Metric name
+            help: Description of the metric
+        """
+        self.name = name
+        self.help = help
+        self.lock = threading.Lock()
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        """Increase the counter."""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple[Tuple[str, str], ...], float]:
+        """Get the value of every label set."""
+        with self.lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_labels(key)} {value}")
+        return lines
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    """Format a label set, escaping values as the exposition format requires."""
+    formatted = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        formatted.append(f'{name}="{value}"')
+    return "{" + ",".join(formatted) + "}" if formatted else ""
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "inferra"):
+        """
+        Initialize an in-process registry of request histograms and counters.
+
+        The registry is a request hook: pass it to ``InferraClient(hooks=[...])``
+        and expose ``render()`` on a metrics endpoint for Prometheus to
+        scrape, or read ``snapshot()`` directly.
+
+        Series are labelled with the endpoint template of the request path
+        (see path_template()) and its outcome: the status code, the error
+        type, or ``coalesced`` for a request served by an identical one.
+
+        Args:
+            prefix: Prefix of every metric name
+        """
+        self.latency = Histogram(f"{prefix}_request_duration_seconds", "Total request latency")
+        self.queue_wait = Histogram(
+            f"{prefix}_queue_wait_seconds", "Time waiting for the rate and concurrency limiters"
+        )
+        self.connect = Histogram(
+            f"{prefix}_connection_acquire_seconds", "Time acquiring a pooled or new connection"
+        )
+        self.time_to_headers = Histogram(
+            f"{prefix}_time_to_headers_seconds", "Time from sending to the response headers"
+        )
+        self.time_to_first_token = Histogram(
+            f"{prefix}_time_to_first_token_seconds", "Time to the first event of a stream"
+        )
+        self.bytes_out = Histogram(f"{prefix}_request_bytes", "Request body size", DEFAULT_SIZE_BUCKETS)
+        self.bytes_in = Histogram(f"{prefix}_response_bytes", "Response body size", DEFAULT_SIZE_BUCKETS)
+        self.requests = Counter(f"{prefix}_requests_total", "Requests by path and outcome")
+        self.retries = Counter(f"{prefix}_retries_total", "Requests that were retry attempts")
+        self.tokens = Counter(f"{prefix}_tokens_total", "Tokens reported by responses")
+        self.metrics = [
+            self.latency, self.queue_wait, self.connect, self.time_to_headers,
+            self.time_to_first_token, self.bytes_out, self.bytes_in,
+            self.requests, self.retries, self.tokens
+        ]
+
+    def __call__(self, metrics: RequestMetrics):
+        path = path_template(metrics.path)
+        if metrics.status is not None:
+            outcome = str(metrics.status)
+        elif metrics.error is not None:
+            outcome = metrics.error
+        elif metrics.coalesced:
+            # Served by an identical request in flight, counted on its own
+            outcome = "coalesced"
+        else:
+            outcome = "unknown"
+        self.requests.inc(path=path, method=metrics.method, outcome=outcome)
+        if metrics.attempt:
+            self.retries.inc(path=path)
+
+        for histogram, value in (
+            (self.latency, metrics.latency),
+            (self.queue_wait, metrics.queue_wait),
+            (self.time_to_headers, metrics.time_to_headers),
+            (self.time_to_first_token, metrics.time_to_first_token),
+        ):
+            if value is not None:
+                histogram.observe(value, path=path)
+        if metrics.sent is not None:
+            self.connect.observe(metrics.connect, path=path)
+        if metrics.bytes_out:
+            self.bytes_out.observe(metrics.bytes_out, path=path)
+        if metrics.bytes_in is not None:
+            self.bytes_in.observe(metrics.bytes_in, path=path)
+        if metrics.prompt_tokens:
+            self.tokens.inc(metrics.prompt_tokens, path=path, kind="prompt")
+        if metrics.completion_tokens:
+            self.tokens.inc(metrics.completion_tokens, path=path, kind="completion")
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Get the current values of every metric, by name."""
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class OpenTelemetryHook:
+    def __init__(self, tracer: Any = None):
+        """
+        Initialize a request hook exporting a span per request to OpenTelemetry.
+
+        Spans are created once the request is finished, with their real
+        start and end times, so nothing is paid on the request path. They
+        follow the HTTP client semantic conventions, with the phase timings
+        as events and inferra.* attributes.
+
+        Args:
+            tracer: Tracer to use (defaults to the global tracer provider's)
+
+        Raises:
+            ImportError: If opentelemetry-api is not installed
+        """
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError(
+                    "OpenTelemetryHook requires opentelemetry-api (pip install opentelemetry-api)"
+                ) from e
+            tracer = trace.get_tracer("inferra")
+        self.tracer = tracer
+
+    def __call__(self, metrics: RequestMetrics):
+        def wall_ns(timestamp: float) -> int:
+            return metrics.started_ns + int((timestamp - metrics.started) * 1e9)
+
+        attributes = {
+            "http.request.method": metrics.method,
+            "url.path": metrics.path,
+            "http.route": path_template(metrics.path),
+            "inferra.stream": metrics.stream,
+            "inferra.attempt": metrics.attempt,
+            "inferra.coalesced": metrics.coalesced,
+            "inferra.connection_reused": metrics.connection_reused,
+            "inferra.connect_seconds": metrics.connect,
+            "http.request.body.size": metrics.bytes_out,
+        }
+        optional = {
+            "http.response.status_code": metrics.status,
+            "error.type": metrics.error,
+            "http.response.body.size": metrics.bytes_in,
+            "inferra.queue_wait_seconds": metrics.queue_wait,
+            "inferra.time_to_headers_seconds": metrics.time_to_headers,
+            "inferra.time_to_first_token_seconds": metrics.time_to_first_token,
+            "gen_ai.usage.input_tokens": metrics.prompt_tokens,
+            "gen_ai.usage.output_tokens": metrics.completion_tokens,
+        }
+        attributes.update((key, value) for key, value in optional.items() if value is not None)
+
+        span = self.tracer.start_span(
+            f"{metrics.method} {metrics.path}",
+            start_time=metrics.started_ns,
+            attributes=attributes
+        )
+        for name, timestamp in (
+            ("limiters_passed", metrics.sent),
+            ("response_headers", metrics.headers),
+            ("first_token", metrics.first_token),
+        ):
+            if timestamp is not None:
+                span.add_event(name, timestamp=wall_ns(timestamp))
+        if metrics.error is not None or (metrics.status is not None and metrics.status >= 400):
+            try:
+                from opentelemetry.trace import Status, StatusCode
+                span.set_status(Status(StatusCode.ERROR, metrics.error))
+            except ImportError:
+                pass
+        span.end(end_time=wall_ns(metrics.ended))
@@ -1,94 +1,208 @@
-import logging
+import atexit
 import json
-from typing import Any, Optional
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
+if TYPE_CHECKING:
+    from .instrumentation import RequestMetrics
+
+DEFAULT_FORMAT = "[%(asctime)s] %(levelname)s [%(name)s] %(message)s"
+
+class _LazyJSON:
+    """Log argument serialized only when the record is actually formatted."""
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return json.dumps(self.fields, default=str)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats every record in the logging thread so it can
+    be pickled; the queue here never leaves the process, and the arguments
+    logged by InferraLogger are snapshots, so the record is passed as is.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+# One queue listener per logger name, shared by every InferraLogger using
+# it, and the (console, log_file, format_string) it was installed with
+_listeners: Dict[str, logging.handlers.QueueListener] = {}
+_listener_configs: Dict[str, Tuple[bool, Optional[str], str]] = {}
+_listeners_lock = threading.Lock()
+
+def _stop_listeners():
+    with _listeners_lock:
+        for listener in _listeners.values():
+            listener.stop()
+        _listeners.clear()
+        _listener_configs.clear()
+
+atexit.register(_stop_listeners)
+
 class InferraLogger:
     def __init__(
         self,
         name: str = "inferra",
         level: int = logging.INFO,
         log_file: Optional[str] = None,
-        format_string: Optional[str] = None
+        format_string: Optional[str] = None,
+        sample_rate: float = 1.0,
+        console: bool = True
     ):
+        """
+        Initialize a structured logger for API traffic.
+
+        Records are put on a queue and formatted and written by a background
+        QueueListener thread, so the request path never blocks on a stream
+        or file. The handlers are installed once per logger name: creating
+        another InferraLogger with the same name and handler options reuses
+        them rather than adding duplicates.
+
+        Nothing is built for a disabled level, and the JSON payloads are
+        only serialized by the listener thread. Successful requests and
+        responses are logged for a ``sample_rate`` fraction of the traffic,
+        while errors are always logged.
+
+        The logger is also a request hook: ``InferraClient(hooks=[logger])``
+        logs one line per finished request from its RequestMetrics.
+
+        Args:
+            name: Logger name
+            level: Logging level
+            log_file: Also write the records to this file
+            format_string: Format of the records
+            sample_rate: Fraction of successful requests and responses logged
+            console: Write the records to stderr
+
+        Raises:
+            ValueError: If sample_rate is out of range, or the handlers of
+                the logger name were installed with other options
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(level)
+        config = (
+            console,
+            os.path.abspath(log_file) if log_file else None,
+            format_string or DEFAULT_FORMAT
+        )
+        with _listeners_lock:
+            installed = _listener_configs.get(name)
+            if installed is not None and installed != config:
+                raise ValueError(
+                    f"The handlers of logger {name!r} were installed with other options "
+                    f"(console={installed[0]}, log_file={installed[1]!r}, "
+                    f"format_string={installed[2]!r}); use another name or the same options"
+                )
+            if installed is None:
+                formatter = logging.Formatter(format_string or DEFAULT_FORMAT)
+                handlers: List[logging.Handler] = []
+                if console:
+                    handlers.append(logging.StreamHandler())
+                if log_file:
+                    handlers.append(logging.FileHandler(log_file))
+                for handler in handlers:
+                    handler.setFormatter(formatter)
 
-        if not format_string:
-            format_string = "[%(asctime)s] %(levelname)s [%(name)s] %(message)s"
-        
-        formatter = logging.Formatter(format_string)
+                records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+                self.logger.addHandler(_DeferredQueueHandler(records))
+                listener = logging.handlers.QueueListener(
+                    records, *handlers, respect_handler_level=True
+                )
+                listener.start()
+                _listeners[name] = listener
+                _listener_configs[name] = config
 
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
+        self.logger.setLevel(level)
+        self.sample_rate = sample_rate
 
-        # File handler (optional)
-        if log_file:
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
 
-    def _format_request(self, method: str, url: str, **kwargs) -> str:
+    def _format_request(self, method: str, url: str, **kwargs) -> _LazyJSON:
         """Format request details for logging."""
-        return json.dumps({
+        return _LazyJSON({
             "method": method,
             "url": url,
             "params": kwargs.get("params"),
-            "headers": kwargs.get("headers", {})
-        }, default=str)
+            "headers": dict(kwargs.get("headers") or {})
+        })
 
-    def _format_response(self, response: Any) -> str:
+    def _format_response(self, response: Any) -> Any:
         """Format response details for logging."""
-        if hasattr(response, "status_code"):
-            return json.dumps({
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "length": len(response.content) if hasattr(response, "content") else None
-            }, default=str)
-        return str(response)
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+        if status is None:
+            return response
+        headers = getattr(response, "headers", None) or {}
+        # The declared length only: measuring the body could force it to be read
+        length = getattr(response, "content_length", None)
+        if length is None:
+            length = headers.get("Content-Length")
+        return _LazyJSON({
+            "status_code": status,
+            "headers": dict(headers),
+            "length": int(length) if length is not None else None
+        })
 
     def log_request(self, method: str, url: str, **kwargs):
         """Log API request details."""
-        self.logger.info(
-            f"API Request: {self._format_request(method, url, **kwargs)}"
-        )
+        if self.logger.isEnabledFor(logging.INFO) and self._sampled():
+            self.logger.info("API Request: %s", self._format_request(method, url, **kwargs))
 
     def log_response(self, response: Any, elapsed: float):
         """Log API response details."""
-        self.logger.info(
-            f"API Response ({elapsed:.2f}s): {self._format_response(response)}"
-        )
+        if self.logger.isEnabledFor(logging.INFO) and self._sampled():
+            self.logger.info("API Response (%.2fs): %s", elapsed, self._format_response(response))
 
     def log_error(self, error: Exception, context: Optional[dict] = None):
         """Log error details with context."""
-        error_data = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context or {}
-        }
-        self.logger.error(f"Error: {json.dumps(error_data, default=str)}")
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error("Error: %s", _LazyJSON({
+                "error_type": type(error).__name__,
+                "error_message": str(error),
+                "context": dict(context or {})
+            }))
 
     def log_rate_limit(self, remaining: int, reset: datetime):
         """Log rate limit information."""
-        self.logger.info(
-            f"Rate limit - Remaining: {remaining}, Reset: {reset.isoformat()}"
-        )
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Rate limit - Remaining: %s, Reset: %s", remaining, reset.isoformat())
+
+    def __call__(self, metrics: "RequestMetrics"):
+        failed = metrics.error is not None or (metrics.status is not None and metrics.status >= 400)
+        level = logging.WARNING if failed else logging.INFO
+        if not self.logger.isEnabledFor(level) or (not failed and not self._sampled()):
+            return
+        self.logger.log(level, "API Call: %s", _LazyJSON({
+            "method": metrics.method,
+            "path": metrics.path,
+            "status": metrics.status,
+            "error": metrics.error,
+            "attempt": metrics.attempt,
+            "latency": metrics.latency,
+            "queue_wait": metrics.queue_wait,
+            "time_to_first_token": metrics.time_to_first_token,
+            "prompt_tokens": metrics.prompt_tokens,
+            "completion_tokens": metrics.completion_tokens,
+        }))
 
-# Usage in client.py:
-# Add to imports:
-# from .utils.logging import InferraLogger
-
-# Add to InferraClient.__init__:
-# self.logger = InferraLogger()
-
-# Add to request method:
-# self.logger.log_request(method, path, **kwargs)
-# start_time = time.time()
-# try:
-#     response = ...
-#     self.logger.log_response(response, time.time() - start_time)
-# except Exception as e:
-#     self.logger.log_error(e, {"method": method, "path": path})
-#     raise
+    def flush(self):
+        """Wait until every queued record has been written."""
+        with _listeners_lock:
+            listener = _listeners.get(self.logger.name)
+            if listener is not None:
+                # stop() drains the queue; a new thread takes later records
+                listener.stop()
+                listener.start()
@@ -0,0 +1,92 @@
+import hashlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Sequence
+from . import codec
+from .token_counter import REPLY_PRIMING_TOKENS, TokenCounter
+from .validators import MessageValidator, default_validator
+
+if TYPE_CHECKING:
+    from ..models.chat import Message
+
+class MessagePrefix:
+    def __init__(
+        self,
+        messages: Iterable["Message"],
+        validator: Optional[MessageValidator] = None
+    ):
+        """
+        Initialize a reusable prefix of chat messages.
+
+        Most requests of an application share a long system prompt and
+        few-shot examples. A MessagePrefix validates and serializes them
+        once, and chat.create(prefix=...) splices the cached bytes into
+        each request body, so only the per-call messages are converted and
+        encoded. Token counts of the prefix are cached per model too, which
+        makes estimating its share of the TPM budget free.
+
+        Example:
+            prefix = MessagePrefix([system_prompt, *few_shot_examples])
+            await client.chat.create(model=..., prefix=prefix, messages=[question])
+
+        Args:
+            messages: Messages starting every conversation; they must not
+                be modified afterwards
+            validator: Validator checking the messages (defaults to the shared one)
+
+        Raises:
+            InferraAPIError: If the messages are invalid
+        """
+        self.messages = tuple(messages)
+        (validator or default_validator).validate_messages(self.messages)
+
+        # The array elements, without brackets, ready to be spliced
+        self.encoded = b",".join(codec.dumps(message.model_dump()) for message in self.messages)
+        self.digest = hashlib.sha256(self.encoded).hexdigest()
+        self._token_counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator["Message"]:
+        return iter(self.messages)
+
+    def count_tokens(self, counter: TokenCounter) -> int:
+        """
+        Count the tokens of the prefix, caching the count per model.
+
+        Args:
+            counter: Token counter of the model the request is sent to
+
+        Returns:
+            Number of prompt tokens contributed by the prefix, excluding the
+            tokens priming the reply (which the rest of the conversation adds)
+        """
+        count = self._token_counts.get(counter.model)
+        if count is None:
+            count = counter.count_many([self.messages])[0] - REPLY_PRIMING_TOKENS
+            self._token_counts[counter.model] = count
+        return count
+
+    def build_body(self, payload: Dict[str, Any]) -> bytes:
+        """
+        Encode a request body whose messages start with this prefix.
+
+        Args:
+            payload: Request payload whose "messages" are the serialized
+                per-call messages following the prefix
+
+        Returns:
+            The JSON body
+        """
+        rest = {key: value for key, value in payload.items() if key != "messages"}
+        parts = [b'{"messages":[', self.encoded]
+        suffix: Sequence[Dict[str, Any]] = payload.get("messages") or ()
+        if suffix:
+            parts.append(b",")
+            parts.append(codec.dumps(suffix)[1:-1])
+        parts.append(b"]")
+        if rest:
+            parts.append(b",")
+            parts.append(codec.dumps(rest)[1:])
+        else:
+            parts.append(b"}")
+        return b"".join(parts)
@@ -1,51 +1,194 @@
 import asyncio
+import threading
+from abc import ABC, abstractmethod
 import time
-from typing import Optional
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Optional
 from ..exceptions import InferraRateLimitError
 
+if TYPE_CHECKING:
+    from .token_counter import TokenCounter
+    from ..models.common import Usage
+
+class _Waiter:
+    """A caller queued on a RateLimiter reservation."""
+    __slots__ = ("ready_at", "loop", "wakeup")
+
+    def __init__(self, ready_at: float, loop: asyncio.AbstractEventLoop):
+        self.ready_at = ready_at
+        self.loop = loop
+        self.wakeup: Optional[asyncio.Future] = None
+
+    def wake(self):
+        """Make the caller recompute its wait. Safe from any thread."""
+        wakeup = self.wakeup
+        if wakeup is not None:
+            self.loop.call_soon_threadsafe(_set_done, wakeup)
+
+def _set_done(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
 class RateLimiter:
     def __init__(
         self,
         requests_per_minute: int,
-        burst_size: Optional[int] = None
+        burst_size: Optional[int] = None,
+        max_wait: Optional[float] = None
     ):
         """
         Initialize rate limiter.
-        
+
+        The limiter is a token bucket that hands out reservations in FIFO
+        order. A caller that cannot be served immediately takes a reservation
+        against future refills and sleeps until exactly the moment its tokens
+        become available, so waiters never busy-retry and never overtake each
+        other. The bucket state is guarded by a thread lock rather than an
+        ``asyncio.Lock`` so one instance can be shared by every API surface of
+        a client, and by clients running on different event loops.
+
         Args:
             requests_per_minute: Number of requests allowed per minute
             burst_size: Maximum burst size (defaults to requests_per_minute)
+            max_wait: Maximum time in seconds a caller may queue before
+                InferraRateLimitError is raised (defaults to waiting forever)
         """
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+
         self.rate = requests_per_minute / 60.0  # Convert to requests per second
         self.burst_size = burst_size or requests_per_minute
-        self.tokens = self.burst_size
+        self.max_wait = max_wait
+        self.tokens = float(self.burst_size)
         self.last_update = time.monotonic()
-        self.lock = asyncio.Lock()
+        self.lock = threading.Lock()
+        # Callers sleeping on a reservation, in the order they reserved
+        self._waiters: Deque["_Waiter"] = deque()
 
-    async def acquire(self, tokens: int = 1):
+    async def acquire(self, tokens: int = 1) -> float:
         """
-        Acquire tokens from the bucket.
-        
+        Acquire tokens from the bucket, waiting for them if necessary.
+
         Args:
             tokens: Number of tokens to acquire
-            
+
+        Returns:
+            Time in seconds spent waiting for the tokens
+
+        Raises:
+            InferraRateLimitError: If the wait would exceed max_wait
+        """
+        wait = self.reserve(tokens)
+        if wait <= 0:
+            return 0.0
+
+        started = time.monotonic()
+        waiter = _Waiter(started + wait, asyncio.get_running_loop())
+        with self.lock:
+            self._waiters.append(waiter)
+        try:
+            while True:
+                # Woken early when tokens are handed back to the queue. The
+                # future is armed before reading ready_at so no move is missed.
+                waiter.wakeup = waiter.loop.create_future()
+                remaining = waiter.ready_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.wait((waiter.wakeup,), timeout=remaining)
+        except asyncio.CancelledError:
+            # Hand the reservation to the callers queued behind this one,
+            # rather than to the bucket where a newcomer could take it
+            # ahead of them.
+            self._release(tokens, after=waiter)
+            raise
+        finally:
+            with self.lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        return time.monotonic() - started
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Reserve tokens without waiting.
+
+        Args:
+            tokens: Number of tokens to reserve
+
+        Returns:
+            Number of seconds until the reservation becomes valid (0 if
+            the tokens are available immediately)
+
         Raises:
-            InferraRateLimitError: If rate limit is exceeded
+            InferraRateLimitError: If the wait would exceed max_wait
         """
-        async with self.lock:
-            await self._refill()
-            
-            if self.tokens < tokens:
-                required_time = (tokens - self.tokens) / self.rate
+        with self.lock:
+            self._refill()
+            wait = max(0.0, (tokens - self.tokens) / self.rate)
+
+            if self.max_wait is not None and wait > self.max_wait:
                 raise InferraRateLimitError(
-                    f"Rate limit exceeded. Try again in {required_time:.1f} seconds.",
-                    retry_after=required_time
+                    f"Rate limit exceeded. Try again in {wait:.1f} seconds.",
+                    retry_after=wait
                 )
-            
+
+            self.tokens -= tokens
+            return wait
+
+    def release(self, tokens: int = 1):
+        """
+        Return previously reserved tokens to the bucket.
+
+        While callers are queued the tokens go to them first: each queued
+        reservation becomes valid correspondingly earlier, in order.
+
+        Args:
+            tokens: Number of tokens to return
+        """
+        self._release(tokens)
+
+    def _release(self, tokens: int, after: Optional["_Waiter"] = None):
+        """Return tokens, moving up the waiters queued behind ``after`` (all if None)."""
+        with self.lock:
+            self._refill()
+            before = self.tokens
+            self.tokens = min(self.burst_size, self.tokens + tokens)
+            added = self.tokens - before
+
+            queued = list(self._waiters)
+            if after is not None:
+                if after not in queued:
+                    return
+                queued = queued[queued.index(after) + 1:]
+            if added <= 0:
+                return
+            advance = added / self.rate
+            for waiter in queued:
+                waiter.ready_at -= advance
+                waiter.wake()
+
+    def charge(self, tokens: int):
+        """
+        Take tokens from the bucket without waiting, going into debt if needed.
+
+        Used to account for consumption that is only known after the fact;
+        callers queued behind the debt wait correspondingly longer.
+
+        Args:
+            tokens: Number of tokens to take
+        """
+        with self.lock:
+            self._refill()
             self.tokens -= tokens
 
-    async def _refill(self):
-        """Refill tokens based on time elapsed."""
+    @property
+    def available(self) -> float:
+        """Number of tokens currently available (negative while callers are queued)."""
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+    def _refill(self):
+        """Refill tokens based on time elapsed. Must be called with the lock held."""
         now = time.monotonic()
         elapsed = now - self.last_update
         self.tokens = min(
@@ -53,3 +196,352 @@ class RateLimiter:
             self.tokens + (elapsed * self.rate)
         )
         self.last_update = now
+
+class TokenBudget:
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        burst_size: Optional[int] = None
+    ):
+        """
+        Initialize a token-per-minute budget.
+
+        Works alongside the request RateLimiter: before a request is sent its
+        estimated token cost is reserved, and once the response's usage is
+        known the difference is refunded or charged. Overspending simply
+        pushes the bucket into debt, which delays the next callers instead of
+        letting the server answer with a 429.
+
+        Args:
+            tokens_per_minute: Number of tokens allowed per minute
+            burst_size: Maximum tokens spendable at once (defaults to tokens_per_minute)
+        """
+        self.bucket = RateLimiter(
+            requests_per_minute=tokens_per_minute,
+            burst_size=burst_size or tokens_per_minute
+        )
+
+    async def reserve(self, estimated_tokens: int) -> int:
+        """
+        Reserve an estimated number of tokens, waiting until they are available.
+
+        Args:
+            estimated_tokens: Estimated prompt plus completion tokens
+
+        Returns:
+            The number of tokens reserved, to be passed to settle()
+        """
+        # A single request larger than the whole budget can never be served
+        # in one go; cap the reservation and let settle() charge the rest.
+        reserved = max(0, min(int(estimated_tokens), int(self.bucket.burst_size)))
+        if reserved:
+            await self.bucket.acquire(reserved)
+        return reserved
+
+    def settle(self, reserved: int, actual_tokens: Optional[int]):
+        """
+        Reconcile a reservation with the tokens the API actually reported.
+
+        Args:
+            reserved: Tokens returned by reserve()
+            actual_tokens: Total tokens from the response usage, or None if
+                unknown (the reservation is then kept as-is)
+        """
+        if actual_tokens is None:
+            return
+
+        difference = actual_tokens - reserved
+        if difference < 0:
+            self.bucket.release(-difference)
+        elif difference > 0:
+            self.bucket.charge(difference)
+
+    def cancel(self, reserved: int):
+        """
+        Return a reservation for a request that was never answered.
+
+        Args:
+            reserved: Tokens returned by reserve()
+        """
+        if reserved:
+            self.bucket.release(reserved)
+
+    @property
+    def available(self) -> float:
+        """Number of tokens currently available in the budget."""
+        return self.bucket.available
+
+class TokenBudgetMixin(ABC):
+    """
+    Token-per-minute accounting for the API surfaces.
+
+    Reserves the estimated cost of a call against ``self.client.token_budget``
+    before it is sent, then settles the reservation against the reported
+    usage or cancels it if the call failed. Subclasses count the prompt in
+    ``_count_prompt_tokens()``.
+    """
+    _token_counters: Optional[Dict[str, "TokenCounter"]] = None
+
+    @abstractmethod
+    def _count_prompt_tokens(self, counter: "TokenCounter", *prompt: Any) -> int:
+        """Count the prompt tokens of a call."""
+
+    async def _reserve_tokens(self, model: str, max_tokens: Optional[int], *prompt: Any) -> int:
+        """
+        Reserve the estimated token cost of a call against the client's TPM budget.
+
+        Args:
+            model: The model the call is sent to
+            max_tokens: Maximum tokens to generate, if set
+            *prompt: The prompt, passed to _count_prompt_tokens()
+
+        Returns:
+            Number of tokens reserved (0 when no TPM budget is configured)
+        """
+        budget = self.client.token_budget
+        if budget is None:
+            return 0
+
+        if self._token_counters is None:
+            self._token_counters = {}
+        counter = self._token_counters.get(model)
+        if counter is None:
+            from .token_counter import TokenCounter
+            counter = self._token_counters[model] = TokenCounter(model)
+
+        prompt_tokens = self._count_prompt_tokens(counter, *prompt)
+        return await budget.reserve(prompt_tokens + (max_tokens or 0))
+
+    async def _reserve_tokens_once(
+        self,
+        path: str,
+        stream: bool,
+        request: Dict[str, Any],
+        model: str,
+        max_tokens: Optional[int],
+        *prompt: Any
+    ) -> Optional[int]:
+        """
+        Reserve the token cost of a call unless it shares an identical one in flight.
+
+        With request coalescing only the call that goes out is charged. A
+        call that will join one in flight reserves nothing, and one whose
+        twin was sent while it waited for the budget hands its reservation
+        back.
+
+        Args:
+            path: API endpoint the call is posted to
+            stream: Whether the call streams its response
+            request: Body arguments of the call, as passed to client.post()
+            model: The model the call is sent to
+            max_tokens: Maximum tokens to generate, if set
+            *prompt: The prompt, passed to _count_prompt_tokens()
+
+        Returns:
+            Number of tokens reserved, or None for a coalesced call
+        """
+        if self.client.token_budget is None:
+            return 0
+        if self.client._joins_flight("POST", path, stream, request):
+            return None
+        reserved_tokens = await self._reserve_tokens(model, max_tokens, *prompt)
+        if self.client._joins_flight("POST", path, stream, request):
+            self._cancel_tokens(reserved_tokens)
+            return None
+        return reserved_tokens
+
+    def _settle_tokens(self, reserved_tokens: Optional[int], usage: Optional["Usage"]):
+        """Refund or charge the difference between the reservation and the reported usage."""
+        budget = self.client.token_budget
+        # Coalesced calls and responses replayed from the cache never
+        # reserved anything
+        if budget is not None and reserved_tokens is not None:
+            budget.settle(reserved_tokens, usage.total_tokens if usage else None)
+
+    def _cancel_tokens(self, reserved_tokens: Optional[int]):
+        """Return the reservation of a call that did not complete."""
+        budget = self.client.token_budget
+        if budget is not None and reserved_tokens is not None:
+            budget.cancel(reserved_tokens)
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window_size: int = 100
+    ):
+        """
+        Initialize an adaptive (AIMD) concurrency limiter.
+
+        The number of requests allowed in flight grows by roughly one for
+        every ``limit`` successful responses (additive increase) and is cut
+        by ``backoff_ratio`` on 429s, 5xx responses, connection errors, or
+        when the p95 latency of recent responses rises above
+        ``latency_tolerance`` times its baseline (multiplicative decrease).
+        A 429 with Retry-After also pauses every caller until it expires,
+        instead of each request sleeping on its own.
+
+        Args:
+            initial_limit: Concurrency limit to start from
+            min_limit: Lowest limit the controller may back off to
+            max_limit: Highest limit the controller may grow to
+            backoff_ratio: Factor applied to the limit on overload
+            latency_tolerance: p95 latency, relative to the baseline, that
+                counts as overload
+            window_size: Number of recent latencies used for the p95
+        """
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.inflight = 0
+
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._paused_until = 0.0
+        self._pause_handle: Optional[asyncio.TimerHandle] = None
+        self._latencies: Deque[float] = deque(maxlen=window_size)
+        self._samples_since_check = 0
+        self._p95: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._smoothed_latency = 0.0
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        """Wait for a free concurrency slot (and for any global pause to end)."""
+        if (
+            not self._waiters
+            and self.inflight < int(self.limit)
+            and time.monotonic() >= self._paused_until
+        ):
+            self.inflight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._wake_waiters()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we were cancelled
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(
+        self,
+        status: Optional[int] = None,
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None
+    ):
+        """
+        Release a slot and feed the outcome of the request back into the controller.
+
+        Args:
+            status: HTTP status of the response, or None if no response was
+                received (a connection error when latency is given, otherwise
+                the request was abandoned and gives no signal)
+            latency: Time from sending the request to receiving the headers
+            retry_after: Retry-After of a 429 response, in seconds
+        """
+        self.inflight -= 1
+
+        if status == 429:
+            self._decrease()
+            if retry_after:
+                self.pause(retry_after)
+        elif status is None:
+            if latency is not None:
+                self._decrease()
+        elif status >= 500:
+            self._decrease()
+        elif status < 400 and latency is not None:
+            self._record_latency(latency)
+
+        self._wake_waiters()
+
+    def pause(self, seconds: float):
+        """
+        Stop handing out slots to every caller for the given time.
+
+        Args:
+            seconds: Duration of the pause
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @property
+    def state(self) -> dict:
+        """Snapshot of the controller state."""
+        return {
+            "limit": int(self.limit),
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "paused_for": max(0.0, self._paused_until - time.monotonic()),
+            "p95_latency": self._p95,
+            "baseline_latency": self._baseline,
+        }
+
+    def _record_latency(self, latency: float):
+        """Grow the limit unless recent latency shows the server is saturating."""
+        self._latencies.append(latency)
+        self._smoothed_latency += (latency - self._smoothed_latency) * 0.1
+        self._samples_since_check += 1
+
+        if len(self._latencies) >= 20 and self._samples_since_check >= 10:
+            self._samples_since_check = 0
+            ordered = sorted(self._latencies)
+            self._p95 = ordered[int(len(ordered) * 0.95) - 1]
+
+            if self._baseline is None or self._p95 < self._baseline:
+                self._baseline = self._p95
+            else:
+                # Let the baseline drift up slowly so a permanently slower
+                # backend does not keep the limit pinned down forever.
+                self._baseline += (self._p95 - self._baseline) * 0.01
+
+            if self._p95 > self._baseline * self.latency_tolerance:
+                self._decrease()
+                return
+
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self):
+        """Cut the limit, at most once per round trip so one burst of errors counts once."""
+        now = time.monotonic()
+        if now - self._last_decrease < max(self._smoothed_latency, 0.05):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+    def _wake_waiters(self):
+        """Hand free slots to queued callers in FIFO order."""
+        if not self._waiters:
+            return
+
+        remaining_pause = self._paused_until - time.monotonic()
+        if remaining_pause > 0:
+            if self._pause_handle is None:
+                self._pause_handle = asyncio.get_running_loop().call_later(
+                    remaining_pause, self._on_pause_end
+                )
+            return
+
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.inflight += 1
+            waiter.set_result(None)
+
+    def _on_pause_end(self):
+        self._pause_handle = None
+        self._wake_waiters()
@@ -1,58 +1,354 @@
 import asyncio
+import random
+import threading
+import time
+from contextvars import ContextVar
 from functools import wraps
-from typing import Type, Union, Tuple, Optional
-from ..exceptions import InferraAPIError, InferraRateLimitError
+from typing import Any, Dict, Type, Union, Tuple, Optional, FrozenSet
+from ..exceptions import InferraAPIError, InferraRateLimitError, InferraConnectionError
+
+# Monotonic time by which the current logical call (including all of its
+# retries) must finish. Read by InferraClient.request to shrink per-attempt
+# timeouts so the whole call respects the deadline.
+request_deadline: ContextVar[Optional[float]] = ContextVar("inferra_request_deadline", default=None)
+
+# Number of the attempt in progress (0 for the first), reported by the
+# client's request hooks
+request_attempt: ContextVar[int] = ContextVar("inferra_request_attempt", default=0)
+
+# The client (or pool) whose API call is running, set by track_in_flight.
+# Its requests belong to the call, which close() waits for as a whole.
+current_call: ContextVar[Optional[Any]] = ContextVar("inferra_current_call", default=None)
+
+# Status codes worth retrying: the request may succeed on a later attempt
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# Status codes returned before the server did any work, safe to retry even
+# for requests that are not idempotent
+REJECTED_STATUS_CODES = frozenset({425, 429, 503})
+
+class RetryBudget:
+    def __init__(
+        self,
+        retry_ratio: float = 0.2,
+        min_retries_per_second: float = 1.0,
+        max_tokens: float = 100.0
+    ):
+        """
+        Initialize a retry budget.
+
+        Each request deposits ``retry_ratio`` tokens and each retry withdraws
+        one, so retries are capped at roughly that fraction of traffic. A small
+        time-based allowance keeps low-traffic clients able to retry at all.
+        When the backend is down this stops every caller from multiplying the
+        load by ``max_retries``.
+
+        Args:
+            retry_ratio: Retries allowed per request (0.2 = 20% of traffic)
+            min_retries_per_second: Retries always allowed regardless of traffic
+            max_tokens: Maximum number of retries that can be saved up
+        """
+        self.retry_ratio = retry_ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        """Record a request (first attempt) against the budget."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.max_tokens, self.tokens + self.retry_ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Try to spend budget on a retry.
+
+        Returns:
+            True if the retry is allowed
+        """
+        with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.max_tokens,
+            self.tokens + (now - self.last_update) * self.min_retries_per_second
+        )
+        self.last_update = now
+
+class RetryMetrics:
+    """Counters describing retry behaviour."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters."""
+        self.calls = 0
+        self.retries = 0
+        self.successes_after_retry = 0
+        self.exhausted = 0
+        self.budget_exhausted = 0
+        self.deadline_exceeded = 0
+        self.not_retryable = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+        self.retries_by_status: Dict[Optional[int], int] = {}
+
+    def record_retry(self, status_code: Optional[int], delay: float):
+        with self.lock:
+            self.retries += 1
+            self.total_delay += delay
+            self.max_delay = max(self.max_delay, delay)
+            self.retries_by_status[status_code] = self.retries_by_status.get(status_code, 0) + 1
+
+    def increment(self, counter: str):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> dict:
+        """Get a copy of the current counters."""
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "successes_after_retry": self.successes_after_retry,
+                "exhausted": self.exhausted,
+                "budget_exhausted": self.budget_exhausted,
+                "deadline_exceeded": self.deadline_exceeded,
+                "not_retryable": self.not_retryable,
+                "total_delay": self.total_delay,
+                "max_delay": self.max_delay,
+                "retries_by_status": dict(self.retries_by_status),
+            }
+
+# Shared by every policy unless one is given explicitly, so the budget caps
+# retries across all API surfaces of the process.
+default_retry_budget = RetryBudget()
+retry_metrics = RetryMetrics()
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = 3,
+        initial_delay: float = 1,
+        max_delay: float = 60,
+        exponential_base: float = 2,
+        jitter: Optional[str] = "full",
+        retry_on: Optional[Union[Type[Exception], Tuple[Type[Exception], ...]]] = None,
+        retry_on_status: FrozenSet[int] = RETRYABLE_STATUS_CODES,
+        idempotent: bool = True,
+        budget: Optional[RetryBudget] = None,
+        metrics: Optional[RetryMetrics] = None,
+        deadline: Optional[float] = None
+    ):
+        """
+        Describe when and how a failed call is retried.
+
+        Args:
+            max_retries: Maximum number of retries
+            initial_delay: Initial delay between retries in seconds
+            max_delay: Maximum delay between retries in seconds
+            exponential_base: Base for exponential backoff
+            jitter: "full" (random delay up to the backoff), "decorrelated"
+                (random delay between initial_delay and 3x the previous one)
+                or None for plain exponential backoff
+            retry_on: Exception or tuple of exceptions to consider for retry
+            retry_on_status: HTTP status codes that are retried
+            idempotent: Whether repeating the call is safe. Non-idempotent
+                calls are only retried when the server certainly did not
+                process the request (connection never established, 429, 503)
+            budget: Retry budget (defaults to the process-wide budget)
+            metrics: Metrics to record into (defaults to the process-wide metrics)
+            deadline: Total seconds a call may take across all attempts
+                (defaults to the client's configured timeout, math.inf for
+                no limit)
+        """
+        if jitter not in (None, "full", "decorrelated"):
+            raise ValueError("jitter must be 'full', 'decorrelated' or None")
+
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.exponential_base = exponential_base
+        self.jitter = jitter
+        self.retry_on = retry_on or (InferraAPIError,)
+        self.retry_on_status = frozenset(retry_on_status)
+        self.idempotent = idempotent
+        self.budget = budget or default_retry_budget
+        self.metrics = metrics or retry_metrics
+        self.deadline = deadline
+
+    def is_retryable(self, error: Exception) -> bool:
+        """
+        Classify an error as retryable or not.
+
+        Args:
+            error: The exception raised by the attempt
+
+        Returns:
+            True if another attempt may succeed
+        """
+        if not isinstance(error, self.retry_on):
+            return False
+
+        if isinstance(error, InferraConnectionError):
+            return self.idempotent or not error.request_sent
+
+        status_code = getattr(error, "status_code", None)
+        if status_code is None or status_code not in self.retry_on_status:
+            # Validation, authentication and other client errors won't
+            # change on a second attempt
+            return False
+        return self.idempotent or status_code in REJECTED_STATUS_CODES
+
+    def next_delay(self, attempt: int, previous_delay: float, error: Exception) -> float:
+        """
+        Compute how long to wait before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (0-based)
+            previous_delay: Delay used before the failed attempt
+            error: The exception raised by the attempt
+
+        Returns:
+            Delay in seconds
+        """
+        if isinstance(error, InferraRateLimitError) and error.retry_after is not None:
+            # Honor Retry-After, spreading callers over a short window so
+            # they don't all come back at the same instant
+            return float(error.retry_after) + random.uniform(0, min(1.0, 0.1 * error.retry_after))
+
+        if self.jitter == "decorrelated":
+            upper = max(self.initial_delay, previous_delay * 3)
+            return min(self.max_delay, random.uniform(self.initial_delay, upper))
+
+        backoff = min(self.max_delay, self.initial_delay * self.exponential_base ** attempt)
+        if self.jitter == "full":
+            return random.uniform(0, backoff)
+        return backoff
+
+    def __call__(self, func):
+        """Wrap an async function (an API method) with this policy."""
+        policy = self
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            metrics = policy.metrics
+            metrics.increment("calls")
+            policy.budget.deposit()
+
+            timeout = policy.deadline
+            if timeout is None:
+                # API methods are bound to an object holding the client
+                config = getattr(getattr(args[0], "client", None), "config", None) if args else None
+                timeout = getattr(config, "timeout", None)
+
+            deadline = request_deadline.get()
+            if timeout is not None:
+                own_deadline = time.monotonic() + timeout
+                deadline = own_deadline if deadline is None else min(deadline, own_deadline)
+            token = request_deadline.set(deadline)
+            attempt_token = request_attempt.set(0)
+
+            try:
+                delay = 0.0
+                for attempt in range(policy.max_retries + 1):
+                    if attempt:
+                        request_attempt.set(attempt)
+                    try:
+                        result = await func(*args, **kwargs)
+                        if attempt:
+                            metrics.increment("successes_after_retry")
+                        return result
+                    except Exception as e:
+                        if not policy.is_retryable(e):
+                            metrics.increment("not_retryable")
+                            raise
+
+                        if attempt == policy.max_retries:
+                            metrics.increment("exhausted")
+                            raise
+
+                        if isinstance(e, InferraRateLimitError) and getattr(e, "global_pause", False):
+                            # The client already pauses every request until
+                            # Retry-After expires; just queue up again.
+                            delay = 0.0
+                        else:
+                            delay = policy.next_delay(attempt, delay, e)
+
+                        if deadline is not None and time.monotonic() + delay >= deadline:
+                            metrics.increment("deadline_exceeded")
+                            raise
+
+                        if not policy.budget.withdraw():
+                            metrics.increment("budget_exhausted")
+                            raise
+
+                        metrics.record_retry(getattr(e, "status_code", None), delay)
+                        await asyncio.sleep(delay)
+            finally:
+                request_attempt.reset(attempt_token)
+                request_deadline.reset(token)
+
+        wrapper.retry_policy = policy
+        return wrapper
 
 def retry_with_exponential_backoff(
     max_retries: int = 3,
     initial_delay: float = 1,
     max_delay: float = 60,
     exponential_base: float = 2,
-    retry_on: Optional[Union[Type[Exception], Tuple[Type[Exception], ...]]] = None
+    retry_on: Optional[Union[Type[Exception], Tuple[Type[Exception], ...]]] = None,
+    jitter: Optional[str] = "full",
+    idempotent: bool = True,
+    deadline: Optional[float] = None,
+    policy: Optional[RetryPolicy] = None
 ):
     """
     Decorator that retries an async function with exponential backoff.
-    
+
     Args:
         max_retries: Maximum number of retries
         initial_delay: Initial delay between retries in seconds
         max_delay: Maximum delay between retries in seconds
         exponential_base: Base for exponential backoff
         retry_on: Exception or tuple of exceptions to retry on
+        jitter: Jitter strategy, see RetryPolicy
+        idempotent: Whether repeating the call is safe, see RetryPolicy
+        deadline: Total seconds a call may take across all attempts, see
+            RetryPolicy
+        policy: A fully configured RetryPolicy, overriding the other arguments
     """
-    if retry_on is None:
-        retry_on = (InferraAPIError,)
+    return policy or RetryPolicy(
+        max_retries=max_retries,
+        initial_delay=initial_delay,
+        max_delay=max_delay,
+        exponential_base=exponential_base,
+        jitter=jitter,
+        retry_on=retry_on,
+        idempotent=idempotent,
+        deadline=deadline
+    )
 
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            delay = initial_delay
-            last_exception = None
-
-            for attempt in range(max_retries + 1):
-                try:
-                    return await func(*args, **kwargs)
-                except retry_on as e:
-                    last_exception = e
-                    
-                    if attempt == max_retries:
-                        raise last_exception
-                    
-                    if isinstance(e, InferraRateLimitError):
-                        # Use retry-after header if available
-                        retry_after = getattr(e, 'retry_after', None)
-                        if retry_after is not None:
-                            delay = float(retry_after)
-                    
-                    # Calculate next delay with exponential backoff
-                    await asyncio.sleep(min(delay, max_delay))
-                    delay *= exponential_base
-                
-                except Exception as e:
-                    # Don't retry on unspecified exceptions
-                    raise e
-
-            raise last_exception
+def track_in_flight(func):
+    """
+    Decorator counting an API method as in flight on its client while it runs.
 
-        return wrapper
-    return decorator
+    Applied on top of the retry decorator, so a call sleeping before its
+    next attempt is still in flight: close() waits for the whole call and
+    lets its remaining attempts through instead of failing them.
+    """
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        async with self.client._track_call():
+            return await func(self, *args, **kwargs)
+
+    return wrapper
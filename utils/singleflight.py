@@ -0,0 +1,289 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from ..exceptions import InferraAPIError, InferraConnectionError
+
+class SingleFlightStats:
+    """Counters describing request coalescing."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.deduplicated = 0
+        self.stream_requests = 0
+        self.stream_deduplicated = 0
+        self.slow_consumers = 0
+
+    def increment(self, counter: str):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> dict:
+        """Get a copy of the current counters."""
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "deduplicated": self.deduplicated,
+                "stream_requests": self.stream_requests,
+                "stream_deduplicated": self.stream_deduplicated,
+                "slow_consumers": self.slow_consumers,
+            }
+
+class _Call:
+    """A request in flight and the number of callers waiting for it."""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+class _End:
+    """Marks the end of a teed stream."""
+
+class _Failure:
+    """Carries an upstream error to the consumers of a teed stream."""
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+_END = _End()
+
+class _Consumer:
+    """Buffer of one consumer of a teed stream."""
+    __slots__ = ("queue", "error")
+
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(buffer_size)
+        self.error: Optional[BaseException] = None
+
+class _StreamTee:
+    """
+    Fan one upstream event stream out to several consumers.
+
+    Each consumer gets a bounded buffer. The upstream is read only as fast
+    as the slowest consumer drains its buffer, so memory stays bounded. A
+    consumer that stops reading for ``stall_timeout`` seconds is detached
+    with an error instead of stalling the others.
+    """
+    def __init__(
+        self,
+        buffer_size: int,
+        stall_timeout: Optional[float],
+        on_sealed: Callable[[], None],
+        stats: SingleFlightStats
+    ):
+        self.buffer_size = buffer_size
+        self.stall_timeout = stall_timeout
+        self.on_sealed = on_sealed
+        self.stats = stats
+        self.consumers: List[_Consumer] = []
+        self.started = False
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> Optional[AsyncIterator[Any]]:
+        """
+        Add a consumer.
+
+        Returns:
+            An async iterator over the events, or None if the stream has
+            already started (a late consumer would miss events)
+        """
+        if self.started:
+            return None
+        consumer = _Consumer(self.buffer_size)
+        self.consumers.append(consumer)
+        return self._consume(consumer)
+
+    def start(self, upstream: AsyncIterator[Any]):
+        """Start pumping the upstream into the consumer buffers."""
+        self.task = asyncio.ensure_future(self._pump(upstream))
+
+    def fail(self, error: BaseException):
+        """Fail every consumer before the upstream could be opened."""
+        self._seal()
+        for consumer in self.consumers:
+            consumer.error = error
+            consumer.queue.put_nowait(_Failure(error))
+
+    async def _consume(self, consumer: _Consumer) -> AsyncIterator[Any]:
+        try:
+            while True:
+                if consumer.error is not None:
+                    raise consumer.error
+                item = await consumer.queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self._unsubscribe(consumer)
+
+    def _seal(self):
+        """Stop accepting new consumers."""
+        if not self.started:
+            self.started = True
+            self.on_sealed()
+
+    def _unsubscribe(self, consumer: _Consumer):
+        if consumer in self.consumers:
+            self.consumers.remove(consumer)
+            # Free the buffer so a put blocked on it returns at once instead
+            # of holding up the other consumers until the stall timeout
+            while not consumer.queue.empty():
+                consumer.queue.get_nowait()
+        if not self.consumers:
+            # Nobody is listening any more; stop reading and let the
+            # upstream release its connection
+            self._seal()
+            if self.task is not None and not self.task.done():
+                self.task.cancel()
+
+    async def _put(self, consumer: _Consumer, item: Any):
+        if consumer not in self.consumers:
+            # Left while the pump was serving the consumers before it
+            return
+        try:
+            await asyncio.wait_for(consumer.queue.put(item), self.stall_timeout)
+        except asyncio.TimeoutError:
+            if consumer in self.consumers:
+                consumer.error = InferraAPIError("Stream consumer fell too far behind and was detached")
+                self.consumers.remove(consumer)
+                self.stats.increment("slow_consumers")
+
+    async def _pump(self, upstream: AsyncIterator[Any]):
+        final: Any = _END
+        try:
+            async for event in upstream:
+                self._seal()
+                for consumer in list(self.consumers):
+                    await self._put(consumer, event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            final = _Failure(e)
+        finally:
+            self._seal()
+            await upstream.aclose()
+
+        for consumer in list(self.consumers):
+            await self._put(consumer, final)
+
+class SingleFlight:
+    def __init__(self, stream_buffer_size: int = 64, stall_timeout: Optional[float] = 60.0):
+        """
+        Coalesce identical requests that are in flight at the same time.
+
+        The first caller for a key performs the request; callers arriving
+        while it is in flight share its outcome instead of sending their own.
+        Streams are shared only until their first event has been read, since
+        later consumers would miss the events before they joined.
+
+        Args:
+            stream_buffer_size: Events buffered per consumer of a shared stream
+            stall_timeout: Seconds a stream consumer may stop reading before it
+                is detached (None waits forever)
+        """
+        self.stream_buffer_size = stream_buffer_size
+        self.stall_timeout = stall_timeout
+        self.stats = SingleFlightStats()
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _StreamTee] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``func`` once for all concurrent callers using the same key.
+
+        Every caller receives the same result object, so results must be
+        treated as read-only. The request is cancelled only when every
+        caller waiting for it has been cancelled.
+
+        Args:
+            key: Identity of the request
+            func: Performs the request
+
+        Returns:
+            The result of the shared call
+        """
+        self.stats.increment("requests")
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        else:
+            self.stats.increment("deduplicated")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    async def stream(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[AsyncIterator[Any]]]
+    ) -> AsyncIterator[Any]:
+        """
+        Open one upstream stream for all concurrent callers using the same key.
+
+        Args:
+            key: Identity of the request
+            func: Opens the stream and returns an async iterator of events
+
+        Returns:
+            An async iterator over the shared events
+        """
+        self.stats.increment("stream_requests")
+        tee = self._streams.get(key)
+        if tee is not None:
+            consumer = tee.subscribe()
+            if consumer is not None:
+                self.stats.increment("stream_deduplicated")
+                return consumer
+
+        tee = _StreamTee(
+            self.stream_buffer_size,
+            self.stall_timeout,
+            lambda: self._forget(self._streams, key, tee),
+            self.stats
+        )
+        consumer = tee.subscribe()
+        self._streams[key] = tee
+        try:
+            upstream = await func()
+        except asyncio.CancelledError:
+            # Only the caller that opened the stream was cancelled; let the
+            # others retry on their own
+            tee.fail(InferraConnectionError("Shared stream was cancelled", request_sent=False))
+            raise
+        except BaseException as e:
+            tee.fail(e)
+            raise
+
+        tee.start(upstream)
+        return consumer
+
+    def joinable(self, key: str, stream: bool = False) -> bool:
+        """
+        Check whether a caller using a key now would share a request in flight.
+
+        Args:
+            key: Identity of the request
+            stream: Whether the caller would go through stream() rather than do()
+
+        Returns:
+            True if the caller would send nothing of its own
+        """
+        if stream:
+            tee = self._streams.get(key)
+            return tee is not None and not tee.started
+        return key in self._calls
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any):
+        if registry.get(key) is entry:
+            del registry[key]
@@ -1,50 +1,195 @@
-from typing import AsyncIterator, Any
-import json
+from typing import AsyncIterator, List, Optional, Tuple
+from . import codec
 from ..exceptions import InferraAPIError
 
-class StreamProcessor:
-    @staticmethod
-    async def process_stream(response: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+DONE_SENTINEL = b"[DONE]"
+
+class SSEDecoder:
+    """
+    Incremental decoder for server-sent event streams.
+
+    Bytes are fed in as they arrive from the network and complete events are
+    returned as soon as their terminating blank line has been seen. Partial
+    events stay in a single reusable buffer instead of being re-joined with
+    every new chunk.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._crlf = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
         """
-        Process a streaming response.
-        
+        Feed raw bytes into the decoder.
+
         Args:
-            response: Raw streaming response
-            
-        Yields:
-            Parsed JSON chunks
+            chunk: Bytes received from the network
+
+        Returns:
+            The data payloads of all events completed by this chunk
         """
-        async for chunk in response:
-            if chunk:
-                # Remove 'data: ' prefix if present
-                if chunk.startswith(b'data: '):
-                    chunk = chunk[6:]
-                
-                # Skip keep-alive
-                if chunk.strip() == b'':
-                    continue
-                
-                try:
-                    yield json.loads(chunk)
-                except json.JSONDecodeError as e:
-                    raise InferraAPIError(f"Error decoding streaming response: {str(e)}")
+        self._buffer += chunk
+        if not self._crlf and b"\r" in chunk:
+            self._crlf = True
+        events = []
+        start = 0
 
-    @staticmethod
-    def format_chunk(chunk: dict) -> str:
+        while True:
+            end, separator_length = self._find_boundary(start)
+            if end == -1:
+                break
+            data = self._parse_event(self._buffer, start, end)
+            if data is not None:
+                events.append(data)
+            start = end + separator_length
+
+        if start:
+            del self._buffer[:start]
+        return events
+
+    def flush(self) -> List[bytes]:
         """
-        Format a chunk for display.
-        
-        Args:
-            chunk: Response chunk
-            
+        Decode whatever is left in the buffer once the stream has ended.
+
         Returns:
-            Formatted string
+            The data payload of the trailing event, if the server did not
+            terminate it with a blank line
         """
-        if not chunk.get('choices'):
-            return ''
-        
-        choice = chunk['choices'][0]
-        if not choice.get('delta') or 'content' not in choice['delta']:
-            return ''
-            
-        return choice['delta']['content']
+        if not self._buffer.strip():
+            self._buffer.clear()
+            return []
+
+        data = self._parse_event(self._buffer, 0, len(self._buffer))
+        self._buffer.clear()
+        return [data] if data is not None else []
+
+    def _find_boundary(self, start: int) -> Tuple[int, int]:
+        """Find the next blank line separating two events."""
+        lf = self._buffer.find(b"\n\n", start)
+        if not self._crlf:
+            return (lf, 2) if lf != -1 else (-1, 0)
+        crlf = self._buffer.find(b"\r\n\r\n", start)
+        if crlf != -1 and (lf == -1 or crlf < lf):
+            return crlf, 4
+        if lf != -1:
+            return lf, 2
+        return -1, 0
+
+    @staticmethod
+    def _parse_event(buffer: bytearray, start: int, end: int) -> Optional[bytes]:
+        """Extract the (possibly multi-line) data field of a single event."""
+        data_lines = []
+        for line in buffer[start:end].split(b"\n"):
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            if not line.startswith(b"data:"):
+                # Comments (keep-alives), event names and ids carry no payload
+                continue
+            value = line[5:]
+            if value.startswith(b" "):
+                value = value[1:]
+            data_lines.append(value)
+
+        if not data_lines:
+            return None
+        return b"\n".join(data_lines)
+
+class SSEStream:
+    """
+    Async iterator over the JSON events of a streaming response.
+
+    The stream owns the response: the connection stays open while events
+    are being consumed and is handed back to the pool once ``[DONE]`` or the
+    end of the body is reached. If the consumer stops early (break, cancel
+    or an error), the connection is closed instead of being reused.
+
+    A stream must either be consumed or closed, with ``aclose()`` or
+    ``async with``. One that is dropped before its first event closes its
+    connection when it is garbage collected rather than keeping it checked
+    out of the pool.
+
+    Example:
+        async with await client.post(path, json=payload, stream=True) as events:
+            async for event in events:
+                ...
+    """
+    def __init__(self, response):
+        self.response = response
+        self._events = _iter_events(response)
+        self._started = False
+
+    def __aiter__(self) -> "SSEStream":
+        return self
+
+    async def __anext__(self) -> dict:
+        self._started = True
+        return await self._events.__anext__()
+
+    async def aclose(self):
+        """Stop the stream and release its connection."""
+        if self._started:
+            await self._events.aclose()
+        else:
+            # The generator never ran, so its cleanup would not either
+            self._started = True
+            self.response.close()
+
+    async def __aenter__(self) -> "SSEStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def __del__(self):
+        # A started stream is finalized by its generator; one that was never
+        # iterated still holds the connection
+        if not self._started:
+            self.response.close()
+
+def iter_sse_events(response) -> SSEStream:
+    """
+    Iterate over the JSON events of a streaming response.
+
+    Args:
+        response: An open aiohttp response whose body is an SSE stream
+
+    Returns:
+        An SSEStream yielding the decoded event payloads, which raises
+        InferraAPIError if an event cannot be decoded or reports an error
+    """
+    return SSEStream(response)
+
+async def _iter_events(response) -> AsyncIterator[dict]:
+    """Decode the events of a response, releasing or closing it at the end."""
+    decoder = SSEDecoder()
+    finished = False
+
+    try:
+        async for chunk in response.content.iter_any():
+            for data in decoder.feed(chunk):
+                if data == DONE_SENTINEL:
+                    finished = True
+                    return
+                yield _decode_event(data)
+
+        for data in decoder.flush():
+            if data != DONE_SENTINEL:
+                yield _decode_event(data)
+        finished = True
+    finally:
+        if finished:
+            response.release()
+        else:
+            response.close()
+
+def _decode_event(data: bytes) -> dict:
+    """Decode a single event payload, surfacing in-stream API errors."""
+    try:
+        event = codec.loads(data)
+    except codec.DecodeError as e:
+        raise InferraAPIError(f"Error decoding streaming response: {str(e)}")
+
+    if isinstance(event, dict) and event.get("error"):
+        error = event["error"]
+        message = error.get("message", "Unknown error") if isinstance(error, dict) else str(error)
+        raise InferraAPIError(f"Error in streaming response: {message}", response=event)
+    return event
@@ -1,54 +1,154 @@
-from typing import List, Dict, Optional
-import tiktoken
-from ..models.chat import Message
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 from ..exceptions import InferraAPIError
 
+if TYPE_CHECKING:
+    from ..models.chat import Message
+
+# Texts shorter than this are memoized by value: hashing them would cost
+# about as much as the dictionary lookup saves
+HASH_THRESHOLD = 64
+
+# Below this many texts to encode, starting threads costs more than it saves
+PARALLEL_THRESHOLD = 256
+
+# Every reply is primed with <|start|>assistant<|message|>
+REPLY_PRIMING_TOKENS = 3
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """
+    Get the tiktoken encoding of a model, shared by the whole process.
+
+    tiktoken is imported and the encoding loaded on the first call for a
+    model; later calls return the same encoding object.
+
+    Args:
+        model: The model identifier
+
+    Returns:
+        The tiktoken Encoding
+    """
+    # tiktoken is slow to import and its encodings slower to load, so
+    # neither is paid for until a token is actually counted
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Fall back to cl100k_base for unknown models
+        return tiktoken.get_encoding("cl100k_base")
+
+class TokenCountMemo:
+    def __init__(self, max_entries: int = 16384):
+        """
+        Initialize an LRU memo of token counts.
+
+        Counts are keyed by encoding and content hash, so a system prompt
+        repeated across thousands of requests is only encoded once, and
+        the memo never keeps the (possibly large) texts themselves alive.
+
+        Args:
+            max_entries: Maximum number of counts kept
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Any], int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(encoding_name: str, text: str) -> Tuple[str, Any]:
+        """Build the memo key of a text."""
+        if len(text) < HASH_THRESHOLD:
+            return encoding_name, text
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return encoding_name, digest
+
+    def get_many(self, keys: Sequence[Tuple[str, Any]]) -> List[Optional[int]]:
+        """
+        Look up several counts at once.
+
+        Returns:
+            The count of each key, or None where it is not memoized
+        """
+        counts = []
+        with self._lock:
+            entries = self._entries
+            for key in keys:
+                count = entries.get(key)
+                if count is not None:
+                    entries.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                counts.append(count)
+        return counts
+
+    def set_many(self, items: Iterable[Tuple[Tuple[str, Any], int]]):
+        """Memoize several counts at once, evicting the least recently used."""
+        with self._lock:
+            entries = self._entries
+            for key, count in items:
+                entries[key] = count
+                entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every count."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Shared by every TokenCounter that isn't given its own memo
+default_memo = TokenCountMemo()
+
 class TokenCounter:
-    def __init__(self, model: str):
+    def __init__(self, model: str, memo: Optional[TokenCountMemo] = None):
         """
         Initialize token counter for a specific model.
-        
+
         Args:
             model: The model identifier
+            memo: Memo of token counts (defaults to one shared by the process)
         """
-        try:
-            self.encoder = tiktoken.encoding_for_model(model)
-        except KeyError:
-            # Fall back to cl100k_base for unknown models
-            self.encoder = tiktoken.get_encoding("cl100k_base")
-        
+        self.model = model
+        self.memo = memo if memo is not None else default_memo
+
         # Model-specific settings
         self.tokens_per_message = 3  # Default for most models
         self.tokens_per_name = 1
-        
+
         if "llama" in model.lower():
             self.tokens_per_message = 4
             self.tokens_per_name = 2
 
-    def count_message_tokens(self, messages: List[Message]) -> Dict[str, int]:
+    @property
+    def encoder(self):
+        """The tiktoken encoding, loaded on first use and shared by the process."""
+        return get_encoding(self.model)
+
+    def count_message_tokens(self, messages: List["Message"]) -> Dict[str, int]:
         """
         Count tokens in a list of chat messages.
-        
+
         Args:
             messages: List of chat messages
-            
+
         Returns:
             Dictionary with prompt_tokens, completion_tokens, and total_tokens
         """
-        num_tokens = 0
-        
-        for message in messages:
-            num_tokens += self.tokens_per_message
-            
-            for key, value in message.dict().items():
-                if value:
-                    num_tokens += len(self.encoder.encode(str(value)))
-                    if key == "name":
-                        num_tokens += self.tokens_per_name
-        
-        # Every reply is primed with <|start|>assistant<|message|>
-        num_tokens += 3
-        
+        num_tokens = self.count_many([messages])[0]
+
         return {
             "prompt_tokens": num_tokens,
             "completion_tokens": 0,  # Will be filled by API response
@@ -58,11 +158,95 @@ class TokenCounter:
     def count_string_tokens(self, text: str) -> int:
         """
         Count tokens in a string.
-        
+
         Args:
             text: Input text
-            
+
         Returns:
             Number of tokens
         """
-        return len(self.encoder.encode(text))
+        return self.count_many([text])[0]
+
+    def count_many(
+        self,
+        items: Iterable[Union[str, List["Message"]]],
+        num_threads: Optional[int] = None
+    ) -> List[int]:
+        """
+        Count the tokens of many prompts or conversations at once.
+
+        Every distinct text is looked up in the memo, and the ones that
+        aren't memoized are encoded in bulk on ``num_threads`` threads
+        (tiktoken releases the GIL while encoding). This is much faster than
+        counting items one by one when budgeting a large batch ahead of time.
+
+        Args:
+            items: Prompts (strings) and/or conversations (lists of messages)
+            num_threads: Threads used to encode texts that aren't memoized
+                (defaults to the number of CPUs, up to 8)
+
+        Returns:
+            Token count of each item, in order. Conversations are counted
+            like count_message_tokens()'s prompt_tokens.
+        """
+        # Each item becomes a fixed overhead plus the texts it contains
+        plans: List[Tuple[int, List[str]]] = []
+        for item in items:
+            if isinstance(item, str):
+                plans.append((0, [item]))
+            else:
+                plans.append(self._plan_messages(item))
+
+        encoding = self.encoder
+        keys = {}
+        for _, texts in plans:
+            for text in texts:
+                if text not in keys:
+                    keys[text] = self.memo.key(encoding.name, text)
+
+        texts = list(keys)
+        counts = dict(zip(texts, self.memo.get_many([keys[text] for text in texts])))
+        missing = [text for text, count in counts.items() if count is None]
+        if missing:
+            new_counts = _count_texts(encoding, missing, num_threads)
+            counts.update(zip(missing, new_counts))
+            self.memo.set_many(zip((keys[text] for text in missing), new_counts))
+
+        return [overhead + sum(counts[text] for text in texts) for overhead, texts in plans]
+
+    def _plan_messages(self, messages: List["Message"]) -> Tuple[int, List[str]]:
+        """Split a conversation into its fixed token overhead and its texts."""
+        overhead = REPLY_PRIMING_TOKENS
+        texts = []
+        for message in messages:
+            overhead += self.tokens_per_message
+            # Read the fields directly rather than building a dict per message
+            fields = message if isinstance(message, dict) else message.__dict__
+            for key, value in fields.items():
+                if value:
+                    texts.append(value if isinstance(value, str) else str(value))
+                    if key == "name":
+                        overhead += self.tokens_per_name
+        return overhead, texts
+
+def _count_texts(encoding, texts: List[str], num_threads: Optional[int]) -> List[int]:
+    """Count the tokens of each text, splitting large lists across threads."""
+    # encode_ordinary: special-token text in a prompt is counted like any
+    # other text instead of raising
+    encode = encoding.encode_ordinary
+
+    def count(part: List[str]) -> List[int]:
+        return [len(encode(text)) for text in part]
+
+    if num_threads is None:
+        num_threads = min(8, os.cpu_count() or 1)
+    if num_threads <= 1 or len(texts) < PARALLEL_THRESHOLD:
+        return count(texts)
+
+    # One contiguous slice per thread rather than one task per text (as
+    # encode_batch does), whose scheduling overhead exceeds the encoding
+    # of short texts
+    size = -(-len(texts) // num_threads)
+    parts = [texts[start:start + size] for start in range(0, len(texts), size)]
+    with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="inferra-tokens") as pool:
+        return [n for counts in pool.map(count, parts) for n in counts]
@@ -1,42 +1,130 @@
-from typing import List, Optional
-from ..models.chat import Message
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterable, List, Sequence
 from ..exceptions import InferraAPIError
 from ..constants import AVAILABLE_MODELS
 
+if TYPE_CHECKING:
+    from ..models.chat import Message
+
+VALID_ROLES = frozenset({"system", "user", "assistant"})
+
+class MessageValidator:
+    def __init__(
+        self,
+        models: Iterable[str] = AVAILABLE_MODELS,
+        roles: Iterable[str] = VALID_ROLES,
+        validate_once: bool = False,
+        max_memo: int = 1024
+    ):
+        """
+        Initialize a precompiled validator for chat requests.
+
+        The model and role sets are frozen and the error hints formatted
+        once here, so validating a message costs a set lookup and a
+        non-copying whitespace check.
+
+        With ``validate_once``, message tuples are remembered by identity
+        once they pass, so a prefix reused across requests (a system prompt
+        plus few-shot examples kept in a tuple) is only checked the first
+        time. Lists are always checked since they may change between calls,
+        and messages inside a memoized tuple must not be modified.
+
+        Args:
+            models: Supported model identifiers
+            roles: Allowed message roles
+            validate_once: Skip message tuples that have already passed
+            max_memo: Maximum number of tuples remembered
+        """
+        models = list(models)
+        self.models = frozenset(models)
+        self.roles = frozenset(roles)
+        self._models_hint = ", ".join(models)
+        self._roles_hint = ", ".join(sorted(self.roles))
+
+        self.validate_once = validate_once
+        self.max_memo = max_memo
+        # Holding the tuples keeps their ids from being reused
+        self._validated: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validate_model(self, model: str) -> None:
+        """
+        Validate that the model is supported.
+
+        Args:
+            model: Model identifier
+
+        Raises:
+            InferraAPIError: If model is not supported
+        """
+        if model not in self.models:
+            raise InferraAPIError(
+                f"Model '{model}' is not supported. Available models: {self._models_hint}"
+            )
+
+    def validate_messages(self, messages: Sequence["Message"]) -> None:
+        """
+        Validate chat messages.
+
+        Args:
+            messages: List (or tuple) of chat messages
+
+        Raises:
+            InferraAPIError: If messages are invalid
+        """
+        if not messages:
+            raise InferraAPIError("Messages list cannot be empty")
+
+        if not (self.validate_once and type(messages) is tuple):
+            self._check(messages)
+            return
+
+        key = id(messages)
+        if self._validated.get(key) is messages:
+            return
+        self._check(messages)
+        with self._lock:
+            self._validated[key] = messages
+            while len(self._validated) > self.max_memo:
+                self._validated.popitem(last=False)
+
+    def _check(self, messages: Sequence["Message"]) -> None:
+        roles = self.roles
+        for message in messages:
+            if message.role not in roles:
+                raise InferraAPIError(
+                    f"Invalid role '{message.role}'. Must be one of: {self._roles_hint}"
+                )
+
+            # isspace() scans in place where strip() would copy the body
+            content = message.content
+            if not content or content.isspace():
+                raise InferraAPIError("Message content cannot be empty")
+
+# Used by the module-level functions
+default_validator = MessageValidator()
+
 def validate_model(model: str) -> None:
     """
     Validate that the model is supported.
-    
+
     Args:
         model: Model identifier
-        
+
     Raises:
         InferraAPIError: If model is not supported
     """
-    if model not in AVAILABLE_MODELS:
-        raise InferraAPIError(
-            f"Model '{model}' is not supported. Available models: {', '.join(AVAILABLE_MODELS)}"
-        )
+    default_validator.validate_model(model)
 
-def validate_messages(messages: List[Message]) -> None:
+def validate_messages(messages: List["Message"]) -> None:
     """
     Validate chat messages.
-    
+
     Args:
         messages: List of chat messages
-        
+
     Raises:
         InferraAPIError: If messages are invalid
     """
-    if not messages:
-        raise InferraAPIError("Messages list cannot be empty")
-    
-    valid_roles = {"system", "user", "assistant"}
-      for message in messages:
-        if message.role not in valid_roles:
-            raise InferraAPIError(
-                f"Invalid role '{message.role}'. Must be one of: {', '.join(valid_roles)}"
-            )
-        
-        if not message.content or not message.content.strip():
-            raise InferraAPIError("Message content cannot be empty")
+    default_validator.validate_messages(messages)